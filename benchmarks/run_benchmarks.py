@@ -0,0 +1,384 @@
+"""Offline end-to-end benchmarks of llm_pyexecutor.
+
+Every scenario runs without network access, third-party packages are served
+from a wheelhouse holding a locally built wheel. Results are printed as a table
+and saved as JSON, a previous JSON file can be passed with ``--compare`` to
+print the change of the median of every scenario.
+
+Usage:
+    python benchmarks/run_benchmarks.py --output results.json
+    python benchmarks/run_benchmarks.py --scenarios extraction --compare old.json
+"""
+
+import argparse
+import json
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import zipfile
+from datetime import datetime, timezone
+from importlib import metadata
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from loguru import logger  # noqa: E402
+
+from llm_pyexecutor import LLMPythonCodeExecutor  # noqa: E402
+from llm_pyexecutor.cli import PipCommandsExtrator  # noqa: E402
+from llm_pyexecutor.code import PythonCodeExtractor  # noqa: E402
+from llm_pyexecutor.environment_manager import VenvTemplate  # noqa: E402
+
+STDLIB_SNIPPET = "```python\nimport json\nprint(json.dumps({'a': 1}))\n```"
+DEMO_PACKAGE = "llm_pyexecutor_bench"
+
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    """
+    Summarizes timing samples.
+
+    Args:
+        samples (List[float]): The measured durations in seconds.
+
+    Returns:
+        Dict[str, float]: The count, mean, min, max and the 50th, 90th and 99th
+        percentiles, in milliseconds.
+    """
+    ordered = sorted(samples)
+
+    def percentile(q: float) -> float:
+        index = min(int(round(q * (len(ordered) - 1))), len(ordered) - 1)
+        return ordered[index] * 1000
+
+    return {
+        "count": len(ordered),
+        "mean_ms": statistics.fmean(ordered) * 1000,
+        "min_ms": ordered[0] * 1000,
+        "p50_ms": percentile(0.50),
+        "p90_ms": percentile(0.90),
+        "p99_ms": percentile(0.99),
+        "max_ms": ordered[-1] * 1000,
+    }
+
+
+def measure(function: Callable[[], object], repeat: int) -> List[float]:
+    """
+    Times repeated calls of a function.
+
+    Args:
+        function (Callable[[], object]): The function to time.
+        repeat (int): The number of calls.
+
+    Returns:
+        List[float]: The duration of every call in seconds.
+    """
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def quiet() -> None:
+    """Drops the console log handlers, logging would dominate the timings."""
+    logger.remove()
+
+
+def synthetic_response(blocks: int) -> str:
+    """
+    Builds an LLM-like response with prose, pip commands, code and output blocks.
+
+    Args:
+        blocks (int): The number of python blocks.
+
+    Returns:
+        str: The response text.
+    """
+    parts = ["Here is how to solve it.\n", "```bash\npip install numpy, pandas\n```\n"]
+    for i in range(blocks):
+        parts.append(f"Step {i}: compute the value.\n")
+        parts.append(
+            "```python\n"
+            f"def step_{i}(values):\n"
+            f"    total_{i} = sum(value * {i} for value in values)\n"
+            f"    return total_{i}\n"
+            f"print(step_{i}(range(10)))\n"
+            "```\n"
+        )
+        parts.append(f"Output:\n```\n{45 * i}\n```\n")
+    return "".join(parts)
+
+
+def build_wheel(directory: Path, name: str = DEMO_PACKAGE) -> Path:
+    """
+    Writes a minimal pure-python wheel, so installs need no network.
+
+    Args:
+        directory (Path): The directory the wheel is written to.
+        name (str): The import and distribution name of the package.
+
+    Returns:
+        Path: The path of the wheel.
+    """
+    dist_info = f"{name}-0.1.dist-info"
+    files = {
+        f"{name}/__init__.py": "VALUE = 42\n",
+        f"{dist_info}/METADATA": f"Metadata-Version: 2.1\nName: {name}\nVersion: 0.1\n",
+        f"{dist_info}/WHEEL": (
+            "Wheel-Version: 1.0\nGenerator: benchmark\nRoot-Is-Purelib: true\n"
+            "Tag: py3-none-any\n"
+        ),
+        f"{dist_info}/top_level.txt": f"{name}\n",
+    }
+    files[f"{dist_info}/RECORD"] = "".join(
+        f"{path},,\n" for path in list(files) + [f"{dist_info}/RECORD"]
+    )
+    wheel = directory / f"{name}-0.1-py3-none-any.whl"
+    with zipfile.ZipFile(wheel, "w") as archive:
+        for path, content in files.items():
+            archive.writestr(path, content)
+    return wheel
+
+
+def bench_startup(work_dir: Path, repeat: int) -> Dict[str, Dict[str, float]]:
+    """Import of the executor in a fresh interpreter and executor construction."""
+    script = (
+        "import time\n"
+        "start = time.perf_counter()\n"
+        "from llm_pyexecutor import LLMPythonCodeExecutor\n"
+        "print(time.perf_counter() - start)\n"
+    )
+    root = str(Path(__file__).resolve().parent.parent)
+    import_samples = []
+    for _ in range(max(repeat // 10, 1)):
+        output = subprocess.run(
+            [sys.executable, "-c", script],
+            cwd=root,
+            capture_output=True,
+            encoding="utf-8",
+            check=True,
+        )
+        import_samples.append(float(output.stdout))
+    samples = []
+    for run in range(repeat):
+        executor_dir = work_dir / f"construct_{run}"
+        executor_dir.mkdir()
+        start = time.perf_counter()
+        LLMPythonCodeExecutor(
+            executor_dir_path=str(executor_dir), write_logs=False, log_level="ERROR"
+        )
+        samples.append(time.perf_counter() - start)
+    return {"import": percentiles(import_samples), "construct": percentiles(samples)}
+
+
+def bench_extraction(work_dir: Path, repeat: int) -> Dict[str, Dict[str, float]]:
+    """Extraction of code and pip packages from responses of growing size."""
+    code_extractor = PythonCodeExtractor()
+    pip_extractor = PipCommandsExtrator()
+    results = {}
+    for blocks in (1, 10, 100, 1000):
+        text = synthetic_response(blocks)
+
+        def extract() -> None:
+            pip_extractor.extract_packages(text)
+            code_extractor.extract_code(text)
+
+        summary = percentiles(measure(extract, repeat))
+        summary["response_bytes"] = len(text.encode("utf-8"))
+        summary["mb_per_s"] = summary["response_bytes"] / summary["p50_ms"] / 1000
+        results[f"blocks_{blocks}"] = summary
+    return results
+
+
+def bench_execute(work_dir: Path, repeat: int) -> Dict[str, Dict[str, float]]:
+    """Latency of stdlib-only snippets in cold and warm executors."""
+    results = {}
+    template = VenvTemplate(work_dir / "template")
+    template.ensure()
+    quiet()
+    for label, options in (
+        ("cold", {}),
+        ("cold_template", {"venv_template": template}),
+    ):
+        samples = []
+        for run in range(max(repeat // 10, 1)):
+            executor_dir = work_dir / f"{label}_{run}"
+            executor_dir.mkdir()
+            start = time.perf_counter()
+            executor = LLMPythonCodeExecutor(
+                executor_dir_path=str(executor_dir),
+                write_logs=False,
+                log_level="ERROR",
+                **options,
+            )
+            quiet()
+            executor.execute(STDLIB_SNIPPET)
+            samples.append(time.perf_counter() - start)
+            executor.close()
+            shutil.rmtree(executor_dir, ignore_errors=True)
+        results[label] = percentiles(samples)
+    warm_dir = work_dir / "warm"
+    warm_dir.mkdir()
+    variants = (
+        ("warm_subprocess", {}),
+        ("warm_worker_pool", {"worker_pool_size": 2}),
+        ("warm_zygote", {"preload_modules": ["json"]}),
+    )
+    for label, options in variants:
+        executor = LLMPythonCodeExecutor(
+            executor_dir_path=str(warm_dir),
+            write_logs=False,
+            log_level="ERROR",
+            **options,
+        )
+        quiet()
+        executor.execute(STDLIB_SNIPPET)
+        results[label] = percentiles(
+            measure(lambda: executor.execute(STDLIB_SNIPPET), repeat)
+        )
+        executor.close()
+    return results
+
+
+def bench_dependencies(work_dir: Path, repeat: int) -> Dict[str, Dict[str, float]]:
+    """Dependency checking and installation from a local wheelhouse."""
+    results = {}
+    executor_dir = work_dir / "deps"
+    executor_dir.mkdir()
+    executor = LLMPythonCodeExecutor(
+        executor_dir_path=str(executor_dir),
+        write_logs=False,
+        log_level="ERROR",
+        offline_install=True,
+    )
+    quiet()
+    executor._wheelhouse.add(build_wheel(work_dir))
+    text = f"```python\nimport {DEMO_PACKAGE}\nprint({DEMO_PACKAGE}.VALUE)\n```"
+    uninstall = [
+        executor._executor_venv.get_pyexecutor(),
+        "-m",
+        "pip",
+        "uninstall",
+        "-y",
+        DEMO_PACKAGE,
+    ]
+    install_samples = []
+    pip_samples = []
+    for _ in range(max(repeat // 10, 1)):
+        subprocess.run(uninstall, capture_output=True)
+        executor._executor_venv.get_installed_distributions().refresh()
+        start = time.perf_counter()
+        result = executor.execute_detailed(text, use_cache=False)
+        install_samples.append(time.perf_counter() - start)
+        if not result.ok:
+            raise RuntimeError(result.output)
+        pip_samples.append(result.timings["pip_install"])
+    results["install_from_wheelhouse"] = percentiles(install_samples)
+    results["pip_install_stage"] = percentiles(pip_samples)
+    results["dependency_check_installed"] = percentiles(
+        measure(lambda: executor._prepare(text, use_cache=False), repeat)
+    )
+    results["execute_installed"] = percentiles(
+        measure(lambda: executor.execute(text, use_cache=False), repeat)
+    )
+    executor.close()
+    return results
+
+
+SCENARIOS = {
+    "startup": bench_startup,
+    "extraction": bench_extraction,
+    "execute": bench_execute,
+    "dependencies": bench_dependencies,
+}
+
+
+def compare(results: Dict, baseline: Dict) -> None:
+    """
+    Prints the change of the median of every scenario against a baseline.
+
+    Args:
+        results (Dict): The current results.
+        baseline (Dict): Results loaded from a previous JSON report.
+    """
+    print(f"\n{'scenario':<45} {'baseline p50':>14} {'p50':>10} {'change':>9}")
+    for scenario, cases in results["results"].items():
+        for case, summary in cases.items():
+            old = baseline.get("results", {}).get(scenario, {}).get(case)
+            if old is None:
+                continue
+            change = (summary["p50_ms"] - old["p50_ms"]) / old["p50_ms"] * 100
+            print(
+                f"{scenario + '.' + case:<45} {old['p50_ms']:>12.2f}ms "
+                f"{summary['p50_ms']:>8.2f}ms {change:>+8.1f}%"
+            )
+
+
+def main(argv: Optional[List[str]] = None) -> Dict:
+    """
+    Runs the selected scenarios, prints and saves their results.
+
+    Args:
+        argv (Optional[List[str]]): The command line arguments.
+
+    Returns:
+        Dict: The JSON report.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--scenarios",
+        nargs="+",
+        choices=sorted(SCENARIOS),
+        default=list(SCENARIOS),
+        help="the scenarios to run",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=30, help="samples per case (cold cases use 1/10)"
+    )
+    parser.add_argument("--output", type=Path, help="where the JSON report is saved")
+    parser.add_argument("--compare", type=Path, help="a previous JSON report")
+    args = parser.parse_args(argv)
+
+    try:
+        version = metadata.version("llm-code-executor")
+    except metadata.PackageNotFoundError:
+        version = "unknown"
+    report = {
+        "version": version,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "repeat": args.repeat,
+        "results": {},
+    }
+    with tempfile.TemporaryDirectory(prefix="llm_pyexecutor_bench_") as tmp_dir:
+        for scenario in args.scenarios:
+            work_dir = Path(tmp_dir) / scenario
+            work_dir.mkdir()
+            report["results"][scenario] = SCENARIOS[scenario](work_dir, args.repeat)
+            quiet()
+
+    print(f"{'scenario':<45} {'p50':>10} {'p90':>10} {'p99':>10}")
+    for scenario, cases in report["results"].items():
+        for case, summary in cases.items():
+            print(
+                f"{scenario + '.' + case:<45} {summary['p50_ms']:>8.2f}ms "
+                f"{summary['p90_ms']:>8.2f}ms {summary['p99_ms']:>8.2f}ms"
+            )
+    if args.compare is not None:
+        with open(args.compare, "r", encoding="utf-8") as file:
+            compare(report, json.load(file))
+    if args.output is not None:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+    return report
+
+
+if __name__ == "__main__":
+    main()
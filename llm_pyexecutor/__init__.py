@@ -1 +1,41 @@
-from llm_pyexecutor.local_executor import LLMPythonCodeExecutor
+from typing import TYPE_CHECKING
+
+from llm_pyexecutor._lazy import lazy_exports
+
+if TYPE_CHECKING:
+    from llm_pyexecutor.code.resources import ResourceLimits
+    from llm_pyexecutor.exceptions import ExecutorServerError, SchedulerFullError
+    from llm_pyexecutor.local_executor import LLMPythonCodeExecutor
+    from llm_pyexecutor.result import ExecutionResult
+    from llm_pyexecutor.scheduler import ExecutionScheduler, SchedulerMetrics
+    from llm_pyexecutor.server import ExecutorClient, ExecutorServer
+    from llm_pyexecutor.session import ExecutionSession
+
+__all__ = [
+    "ExecutionResult",
+    "ExecutionScheduler",
+    "ExecutionSession",
+    "ExecutorClient",
+    "ExecutorServer",
+    "ExecutorServerError",
+    "LLMPythonCodeExecutor",
+    "ResourceLimits",
+    "SchedulerFullError",
+    "SchedulerMetrics",
+]
+
+__getattr__, __dir__ = lazy_exports(
+    __name__,
+    {
+        "ResourceLimits": ".code.resources",
+        "ExecutorServerError": ".exceptions",
+        "SchedulerFullError": ".exceptions",
+        "LLMPythonCodeExecutor": ".local_executor",
+        "ExecutionResult": ".result",
+        "ExecutionScheduler": ".scheduler",
+        "SchedulerMetrics": ".scheduler",
+        "ExecutorClient": ".server",
+        "ExecutorServer": ".server",
+        "ExecutionSession": ".session",
+    },
+)
@@ -0,0 +1,38 @@
+import importlib
+from typing import Any, Callable, Dict, List, Tuple
+
+
+def lazy_exports(
+    package: str, exports: Dict[str, str]
+) -> Tuple[Callable[[str], Any], Callable[[], List[str]]]:
+    """
+    Builds the module ``__getattr__`` and ``__dir__`` of a package whose public names
+    are imported from their submodules on first access (PEP 562).
+
+    Importing the package then costs nothing beyond the package itself, a submodule
+    and its dependencies are imported when one of its names is used. The imported
+    name is stored in the package namespace, so later accesses are plain lookups.
+
+    Args:
+        package (str): The name of the package, i.e. ``__name__``.
+        exports (Dict[str, str]): The submodule, relative to the package, holding
+            every public name, e.g. {"PythonCodeExtractor": ".extractor"}.
+
+    Returns:
+        Tuple[Callable[[str], Any], Callable[[], List[str]]]: The ``__getattr__`` and
+        ``__dir__`` functions of the package.
+    """
+    namespace = importlib.import_module(package).__dict__
+
+    def __getattr__(name: str) -> Any:
+        submodule = exports.get(name)
+        if submodule is None:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+        value = getattr(importlib.import_module(submodule, package), name)
+        namespace[name] = value
+        return value
+
+    def __dir__() -> List[str]:
+        return sorted(set(namespace) | set(exports))
+
+    return __getattr__, __dir__
@@ -1 +1,10 @@
-from llm_pyexecutor.cli.extractor import PipCommandsExtrator
+from typing import TYPE_CHECKING
+
+from llm_pyexecutor._lazy import lazy_exports
+
+if TYPE_CHECKING:
+    from llm_pyexecutor.cli.extractor import PipCommandsExtrator
+
+__all__ = ["PipCommandsExtrator"]
+
+__getattr__, __dir__ = lazy_exports(__name__, {"PipCommandsExtrator": ".extractor"})
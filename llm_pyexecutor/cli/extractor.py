@@ -1,5 +1,7 @@
 import re
-from typing import List
+from typing import Iterable, List, Union
+
+from llm_pyexecutor.fences import FencedBlock, dedup_lines, parse_fenced_blocks
 
 
 class PipCommandsExtrator:
@@ -53,12 +55,7 @@ class PipCommandsExtrator:
         Returns:
             str: The Python code with duplicate lines removed.
         """
-        code_lines = code.split("\n")
-        unique_lines = []
-        for line in code_lines:
-            if line not in unique_lines:
-                unique_lines.append(line)
-        return "".join(line + "\n" for line in unique_lines)
+        return dedup_lines(code)
 
     @staticmethod
     def get_packages(commands: str) -> List[str]:
@@ -83,22 +80,39 @@ class PipCommandsExtrator:
                 clean_pkgs.extend(ele.split(","))
         return [pkg.strip() for pkg in clean_pkgs]
 
-    def extract_packages(self, text: str, separator: str = "```") -> str:
+    def extract_packages_from_blocks(self, blocks: List[FencedBlock]) -> List[str]:
         """
-        Extracts package names from pip install commands found in a given text.
+        Extracts package names from the pip install commands of parsed fenced blocks.
 
         Args:
-            text (str): The input text containing code snippets.
-            separator (str): The separator used to identify code blocks (default is "```").
+            blocks (List[FencedBlock]): The fenced blocks of the response.
 
         Returns:
             List[str]: A list of package names extracted from the pip install commands.
         """
-        if separator in text and len(text.split(separator)) > 1:
-            codes = text.split(separator)
-        codes = [PipCommandsExtrator.get_pip_install_command(code) for code in codes]
-        codes = [code for code in codes if code is not None]
+        codes = [
+            block.content.strip()
+            for block in blocks
+            if block.kind in ("shell", "output")
+        ]
+        codes = [code for code in codes if code.startswith("pip install")]
         clean_code = "".join(line + "\n" for line in codes)
         clean_code = PipCommandsExtrator.remove_repititive_lines(clean_code)
         pkgs = PipCommandsExtrator.get_packages(clean_code)
         return pkgs
+
+    def extract_packages(
+        self, text: Union[str, Iterable[str]], separator: str = "```"
+    ) -> List[str]:
+        """
+        Extracts package names from pip install commands found in a given text.
+
+        Args:
+            text (Union[str, Iterable[str]]): The input text containing code
+                snippets, or its chunks as streamed by the LLM.
+            separator (str): The separator used to identify code blocks (default is "```").
+
+        Returns:
+            List[str]: A list of package names extracted from the pip install commands.
+        """
+        return self.extract_packages_from_blocks(parse_fenced_blocks(text, separator))
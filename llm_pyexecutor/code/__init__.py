@@ -1,6 +1,49 @@
-from llm_pyexecutor.code.extractor import PythonCodeExtractor
-from llm_pyexecutor.code.dependecies import (
-    extract_dependecies,
-    is_standard_package,
-)
-from llm_pyexecutor.code.executor import PythonCodeExecutor
+from typing import TYPE_CHECKING
+
+from llm_pyexecutor._lazy import lazy_exports
+
+if TYPE_CHECKING:
+    from llm_pyexecutor.code.cache import ExecutionResultCache
+    from llm_pyexecutor.code.extractor import PythonCodeExtractor
+    from llm_pyexecutor.code.dependecies import (
+        ais_standard_package,
+        extract_dependecies,
+        is_standard_package,
+    )
+    from llm_pyexecutor.code.executor import OutputChunk, PythonCodeExecutor
+    from llm_pyexecutor.code.output import SpilledOutput
+    from llm_pyexecutor.code.resources import (
+        CodeRunResult,
+        ResourceLimits,
+        ResourceUsage,
+    )
+    from llm_pyexecutor.code.scratch import Artifact, ScratchDirectory
+    from llm_pyexecutor.code.session import PythonSession
+    from llm_pyexecutor.code.worker_pool import PythonWorker, PythonWorkerPool
+    from llm_pyexecutor.code.unit import CodeUnit
+    from llm_pyexecutor.code.zygote import PythonZygote
+
+_EXPORTS = {
+    "ExecutionResultCache": ".cache",
+    "PythonCodeExtractor": ".extractor",
+    "ais_standard_package": ".dependecies",
+    "extract_dependecies": ".dependecies",
+    "is_standard_package": ".dependecies",
+    "OutputChunk": ".executor",
+    "PythonCodeExecutor": ".executor",
+    "SpilledOutput": ".output",
+    "CodeRunResult": ".resources",
+    "ResourceLimits": ".resources",
+    "ResourceUsage": ".resources",
+    "Artifact": ".scratch",
+    "ScratchDirectory": ".scratch",
+    "PythonSession": ".session",
+    "PythonWorker": ".worker_pool",
+    "PythonWorkerPool": ".worker_pool",
+    "CodeUnit": ".unit",
+    "PythonZygote": ".zygote",
+}
+
+__all__ = sorted(_EXPORTS)
+
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
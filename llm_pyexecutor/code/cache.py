@@ -0,0 +1,179 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, Tuple, Union
+
+
+class ExecutionResultCache:
+    """
+    A content-addressed cache of code execution results.
+
+    Results are keyed by a hash of the code and a fingerprint of the virtual
+    environment it runs in, kept in memory as an LRU and optionally persisted as one
+    JSON file per entry in a cache directory. Entries are evicted when the cache
+    holds more than ``max_entries`` entries or when they are older than ``ttl``
+    seconds.
+
+    Attributes:
+        max_entries (int): The maximum number of entries kept in memory and on disk.
+        ttl (Optional[float]): The number of seconds an entry stays valid.
+        cache_dir (Optional[Path]): The directory of the on-disk store.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        ttl: Optional[float] = None,
+        cache_dir: Optional[Union[Path, str]] = None,
+    ) -> None:
+        """
+        Initializes the cache.
+
+        Args:
+            max_entries (int): The maximum number of entries (default is 256).
+            ttl (Optional[float]): The number of seconds an entry stays valid
+                (default is None, entries never expire).
+            cache_dir (Optional[Union[Path, str]]): The directory of the on-disk
+                store (default is None, results are only kept in memory).
+
+        Raises:
+            ValueError: If max_entries is less than 1.
+        """
+        if max_entries < 1:
+            raise ValueError("max_entries must be greater than 0")
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else None
+        if self.cache_dir is not None:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(code: str, venv_fingerprint: str) -> str:
+        """
+        Builds the cache key of a code snippet executed in a virtual environment.
+
+        Args:
+            code (str): The cleaned code to be executed.
+            venv_fingerprint (str): The fingerprint of the virtual environment.
+
+        Returns:
+            str: A SHA-256 hex digest.
+        """
+        digest = hashlib.sha256()
+        digest.update(venv_fingerprint.encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(code.encode("utf-8"))
+        return digest.hexdigest()
+
+    def _is_expired(self, created: float) -> bool:
+        """Checks whether an entry created at the given time expired."""
+        return self.ttl is not None and time.time() - created > self.ttl
+
+    def _entry_path(self, key: str) -> Path:
+        """Returns the path of the on-disk entry of a key."""
+        return self.cache_dir / f"{key}.json"
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Returns the cached result of a key.
+
+        Args:
+            key (str): The cache key.
+
+        Returns:
+            Optional[str]: The cached result, or None if the key is missing or expired.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None and self.cache_dir is not None:
+                try:
+                    with open(self._entry_path(key), "r", encoding="utf-8") as file:
+                        stored = json.load(file)
+                    entry = (stored["created"], stored["result"])
+                except (OSError, ValueError, KeyError):
+                    entry = None
+            if entry is None:
+                return None
+            if self._is_expired(entry[0]):
+                self._remove(key)
+                return None
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            self._evict()
+            return entry[1]
+
+    def put(self, key: str, result: str) -> None:
+        """
+        Stores the result of a key.
+
+        Args:
+            key (str): The cache key.
+            result (str): The execution result.
+        """
+        created = time.time()
+        with self._lock:
+            self._entries[key] = (created, result)
+            self._entries.move_to_end(key)
+            if self.cache_dir is not None:
+                tmp_path = self.cache_dir / f"{key}.{os.getpid()}.tmp"
+                try:
+                    with open(tmp_path, "w", encoding="utf-8") as file:
+                        json.dump({"created": created, "result": result}, file)
+                    os.replace(tmp_path, self._entry_path(key))
+                except OSError:
+                    pass
+            self._evict()
+            self._evict_disk()
+
+    def _remove(self, key: str) -> None:
+        """Removes a key from memory and disk."""
+        self._entries.pop(key, None)
+        if self.cache_dir is not None:
+            try:
+                os.remove(self._entry_path(key))
+            except OSError:
+                pass
+
+    def _evict(self) -> None:
+        """Drops the least recently used entries above the size limit from memory."""
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _evict_disk(self) -> None:
+        """Removes the oldest on-disk entries above the size limit."""
+        if self.cache_dir is None:
+            return
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(".json"):
+                try:
+                    entries.append((entry.stat().st_mtime, entry.path))
+                except OSError:
+                    continue
+        if len(entries) <= self.max_entries:
+            return
+        entries.sort()
+        for _, path in entries[: len(entries) - self.max_entries]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def clear(self) -> None:
+        """Removes all entries from memory and disk."""
+        with self._lock:
+            for key in list(self._entries):
+                self._remove(key)
+            if self.cache_dir is not None:
+                for entry in os.scandir(self.cache_dir):
+                    if entry.name.endswith(".json"):
+                        try:
+                            os.remove(entry.path)
+                        except OSError:
+                            pass
@@ -1,48 +1,49 @@
 import subprocess
 import ast
-from typing import Dict, List
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, FrozenSet, List, Optional, Tuple, Union
 from ..code.exceptions import CodeExecutionError
+from ..code.unit import CodeUnit
+from ..environment_manager.virtual_environment import interpreter_fingerprint
+from ..process import kill_async_process
 
+_STANDARD_PACKAGES: Dict[Tuple[Union[str, int], ...], FrozenSet[str]] = {}
+_STANDARD_PACKAGES_LOCK = threading.Lock()
 
-def extract_dependecies(code: str) -> List[Dict[str, str]]:
+
+def extract_dependecies(
+    code: Union[CodeUnit, str],
+) -> List[Dict[str, Union[str, bool]]]:
     """
     Extracts module dependencies from a given Python code string.
 
-    This function parses the provided code and identifies all the import statements.
-    It returns a list of dictionaries, each containing the module name, the imported
-    name, and its alias (if any).
+    This function parses the provided code and identifies all the import statements,
+    including the ones nested in functions, classes and branches and the
+    ``importlib.import_module`` calls with a literal name. It returns a list of
+    dictionaries, each containing the module name, the imported name, its alias
+    (if any) and whether the import is optional. A ``CodeUnit`` is not parsed again.
 
     Args:
-        code (str): A string containing Python code.
+        code (Union[CodeUnit, str]): A string containing Python code, or its unit.
 
     Returns:
-        List[Dict[str, str]]: A list of dictionaries where each dictionary contains:
+        List[Dict[str, Union[str, bool]]]: A list of dictionaries where each dictionary contains:
             - "module": The name of the module being imported.
             - "name": The name of the imported object.
             - "alias": The alias used for the imported object (or the name if no alias is used).
+            - "optional": Whether the import is guarded by a ``try`` catching ``ImportError``.
     """
-    deps = []
-    tree = ast.parse(code)
-    for node in tree.body:
-        if isinstance(node, (ast.Import, ast.ImportFrom)):
-            module = node.names[0].name if isinstance(node, ast.Import) else node.module
-            for alias in node.names:
-                deps.append(
-                    {
-                        "module": module.split(".")[0] if "." in module else module,
-                        "name": alias.name,
-                        "alias": alias.asname or alias.name,
-                    }
-                )
-    return deps
+    return [dict(dep) for dep in CodeUnit.of(code).imports]
 
 
-def is_standard_package(venv_executor: str, script_path: str, wd: str) -> List[str]:
+def _probe_standard_packages(
+    venv_executor: str, script_path: str, wd: str
+) -> FrozenSet[str]:
     """
-    Checks if the specified packages are standard packages in a virtual environment.
-
-    This function executes a script in the provided virtual environment to determine
-    if the packages are standard. It uses subprocess to run the command.
+    Runs the standard package script with the interpreter and parses its output.
 
     Args:
         venv_executor (str): The path to the Python interpreter in the virtual environment.
@@ -50,8 +51,7 @@ def is_standard_package(venv_executor: str, script_path: str, wd: str) -> List[s
         wd (str): working directory.
 
     Returns:
-        List[str]: The output from the executed script, which may include information
-        about the packages checked.
+        FrozenSet[str]: The names of the standard library modules.
 
     Raises:
         TimeoutError: If the script execution exceeds 120 seconds.
@@ -62,23 +62,155 @@ def is_standard_package(venv_executor: str, script_path: str, wd: str) -> List[s
         result = subprocess.run(
             cmd,
             cwd=wd,
-            check=True,
             timeout=120,
             capture_output=True,
             encoding="utf-8",
             text=True,
         )
-        res = (
-            result.stdout.strip()
-            .replace("\n", "")
-            .replace("[", "")
-            .replace("]", "")
-            .replace("'", "")
-            .split(",")
-        )
-        res = [ele.strip() for ele in res]
-        return res
     except subprocess.TimeoutExpired:
         raise TimeoutError("timeout, running code takes more than 120 seconds")
     if result.returncode != 0:
         raise CodeExecutionError(result.stderr)
+    return frozenset(ast.literal_eval(result.stdout.strip()))
+
+
+def _load_standard_packages(
+    fingerprint: List[Union[str, int]], script_path: str
+) -> Optional[FrozenSet[str]]:
+    """
+    Looks the standard library modules of an interpreter up in the memory and disk caches.
+
+    Args:
+        fingerprint (List[Union[str, int]]): The interpreter fingerprint.
+        script_path (str): The path to the script that will check for the standard packages.
+
+    Returns:
+        Optional[FrozenSet[str]]: The cached module names, or None on a cache miss.
+    """
+    key = tuple(fingerprint)
+    with _STANDARD_PACKAGES_LOCK:
+        standard_packages = _STANDARD_PACKAGES.get(key)
+        if standard_packages is not None:
+            return standard_packages
+        cache_path = Path(script_path).with_suffix(".json")
+        if not cache_path.exists():
+            return None
+        try:
+            with open(cache_path, "r", encoding="utf-8") as file:
+                cached = json.load(file)
+            if cached["fingerprint"] != fingerprint:
+                return None
+            standard_packages = frozenset(cached["modules"])
+        except (OSError, ValueError, KeyError):
+            return None
+        _STANDARD_PACKAGES[key] = standard_packages
+        return standard_packages
+
+
+def _store_standard_packages(
+    fingerprint: List[Union[str, int]],
+    script_path: str,
+    standard_packages: FrozenSet[str],
+) -> None:
+    """
+    Stores the standard library modules of an interpreter in the memory and disk caches.
+
+    Args:
+        fingerprint (List[Union[str, int]]): The interpreter fingerprint.
+        script_path (str): The path to the script that will check for the standard packages.
+        standard_packages (FrozenSet[str]): The names of the standard library modules.
+    """
+    cache_path = Path(script_path).with_suffix(".json")
+    with _STANDARD_PACKAGES_LOCK:
+        _STANDARD_PACKAGES[tuple(fingerprint)] = standard_packages
+        tmp_path = cache_path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as file:
+                json.dump(
+                    {"fingerprint": fingerprint, "modules": sorted(standard_packages)},
+                    file,
+                    separators=(",", ":"),
+                )
+            os.replace(tmp_path, cache_path)
+        except OSError:
+            pass
+
+
+def is_standard_package(
+    venv_executor: str, script_path: str, wd: str
+) -> FrozenSet[str]:
+    """
+    Returns the standard library module names of the interpreter of a virtual environment.
+
+    The module set only changes when the interpreter changes, so it is computed once
+    by running the script, kept in memory and stored next to the script in a compact
+    JSON file keyed by the interpreter path, version and mtime. Later calls, also from
+    new processes, answer without starting any subprocess.
+
+    Args:
+        venv_executor (str): The path to the Python interpreter in the virtual environment.
+        script_path (str): The path to the script that will check for the standard packages.
+        wd (str): working directory.
+
+    Returns:
+        FrozenSet[str]: The names of the standard library modules.
+
+    Raises:
+        TimeoutError: If the script execution exceeds 120 seconds.
+        CodeExecutionError: If the script returns a non-zero exit code, indicating an error.
+    """
+    fingerprint = interpreter_fingerprint(venv_executor)
+    standard_packages = _load_standard_packages(fingerprint, script_path)
+    if standard_packages is None:
+        standard_packages = _probe_standard_packages(venv_executor, script_path, wd)
+        _store_standard_packages(fingerprint, script_path, standard_packages)
+    return standard_packages
+
+
+async def ais_standard_package(
+    venv_executor: str, script_path: str, wd: str
+) -> FrozenSet[str]:
+    """
+    Asynchronous version of ``is_standard_package``.
+
+    On a cache miss the script is run with ``asyncio.create_subprocess_exec`` so the
+    event loop is not blocked, the child is killed if the task is cancelled.
+
+    Args:
+        venv_executor (str): The path to the Python interpreter in the virtual environment.
+        script_path (str): The path to the script that will check for the standard packages.
+        wd (str): working directory.
+
+    Returns:
+        FrozenSet[str]: The names of the standard library modules.
+
+    Raises:
+        TimeoutError: If the script execution exceeds 120 seconds.
+        CodeExecutionError: If the script returns a non-zero exit code, indicating an error.
+    """
+    import asyncio
+
+    fingerprint = interpreter_fingerprint(venv_executor)
+    standard_packages = _load_standard_packages(fingerprint, script_path)
+    if standard_packages is not None:
+        return standard_packages
+    process = await asyncio.create_subprocess_exec(
+        venv_executor,
+        script_path,
+        cwd=wd,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    try:
+        stdout, stderr = await asyncio.wait_for(process.communicate(), timeout=120)
+    except asyncio.TimeoutError:
+        await kill_async_process(process)
+        raise TimeoutError("timeout, running code takes more than 120 seconds")
+    except asyncio.CancelledError:
+        await kill_async_process(process)
+        raise
+    if process.returncode != 0:
+        raise CodeExecutionError(stderr.decode("utf-8", errors="replace"))
+    standard_packages = frozenset(ast.literal_eval(stdout.decode("utf-8").strip()))
+    _store_standard_packages(fingerprint, script_path, standard_packages)
+    return standard_packages
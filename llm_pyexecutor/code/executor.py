@@ -1,7 +1,60 @@
-import ast
-import astor
+import codecs
+import os
+import queue
+import signal
 import subprocess
+import threading
+import time
+from typing import IO, Any, Callable, Dict, Iterator, NamedTuple, Optional, Tuple, Union
 from ..code.exceptions import CodeExecutionError
+from ..code.output import OutputBuffer, SpilledOutput
+from ..code.resources import CodeRunResult, ResourceLimits, ResourceUsage
+from ..code.unit import CodeUnit
+from ..code.worker_pool import PythonWorkerPool
+from ..code.zygote import PythonZygote
+from ..process import kill_async_process
+
+OUTPUT_LIMIT_POLICIES = ("truncate", "kill")
+OUTPUT_DRAIN_SECONDS = 2
+
+
+class OutputChunk(NamedTuple):
+    """A piece of output produced by a running code snippet.
+
+    Attributes
+    ----------
+    stream : str
+        The stream the output was written to, "stdout" or "stderr".
+    data : str
+        The decoded output.
+    """
+
+    stream: str
+    data: str
+
+
+def _pump(pipe: IO[bytes], stream: str, chunks: "queue.Queue") -> None:
+    """Reads a pipe until EOF and puts its chunks on the queue."""
+    try:
+        while True:
+            data = pipe.read(65536)
+            if not data:
+                break
+            chunks.put((stream, data))
+    finally:
+        pipe.close()
+        chunks.put((stream, None))
+
+
+def _kill_group(process: subprocess.Popen) -> None:
+    """Kills a process started in its own session and the processes it started."""
+    try:
+        if os.name == "posix":
+            os.killpg(process.pid, signal.SIGKILL)
+        elif process.poll() is None:
+            process.kill()
+    except (ProcessLookupError, PermissionError):
+        pass
 
 
 class PythonCodeExecutor:
@@ -12,12 +65,74 @@ class PythonCodeExecutor:
 
     Attributes
     ----------
-    None
+    worker_pool : Optional[PythonWorkerPool]
+        A pool of warm interpreter processes, when set code is executed on the
+        pool instead of a new subprocess.
+    zygote : Optional[PythonZygote]
+        A fork server with preloaded modules, when set code is executed in a
+        child forked from it. It takes precedence over the worker pool.
+    limits : Optional[ResourceLimits]
+        The resource limits applied to the code subprocesses.
+    normalize_code : bool
+        Whether code is regenerated from its tree with astor before it runs,
+        otherwise the extracted source is run unchanged.
+    spill_threshold : Optional[int]
+        The stdout size in bytes above which the output is written to a file in
+        ``spill_dir`` instead of being kept in memory.
+    spill_dir : Optional[str]
+        The directory of the spilled outputs.
     """
 
-    def __init__(self) -> None:
-        """Initializes the PythonCodeExecutor instance."""
-        pass
+    def __init__(
+        self,
+        worker_pool: Optional[PythonWorkerPool] = None,
+        zygote: Optional[PythonZygote] = None,
+        limits: Optional[ResourceLimits] = None,
+        normalize_code: bool = True,
+        spill_threshold: Optional[int] = None,
+        spill_dir: Optional[str] = None,
+    ) -> None:
+        """Initializes the PythonCodeExecutor instance.
+
+        Parameters
+        ----------
+        worker_pool : Optional[PythonWorkerPool]
+            A pool of warm interpreter processes to execute the code on
+            (default is None, a new subprocess is started for every execution).
+        zygote : Optional[PythonZygote]
+            A fork server to execute the code on (default is None).
+        limits : Optional[ResourceLimits]
+            The resource limits applied to every new code subprocess (default is
+            None, no limits). The worker pool and the zygote apply their own limits.
+        normalize_code : bool
+            Whether code is regenerated from its tree with astor, which drops
+            comments and normalizes formatting but costs a round-trip per top-level
+            statement (default is True). When False the source runs unchanged.
+        spill_threshold : Optional[int]
+            The stdout size in bytes above which the output is written to a file
+            and only its head and tail are returned, the whole output being
+            available through ``CodeRunResult.stdout_spill`` (default is None,
+            outputs are kept in memory).
+        spill_dir : Optional[str]
+            The directory of the spilled outputs (default is None, the temporary
+            directory).
+        """
+        self.worker_pool = worker_pool
+        self.zygote = zygote
+        self.limits = limits
+        self.normalize_code = normalize_code
+        self.spill_threshold = spill_threshold
+        self.spill_dir = spill_dir
+        if spill_dir is not None:
+            self.spill_dir = os.path.abspath(spill_dir)
+            os.makedirs(self.spill_dir, exist_ok=True)
+
+    def _warm_backend(self, venv_executor: str):
+        """Returns the zygote or worker pool serving the interpreter, if any."""
+        for backend in (self.zygote, self.worker_pool):
+            if backend is not None and backend.venv_executor == venv_executor:
+                return backend
+        return None
 
     @staticmethod
     def _clean_code(code: str) -> str:
@@ -41,33 +156,177 @@ class PythonCodeExecutor:
         TypeError
             If the provided code is not a string.
         """
-        if isinstance(code, str):
-            code_nodes = ast.parse(code)
-            clean_code_lines = []
-            for node in code_nodes.body:
-                clean_code_lines.append(astor.to_source(node))
-            return "".join(line for line in clean_code_lines)
+        return CodeUnit(code).normalized
+
+    def runnable_source(self, code: Union[CodeUnit, str]) -> str:
+        """Returns the source of the code that is sent to the interpreter.
+
+        Parameters
+        ----------
+        code : Union[CodeUnit, str]
+            The code, a unit is not parsed again.
+
+        Returns
+        -------
+        str
+            The normalized source if ``normalize_code`` is set, otherwise the
+            source unchanged.
+        """
+        return CodeUnit.of(code).runnable_source(self.normalize_code)
+
+    def _preexec_fn(self) -> Optional[Callable[[], None]]:
+        """Returns the function applying the resource limits in the child, if any."""
+        if self.limits is None or os.name != "posix":
+            return None
+        return self.limits.apply
+
+    def _run_subprocess(
+        self, venv_executor: str, clean_code: str, wd: str
+    ) -> CodeRunResult:
+        """Runs the code in a new subprocess and measures its resource usage.
+
+        The child is reaped with ``os.wait4`` where available, so its CPU time and
+        peak RSS are known without being mixed with other children.
+        """
+        start = time.monotonic()
+        process = subprocess.Popen(
+            [venv_executor, "-c", clean_code],
+            cwd=wd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            preexec_fn=self._preexec_fn(),
+        )
+        stdout = OutputBuffer(self.spill_threshold, self.spill_dir)
+        stderr = OutputBuffer()
+        readers = [
+            threading.Thread(target=stdout.read_from, args=(process.stdout,)),
+            threading.Thread(target=stderr.read_from, args=(process.stderr,)),
+        ]
+        for reader in readers:
+            reader.start()
+        timed_out = threading.Event()
+
+        def kill() -> None:
+            timed_out.set()
+            process.kill()
+
+        timer = threading.Timer(120, kill)
+        timer.start()
+        rusage = None
+        try:
+            if hasattr(os, "wait4"):
+                _, status, rusage = os.wait4(process.pid, 0)
+                process.returncode = os.waitstatus_to_exitcode(status)
+            else:
+                process.wait()
+        finally:
+            timer.cancel()
+            for reader in readers:
+                reader.join()
+        wall_time = time.monotonic() - start
+        if timed_out.is_set():
+            stdout.close()
+            raise TimeoutError("timeout, running code takes more than 120 seconds")
+        if rusage is not None:
+            usage = ResourceUsage.from_rusage(rusage, wall_time)
         else:
-            raise TypeError("Code must be a string.")
+            usage = ResourceUsage(wall_time=wall_time)
+        stdout_text, stdout_spill = stdout.getvalue()
+        return CodeRunResult(
+            stdout=stdout_text,
+            stderr=stderr.getvalue()[0],
+            returncode=process.returncode,
+            usage=usage,
+            stdout_spill=stdout_spill,
+        )
+
+    def _stdout_of(
+        self, response: Dict[str, Any]
+    ) -> Tuple[str, Optional[SpilledOutput]]:
+        """Returns the stdout of a backend response and its spilled output, if any."""
+        if "stdout_path" not in response:
+            return response["stdout"], None
+        stdout_spill = SpilledOutput(response["stdout_path"])
+        return stdout_spill.preview(self.spill_threshold), stdout_spill
+
+    def run_code(
+        self, venv_executor: str, code: Union[CodeUnit, str], wd: str
+    ) -> CodeRunResult:
+        """Runs the provided Python code and reports its output and resource usage.
 
-    def execute_code(self, venv_executor: str, code: str, wd: str) -> str:
+        The code runs on the zygote or worker pool serving the interpreter when one
+        is configured, otherwise in a new subprocess with the resource limits
+        applied. Unlike ``execute_code`` a non-zero exit code is not an error.
+        Outputs larger than ``spill_threshold`` are spilled to a file.
+
+        Parameters
+        ----------
+        venv_executor : str
+            The path to the Python interpreter in the virtual environment.
+        code : Union[CodeUnit, str]
+            The Python code to be executed, or its unit.
+        wd : str
+            working directory.
+
+        Returns
+        -------
+        CodeRunResult
+            The stdout, stderr, exit code and resource usage of the execution.
+
+        Raises
+        ------
+        TimeoutError
+            If the code execution exceeds the allowed time limit of 120 seconds.
+        """
+        clean_code = self.runnable_source(code)
+        backend = self._warm_backend(venv_executor)
+        if backend is None:
+            return self._run_subprocess(venv_executor, clean_code, wd)
+        start = time.monotonic()
+        response = backend.execute(
+            clean_code,
+            wd,
+            spill_threshold=self.spill_threshold,
+            spill_dir=self.spill_dir,
+        )
+        peak_rss = response.get("execution_peak_rss")
+        stdout, stdout_spill = self._stdout_of(response)
+        return CodeRunResult(
+            stdout=stdout,
+            stderr=response["stderr"],
+            returncode=response["returncode"],
+            usage=ResourceUsage(
+                wall_time=time.monotonic() - start,
+                user_cpu=response.get("user_cpu"),
+                system_cpu=response.get("system_cpu"),
+                peak_rss_bytes=peak_rss,
+            ),
+            stdout_spill=stdout_spill,
+        )
+
+    def execute_code(
+        self, venv_executor: str, code: Union[CodeUnit, str], wd: str
+    ) -> str:
         """Executes the provided Python code using a specified virtual environment executor.
 
         This method cleans the code and runs it in a subprocess, ensuring that it is executed
         in a separate environment. It handles timeouts and errors during execution.
+        When a zygote or a worker pool for the same interpreter is configured, the code
+        is executed on it instead.
 
         Parameters
         ----------
         venv_executor : str
             The path to the Python interpreter in the virtual environment.
-        code : str
-            The Python code to be executed.
+        code : Union[CodeUnit, str]
+            The Python code to be executed, or its unit.
         wd : str
             working directory.
         Returns
         -------
         str
-            result or error of code execution
+            result or error of code execution, the head and tail of outputs larger
+            than ``spill_threshold``
 
         Raises
         ------
@@ -76,19 +335,268 @@ class PythonCodeExecutor:
         CodeExecutionError
             If there is an error in code execution.
         """
-        clean_code = PythonCodeExecutor._clean_code(code)
-        cmd = [venv_executor, "-c", clean_code]
+        result = self.run_code(venv_executor, code, wd)
+        if result.returncode != 0:
+            raise CodeExecutionError(result.stderr)
+        return result.stdout
+
+    async def arun_code(
+        self, venv_executor: str, code: Union[CodeUnit, str], wd: str
+    ) -> CodeRunResult:
+        """Asynchronous version of ``run_code``.
+
+        The code runs in a subprocess started with ``asyncio.create_subprocess_exec``,
+        so the event loop is free while it runs. If the calling task is cancelled the
+        child process is killed. When a zygote or a worker pool for the same
+        interpreter is configured, the blocking call is run in the default executor.
+
+        Parameters
+        ----------
+        venv_executor : str
+            The path to the Python interpreter in the virtual environment.
+        code : Union[CodeUnit, str]
+            The Python code to be executed, or its unit.
+        wd : str
+            working directory.
+
+        Returns
+        -------
+        CodeRunResult
+            The stdout, stderr, exit code and resource usage of the execution, only
+            the wall time is measured for the asyncio subprocess.
+
+        Raises
+        ------
+        TimeoutError
+            If the code execution exceeds the allowed time limit of 120 seconds.
+        """
+        import asyncio
+
+        if self._warm_backend(venv_executor) is not None:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                None, self.run_code, venv_executor, code, wd
+            )
+        clean_code = self.runnable_source(code)
+        start = time.monotonic()
+        process = await asyncio.create_subprocess_exec(
+            venv_executor,
+            "-c",
+            clean_code,
+            cwd=wd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            preexec_fn=self._preexec_fn(),
+        )
+        stdout = OutputBuffer(self.spill_threshold, self.spill_dir)
+        stderr = OutputBuffer()
+
+        async def read(pipe: "asyncio.StreamReader", buffer: OutputBuffer) -> None:
+            while True:
+                data = await pipe.read(65536)
+                if not data:
+                    break
+                buffer.write(data)
+
         try:
-            result = subprocess.run(
-                cmd,
-                cwd=wd,
-                check=True,
+            await asyncio.wait_for(
+                asyncio.gather(
+                    read(process.stdout, stdout),
+                    read(process.stderr, stderr),
+                    process.wait(),
+                ),
                 timeout=120,
-                capture_output=True,
-                encoding="utf-8",
             )
-            return result.stdout
-        except subprocess.TimeoutExpired:
+        except asyncio.TimeoutError:
+            stdout.close()
+            await kill_async_process(process)
             raise TimeoutError("timeout, running code takes more than 120 seconds")
+        except asyncio.CancelledError:
+            stdout.close()
+            await kill_async_process(process)
+            raise
+        stdout_text, stdout_spill = stdout.getvalue()
+        return CodeRunResult(
+            stdout=stdout_text,
+            stderr=stderr.getvalue()[0],
+            returncode=process.returncode,
+            usage=ResourceUsage(wall_time=time.monotonic() - start),
+            stdout_spill=stdout_spill,
+        )
+
+    async def aexecute_code(
+        self, venv_executor: str, code: Union[CodeUnit, str], wd: str
+    ) -> str:
+        """Asynchronous version of ``execute_code``, see ``arun_code``.
+
+        Parameters
+        ----------
+        venv_executor : str
+            The path to the Python interpreter in the virtual environment.
+        code : Union[CodeUnit, str]
+            The Python code to be executed, or its unit.
+        wd : str
+            working directory.
+        Returns
+        -------
+        str
+            result or error of code execution, the head and tail of outputs larger
+            than ``spill_threshold``
+
+        Raises
+        ------
+        TimeoutError
+            If the code execution exceeds the allowed time limit of 120 seconds.
+        CodeExecutionError
+            If there is an error in code execution.
+        """
+        result = await self.arun_code(venv_executor, code, wd)
         if result.returncode != 0:
             raise CodeExecutionError(result.stderr)
+        return result.stdout
+
+    def stream_code(
+        self,
+        venv_executor: str,
+        code: Union[CodeUnit, str],
+        wd: str,
+        max_output_bytes: Optional[int] = None,
+        on_output_limit: str = "truncate",
+    ) -> Iterator[OutputChunk]:
+        """Executes the provided Python code and yields its output as it is produced.
+
+        The code runs in an unbuffered subprocess, stdout and stderr are read as they
+        are written, so the caller sees the first bytes without waiting for the
+        process to exit. Streaming always uses a new subprocess, the worker pool and
+        the zygote are not used. Closing the generator kills the process.
+
+        Parameters
+        ----------
+        venv_executor : str
+            The path to the Python interpreter in the virtual environment.
+        code : Union[CodeUnit, str]
+            The Python code to be executed, or its unit.
+        wd : str
+            working directory.
+        max_output_bytes : Optional[int]
+            The maximum number of output bytes yielded (default is None, no limit).
+        on_output_limit : str
+            What happens when the limit is reached: "truncate" drops further output
+            and kills the process if it is still writing ``OUTPUT_DRAIN_SECONDS``
+            later, "kill" kills the process at once (default is "truncate"). The
+            processes started by the code are killed with it.
+
+        Yields
+        ------
+        OutputChunk
+            The output chunks in the order they were read.
+
+        Raises
+        ------
+        ValueError
+            If on_output_limit is not a known policy.
+        TimeoutError
+            If the code execution exceeds the allowed time limit of 120 seconds.
+        CodeExecutionError
+            If the process exits with a non-zero exit code.
+        """
+        if on_output_limit not in OUTPUT_LIMIT_POLICIES:
+            raise ValueError(f"on_output_limit must be one of {OUTPUT_LIMIT_POLICIES}")
+        clean_code = self.runnable_source(code)
+        process = subprocess.Popen(
+            [venv_executor, "-u", "-c", clean_code],
+            cwd=wd,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            bufsize=0,
+            preexec_fn=self._preexec_fn(),
+            start_new_session=True,
+        )
+        chunks: "queue.Queue" = queue.Queue()
+        readers = [
+            threading.Thread(
+                target=_pump, args=(process.stdout, "stdout", chunks), daemon=True
+            ),
+            threading.Thread(
+                target=_pump, args=(process.stderr, "stderr", chunks), daemon=True
+            ),
+        ]
+        for reader in readers:
+            reader.start()
+        decoders = {
+            name: codecs.getincrementaldecoder("utf-8")(errors="replace")
+            for name in ("stdout", "stderr")
+        }
+        deadline = time.monotonic() + 120
+        emitted = 0
+        limited = False
+        killed = False
+        open_streams = 2
+        try:
+            while open_streams > 0:
+                # Checked before every read, a process writing without pause never
+                # leaves the queue empty.
+                remaining = deadline - time.monotonic()
+                try:
+                    if remaining <= 0:
+                        raise queue.Empty
+                    stream, data = chunks.get(timeout=remaining)
+                except queue.Empty:
+                    _kill_group(process)
+                    if limited:
+                        # A runaway printer would otherwise burn CPU until the
+                        # timeout with all of its output discarded.
+                        killed = True
+                        yield OutputChunk(
+                            "stderr",
+                            "\n[process killed: still writing output "
+                            f"{OUTPUT_DRAIN_SECONDS} seconds after the limit]\n",
+                        )
+                        break
+                    raise TimeoutError(
+                        "timeout, running code takes more than 120 seconds"
+                    )
+                if data is None:
+                    open_streams -= 1
+                    text = decoders[stream].decode(b"", final=True)
+                    if text and not limited:
+                        yield OutputChunk(stream, text)
+                    continue
+                if limited:
+                    continue
+                if max_output_bytes is not None:
+                    if emitted + len(data) > max_output_bytes:
+                        data = data[: max_output_bytes - emitted]
+                        limited = True
+                    emitted += len(data)
+                text = decoders[stream].decode(data)
+                if text:
+                    yield OutputChunk(stream, text)
+                if limited:
+                    if on_output_limit == "kill":
+                        _kill_group(process)
+                        killed = True
+                        yield OutputChunk(
+                            "stderr",
+                            "\n[process killed: output limit of "
+                            f"{max_output_bytes} bytes reached]\n",
+                        )
+                    else:
+                        deadline = min(
+                            deadline, time.monotonic() + OUTPUT_DRAIN_SECONDS
+                        )
+                        yield OutputChunk(
+                            "stderr",
+                            "\n[output truncated: limit of "
+                            f"{max_output_bytes} bytes reached]\n",
+                        )
+            returncode = process.wait()
+        finally:
+            if process.poll() is None:
+                _kill_group(process)
+                process.wait()
+            for reader in readers:
+                reader.join(timeout=1)
+        if returncode != 0 and not killed:
+            raise CodeExecutionError(f"process exited with code {returncode}")
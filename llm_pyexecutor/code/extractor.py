@@ -1,6 +1,9 @@
 import re
 import ast
+from typing import Iterable, List, Union
 from ..code.exceptions import NoCodeFoundError
+from ..code.unit import CodeUnit
+from ..fences import FencedBlock, dedup_lines, parse_fenced_blocks
 
 
 class PythonCodeExtractor:
@@ -68,39 +71,106 @@ class PythonCodeExtractor:
         Returns:
             str: The Python code with duplicate lines removed.
         """
-        code_lines = code.split("\n")
-        unique_lines = []
-        for line in code_lines:
-            if line not in unique_lines:
-                unique_lines.append(line)
-        return "".join(line + "\n" for line in unique_lines)
+        return dedup_lines(code)
 
-    def extract_code(self, text: str, separator: str = "```") -> str:
+    @staticmethod
+    def clean_block(code: str) -> str:
         """
-        Extracts Python code from a text input that is enclosed by a specified separator.
-        It validates the extracted code to ensure it is valid Python code.
+        Removes the markers left in the content of a python fenced block.
+
+        Args:
+            code (str): The content of a python fenced block.
+
+        Returns:
+            str: The cleaned Python code.
+        """
+        if re.match(r"^`(.*)`$", code):
+            code = re.sub(r"^`(.*)`$", r"\1", code)
+        if "<|python_tag|>" in code:
+            code = code.replace("<|python_tag|>", "")
+        return code.strip()
+
+    def extract_unit_from_blocks(
+        self, blocks: List[FencedBlock], separator: str = "```"
+    ) -> CodeUnit:
+        """
+        Joins the Python code of already parsed fenced blocks and parses it once.
 
         Args:
-            text (str): The input text containing Python code.
+            blocks (List[FencedBlock]): The fenced blocks of the response.
             separator (str): The separator used to identify code blocks (default is "```").
 
         Returns:
-            str: The extracted and validated Python code.
+            CodeUnit: The extracted code with its parsed tree, imports and hash.
 
         Raises:
-            NoCodeError: If no valid Python code is found in the input text.
+            NoCodeFoundError: If the blocks hold no python code.
         """
-        if separator in text and len(text.split(separator)) > 1:
-            codes = text.split(separator)
         codes = [
-            code
-            for code in [PythonCodeExtractor.get_code(code) for code in codes]
-            if code is not None
+            PythonCodeExtractor.clean_block(block.content)
+            for block in blocks
+            if block.kind == "python"
         ]
-        clean_code = "".join(line + "\n" for line in codes)
-        clean_code = PythonCodeExtractor.remove_repititive_lines(clean_code)
-        try:
-            PythonCodeExtractor.is_python_code(clean_code)
-        except SyntaxError:
+        if len(codes) == 0:
             raise NoCodeFoundError(sep=separator)
-        return clean_code
+        clean_code = "".join(line + "\n" for line in codes)
+        return CodeUnit(PythonCodeExtractor.remove_repititive_lines(clean_code))
+
+    def extract_code_from_blocks(
+        self, blocks: List[FencedBlock], separator: str = "```"
+    ) -> str:
+        """
+        Joins the Python code of already parsed fenced blocks.
+
+        Args:
+            blocks (List[FencedBlock]): The fenced blocks of the response.
+            separator (str): The separator used to identify code blocks (default is "```").
+
+        Returns:
+            str: The extracted Python code.
+
+        Raises:
+            NoCodeFoundError: If the blocks hold no python code.
+        """
+        return self.extract_unit_from_blocks(blocks, separator).source
+
+    def extract_unit(
+        self, text: Union[str, Iterable[str]], separator: str = "```"
+    ) -> CodeUnit:
+        """
+        Extracts the Python code of a text input as a ``CodeUnit``.
+
+        Args:
+            text (Union[str, Iterable[str]]): The input text containing Python code,
+                or its chunks as streamed by the LLM.
+            separator (str): The separator used to identify code blocks (default is "```").
+
+        Returns:
+            CodeUnit: The extracted code with its parsed tree, imports and hash.
+
+        Raises:
+            NoCodeFoundError: If no Python code is found in the input text.
+        """
+        return self.extract_unit_from_blocks(
+            parse_fenced_blocks(text, separator), separator
+        )
+
+    def extract_code(
+        self, text: Union[str, Iterable[str]], separator: str = "```"
+    ) -> str:
+        """
+        Extracts Python code from a text input that is enclosed by a specified separator.
+        It validates the extracted code to ensure it is valid Python code.
+
+        Args:
+            text (Union[str, Iterable[str]]): The input text containing Python code,
+                or its chunks as streamed by the LLM.
+            separator (str): The separator used to identify code blocks (default is "```").
+
+        Returns:
+            str: The extracted and validated Python code.
+
+        Raises:
+            NoCodeFoundError: If no valid Python code is found in the input text.
+        """
+        return self.extract_unit(text, separator).source
@@ -0,0 +1,279 @@
+import mmap
+import os
+import tempfile
+import threading
+import weakref
+from typing import IO, Any, Dict, List, Optional, Tuple
+
+TRUNCATION_POLICIES = ("head_tail", "head", "tail")
+SPILL_PREFIX = "stdout-"
+SPILL_SUFFIX = ".txt"
+
+
+def decode_output(data: bytes) -> str:
+    """Decodes process output the way text mode pipes do, with universal newlines."""
+    return data.decode("utf-8", errors="replace").replace("\r\n", "\n")
+
+
+def new_spill_file(spill_dir: Optional[str] = None) -> Tuple[int, str]:
+    """Creates an empty spill file, returning its descriptor and path.
+
+    Parameters
+    ----------
+    spill_dir : Optional[str]
+        The directory of the file (default is None, the temporary directory).
+
+    Returns
+    -------
+    Tuple[int, str]
+        The open file descriptor and the path of the file.
+    """
+    if spill_dir is not None:
+        os.makedirs(spill_dir, exist_ok=True)
+    return tempfile.mkstemp(prefix=SPILL_PREFIX, suffix=SPILL_SUFFIX, dir=spill_dir)
+
+
+def _release(state: Dict[str, Any], path: str) -> None:
+    """Closes the memory map of a spilled output and removes its file."""
+    view = state.pop("view", None)
+    if isinstance(view, mmap.mmap):
+        view.close()
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class SpilledOutput:
+    """The output of a code snippet written to a file instead of kept in memory.
+
+    The file is memory-mapped on first access, so reading its head or tail only
+    pages in the bytes that are read. The file is removed when the output is
+    closed or garbage collected.
+
+    Attributes
+    ----------
+    path : str
+        The path of the file holding the output.
+    size : int
+        The size of the output in bytes.
+    """
+
+    def __init__(self, path: str) -> None:
+        """Wraps a spill file, taking ownership of it.
+
+        Parameters
+        ----------
+        path : str
+            The path of the file holding the output.
+        """
+        self.path = path
+        self.size = os.path.getsize(path)
+        self._state: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self._finalizer = weakref.finalize(self, _release, self._state, path)
+
+    @property
+    def closed(self) -> bool:
+        """Whether the output was closed and its file removed."""
+        return not self._finalizer.alive
+
+    def _view(self) -> Any:
+        """Returns the memory map of the file, mapping it on first use."""
+        with self._lock:
+            if self.closed:
+                raise ValueError("the spilled output is closed")
+            view = self._state.get("view")
+            if view is None:
+                if self.size == 0:
+                    view = b""
+                else:
+                    with open(self.path, "rb") as file:
+                        view = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+                self._state["view"] = view
+            return view
+
+    def head(self, max_bytes: int = 4096) -> str:
+        """Returns the beginning of the output.
+
+        Parameters
+        ----------
+        max_bytes : int
+            The number of bytes read (default is 4096).
+
+        Returns
+        -------
+        str
+            The decoded first max_bytes bytes of the output.
+        """
+        return decode_output(self._view()[:max_bytes])
+
+    def tail(self, max_bytes: int = 4096) -> str:
+        """Returns the end of the output.
+
+        Parameters
+        ----------
+        max_bytes : int
+            The number of bytes read (default is 4096).
+
+        Returns
+        -------
+        str
+            The decoded last max_bytes bytes of the output.
+        """
+        return decode_output(self._view()[max(self.size - max_bytes, 0) :])
+
+    def read(self) -> str:
+        """Returns the whole output, loading it in memory.
+
+        Returns
+        -------
+        str
+            The decoded output.
+        """
+        return decode_output(self._view()[:])
+
+    def preview(self, max_bytes: int, policy: str = "head_tail") -> str:
+        """Returns the part of the output selected by a truncation policy.
+
+        Parameters
+        ----------
+        max_bytes : int
+            The number of bytes of the output kept.
+        policy : str
+            "head_tail" keeps the beginning and the end of the output, "head" its
+            beginning and "tail" its end (default is "head_tail").
+
+        Returns
+        -------
+        str
+            The kept part of the output with a line noting how many bytes were
+            dropped, or the whole output if it is not longer than max_bytes.
+
+        Raises
+        ------
+        ValueError
+            If the policy is unknown.
+        """
+        if policy not in TRUNCATION_POLICIES:
+            raise ValueError(
+                f"unknown truncation policy {policy}, expected one of "
+                f"{TRUNCATION_POLICIES}"
+            )
+        if self.size <= max_bytes:
+            return self.read()
+        marker = f"... [{self.size - max_bytes} bytes truncated] ..."
+        if policy == "head":
+            return f"{self.head(max_bytes)}\n{marker}\n"
+        if policy == "tail":
+            return f"{marker}\n{self.tail(max_bytes)}"
+        head = max_bytes // 2
+        return f"{self.head(head)}\n{marker}\n{self.tail(max_bytes - head)}"
+
+    def close(self) -> None:
+        """Unmaps the output and removes its file."""
+        with self._lock:
+            self._finalizer()
+
+    def __str__(self) -> str:
+        return self.read()
+
+
+class OutputBuffer:
+    """Collects the output of a process, spilling it to a file past a threshold.
+
+    Attributes
+    ----------
+    spill_threshold : Optional[int]
+        The size in bytes above which the output is written to a file.
+    spill_dir : Optional[str]
+        The directory of the spill file.
+    size : int
+        The number of bytes collected.
+    """
+
+    def __init__(
+        self, spill_threshold: Optional[int] = None, spill_dir: Optional[str] = None
+    ) -> None:
+        """Initializes an empty buffer.
+
+        Parameters
+        ----------
+        spill_threshold : Optional[int]
+            The size in bytes above which the output is written to a file
+            (default is None, the output is kept in memory).
+        spill_dir : Optional[str]
+            The directory of the spill file (default is None, the temporary
+            directory).
+        """
+        self.spill_threshold = spill_threshold
+        self.spill_dir = spill_dir
+        self.size = 0
+        self._chunks: List[bytes] = []
+        self._file: Optional[IO[bytes]] = None
+        self._path: Optional[str] = None
+        self._closed = False
+
+    def write(self, data: bytes) -> None:
+        """Appends output, moving it to the spill file once it exceeds the threshold.
+
+        Parameters
+        ----------
+        data : bytes
+            The output read from the process.
+        """
+        if self._closed:
+            return
+        self.size += len(data)
+        if self._file is not None:
+            self._file.write(data)
+            return
+        self._chunks.append(data)
+        if self.spill_threshold is not None and self.size > self.spill_threshold:
+            fd, self._path = new_spill_file(self.spill_dir)
+            self._file = os.fdopen(fd, "wb")
+            self._file.writelines(self._chunks)
+            self._chunks = []
+
+    def read_from(self, pipe: IO[bytes]) -> None:
+        """Collects a pipe until EOF and closes it.
+
+        Parameters
+        ----------
+        pipe : IO[bytes]
+            The binary pipe of the process.
+        """
+        try:
+            while True:
+                data = pipe.read(65536)
+                if not data:
+                    break
+                self.write(data)
+        finally:
+            pipe.close()
+
+    def getvalue(self) -> Tuple[str, Optional[SpilledOutput]]:
+        """Returns the collected output.
+
+        Returns
+        -------
+        Tuple[str, Optional[SpilledOutput]]
+            The decoded output and None, or, if the output was spilled, its head
+            and tail preview of at most ``spill_threshold`` bytes and the spilled
+            output, which then owns the file.
+        """
+        if self._file is None:
+            return decode_output(b"".join(self._chunks)), None
+        self._file.close()
+        self._file = None
+        spilled = SpilledOutput(self._path)
+        return spilled.preview(self.spill_threshold), spilled
+
+    def close(self) -> None:
+        """Drops the collected output, removing the spill file not taken yet."""
+        self._closed = True
+        self._chunks = []
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            os.remove(self._path)
@@ -0,0 +1,147 @@
+from dataclasses import asdict, dataclass
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+from ..code import runtime
+
+if TYPE_CHECKING:
+    from ..code.output import SpilledOutput
+
+
+@dataclass(frozen=True)
+class ResourceLimits:
+    """Per-execution resource limits applied to the code process through rlimits.
+
+    Limits are only enforced on POSIX systems. ``max_processes`` maps to
+    ``RLIMIT_NPROC``, which counts all processes of the user running the code.
+
+    Attributes
+    ----------
+    cpu_seconds : Optional[int]
+        The CPU time in seconds after which the process is killed.
+    memory_bytes : Optional[int]
+        The maximum size of the process address space in bytes.
+    open_files : Optional[int]
+        The maximum number of open file descriptors.
+    max_processes : Optional[int]
+        The maximum number of processes of the user.
+    """
+
+    cpu_seconds: Optional[int] = None
+    memory_bytes: Optional[int] = None
+    open_files: Optional[int] = None
+    max_processes: Optional[int] = None
+
+    def to_dict(self) -> Dict[str, Optional[int]]:
+        """Returns the limits as a dictionary.
+
+        Returns
+        -------
+        Dict[str, Optional[int]]
+            The limits keyed by their attribute names.
+        """
+        return asdict(self)
+
+    def apply(self, include_cpu: bool = True) -> None:
+        """Applies the limits to the current process.
+
+        Meant to be used as ``preexec_fn`` of the code subprocess. The CPU limit
+        is applied as a soft limit one second below the hard limit, so the process
+        first receives SIGXCPU and is then killed.
+
+        Parameters
+        ----------
+        include_cpu : bool
+            Whether the CPU time limit is applied (default is True). Long-lived
+            workers running many snippets must not get a cumulative CPU limit.
+        """
+        runtime.apply_limits(self.to_dict(), include_cpu)
+
+
+@dataclass(frozen=True)
+class ResourceUsage:
+    """The resources used by one code execution.
+
+    Attributes
+    ----------
+    wall_time : float
+        The elapsed time in seconds.
+    user_cpu : Optional[float]
+        The user CPU time in seconds, None when it could not be measured.
+    system_cpu : Optional[float]
+        The system CPU time in seconds, None when it could not be measured.
+    peak_rss_bytes : Optional[int]
+        The peak resident set size of the process during this execution in bytes,
+        None when it could not be measured. A warm worker or a session runs many
+        executions, its peak is reset before each one through
+        ``/proc/self/clear_refs``, so it is only measured on Linux.
+    """
+
+    wall_time: float
+    user_cpu: Optional[float] = None
+    system_cpu: Optional[float] = None
+    peak_rss_bytes: Optional[int] = None
+
+    @staticmethod
+    def maxrss_to_bytes(maxrss: int) -> int:
+        """Converts ``ru_maxrss`` to bytes, it is reported in kilobytes on Linux.
+
+        Parameters
+        ----------
+        maxrss : int
+            The ``ru_maxrss`` value of a resource usage.
+
+        Returns
+        -------
+        int
+            The peak resident set size in bytes.
+        """
+        return runtime.maxrss_to_bytes(maxrss)
+
+    @classmethod
+    def from_rusage(cls, rusage: Any, wall_time: float) -> "ResourceUsage":
+        """Builds the usage from a ``resource.struct_rusage``.
+
+        Parameters
+        ----------
+        rusage : Any
+            The resource usage returned by ``os.wait4`` or ``resource.getrusage``.
+        wall_time : float
+            The elapsed time in seconds.
+
+        Returns
+        -------
+        ResourceUsage
+            The resource usage of the execution.
+        """
+        return cls(
+            wall_time=wall_time,
+            user_cpu=rusage.ru_utime,
+            system_cpu=rusage.ru_stime,
+            peak_rss_bytes=cls.maxrss_to_bytes(rusage.ru_maxrss),
+        )
+
+
+@dataclass
+class CodeRunResult:
+    """The outcome of running a code snippet.
+
+    Attributes
+    ----------
+    stdout : str
+        The standard output of the snippet.
+    stderr : str
+        The standard error of the snippet.
+    returncode : int
+        The exit code of the snippet.
+    usage : ResourceUsage
+        The resources used by the snippet.
+    stdout_spill : Optional[SpilledOutput]
+        The whole standard output when it was spilled to a file, ``stdout`` then
+        only holds its head and tail.
+    """
+
+    stdout: str
+    stderr: str
+    returncode: int
+    usage: ResourceUsage
+    stdout_spill: Optional["SpilledOutput"] = None
@@ -0,0 +1,249 @@
+"""The runtime shared by the interpreters running the code.
+
+The warm workers, the sessions and the zygote run a script in the virtual
+environment interpreter, where this package is not installed. Every script is
+the source of this module followed by its main loop, see ``interpreter_script``,
+so the request framing, the output capture, the exit codes, the resource limits
+and the measurements are written once. The module only uses the standard library
+and no ``typing``, to keep the startup of the interpreters short, and is imported
+by the package for the limits and measurements it also applies.
+"""
+
+import builtins
+import contextlib
+import io
+import json
+import os
+import sys
+import traceback
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None
+
+RLIMITS = {
+    "cpu_seconds": "RLIMIT_CPU",
+    "memory_bytes": "RLIMIT_AS",
+    "open_files": "RLIMIT_NOFILE",
+    "max_processes": "RLIMIT_NPROC",
+}
+
+
+def apply_limits(limits: dict, include_cpu: bool = True) -> None:
+    """Applies resource limits to the current process, see ``ResourceLimits``.
+
+    The CPU limit is applied as a soft limit one second below the hard limit, so
+    the process first receives SIGXCPU and is then killed.
+
+    Parameters
+    ----------
+    limits : dict
+        The limits keyed by the ``ResourceLimits`` attribute names, None values
+        are not applied.
+    include_cpu : bool
+        Whether the CPU time limit is applied (default is True).
+    """
+    if resource is None:
+        return
+    for name, value in limits.items():
+        if value is None or (name == "cpu_seconds" and not include_cpu):
+            continue
+        kind = getattr(resource, RLIMITS[name])
+        _, hard = resource.getrlimit(kind)
+        if hard != resource.RLIM_INFINITY:
+            value = min(value, hard)
+        hard_value = value
+        if name == "cpu_seconds":
+            hard_value = value + 1
+            if hard != resource.RLIM_INFINITY:
+                hard_value = min(hard_value, hard)
+        resource.setrlimit(kind, (value, hard_value))
+
+
+def take_over_stdio(stdout_fd: int = 2) -> tuple:
+    """Moves the request and response pipes off the standard streams.
+
+    The code must not read the requests or write into the responses, so stdin
+    is replaced by an empty stream and stdout by ``stdout_fd``.
+
+    Parameters
+    ----------
+    stdout_fd : int
+        The file descriptor the standard output is redirected to, -1 for
+        /dev/null (default is 2, the standard error).
+
+    Returns
+    -------
+    tuple
+        The file descriptors of the request and the response pipes.
+    """
+    request_fd, response_fd = os.dup(0), os.dup(1)
+    devnull = os.open(os.devnull, os.O_RDWR)
+    os.dup2(devnull, 0)
+    os.dup2(devnull if stdout_fd < 0 else stdout_fd, 1)
+    os.close(devnull)
+    sys.stdin = io.StringIO()
+    return request_fd, response_fd
+
+
+def receive(request_fd: int):
+    """Yields the requests read from a pipe, one JSON object per line."""
+    with os.fdopen(request_fd, "r", encoding="utf-8") as requests:
+        for line in requests:
+            yield json.loads(line)
+
+
+def send(response_fd: int, message: dict) -> None:
+    """Writes a message into a pipe as one JSON object per line."""
+    data = memoryview((json.dumps(message) + "\n").encode("utf-8"))
+    while data:
+        data = data[os.write(response_fd, data) :]
+
+
+def new_namespace() -> dict:
+    """Returns the globals of a fresh ``__main__`` module."""
+    return {"__name__": "__main__", "__builtins__": builtins}
+
+
+def run_code(code: str, namespace: dict, wd: str) -> int:
+    """Runs code as the ``__main__`` module, as ``python -c`` would.
+
+    Parameters
+    ----------
+    code : str
+        The source code.
+    namespace : dict
+        The globals the code runs in.
+    wd : str
+        The working directory of the code.
+
+    Returns
+    -------
+    int
+        The exit code, 1 with the traceback on stderr if the code raised.
+    """
+    sys.argv = ["-c"]
+    try:
+        os.chdir(wd)
+        exec(compile(code, "<string>", "exec"), namespace)
+    except SystemExit as exc:
+        if exc.code is None:
+            return 0
+        if isinstance(exc.code, int):
+            return exc.code
+        print(exc.code, file=sys.stderr)
+        return 1
+    except BaseException:
+        traceback.print_exc()
+        return 1
+    return 0
+
+
+def run_captured(code: str, namespace: dict, wd: str) -> tuple:
+    """Runs code like ``run_code``, capturing its output.
+
+    Returns
+    -------
+    tuple
+        The exit code, stdout and stderr of the code.
+    """
+    stdout, stderr = io.StringIO(), io.StringIO()
+    with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+        returncode = run_code(code, namespace, wd)
+    return returncode, stdout.getvalue(), stderr.getvalue()
+
+
+def maxrss_to_bytes(maxrss: int) -> int:
+    """Converts ``ru_maxrss`` to bytes, it is reported in kilobytes on Linux."""
+    return maxrss if sys.platform == "darwin" else maxrss * 1024
+
+
+def usage():
+    """Returns the resource usage of the current process, None if unavailable."""
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF)
+
+
+def reset_peak_rss() -> bool:
+    """Resets the peak RSS of the current process, only possible on Linux."""
+    try:
+        with open("/proc/self/clear_refs", "w") as clear_refs:
+            clear_refs.write("5")
+    except OSError:
+        return False
+    return True
+
+
+def high_water_rss():
+    """Returns the peak RSS in bytes since the last reset, None if unavailable."""
+    try:
+        with open("/proc/self/status", "r") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def current_rss():
+    """Returns the RSS of the current process in bytes, None if unavailable."""
+    try:
+        with open("/proc/self/statm", "r") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+class Meter:
+    """Measures the executions of a long-lived interpreter.
+
+    Attributes
+    ----------
+    peak : int
+        The peak RSS of the interpreter over its lifetime in bytes.
+    """
+
+    def __init__(self) -> None:
+        self.peak = 0
+        self._reset = False
+        self._before = None
+
+    def start(self) -> None:
+        """Resets the peak RSS and records the CPU times before an execution."""
+        before = usage()
+        self.peak = max(self.peak, maxrss_to_bytes(before.ru_maxrss) if before else 0)
+        self._reset = reset_peak_rss()
+        self._before = usage()
+
+    def stop(self, response: dict) -> None:
+        """Adds the CPU times and peak RSS of the execution to its response."""
+        after = usage()
+        execution_peak = high_water_rss() if self._reset else None
+        if after is not None:
+            self.peak = max(self.peak, maxrss_to_bytes(after.ru_maxrss))
+            response["user_cpu"] = after.ru_utime - self._before.ru_utime
+            response["system_cpu"] = after.ru_stime - self._before.ru_stime
+        self.peak = max(self.peak, execution_peak or 0)
+        response["peak_rss"] = self.peak
+        if execution_peak is not None:
+            response["execution_peak_rss"] = execution_peak
+
+
+def interpreter_script(main: str) -> str:
+    """Returns the source of an interpreter script, this module and its main loop.
+
+    Parameters
+    ----------
+    main : str
+        The main loop of the script, e.g. ``WORKER_SCRIPT``.
+
+    Returns
+    -------
+    str
+        The script to run with ``python -c``.
+    """
+    with open(__file__, encoding="utf-8") as source:
+        return f"{source.read()}\n\n{main}"
@@ -0,0 +1,133 @@
+import os
+import shutil
+import tempfile
+import weakref
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+SCRATCH_PREFIX = "run-"
+
+
+@dataclass(frozen=True)
+class Artifact:
+    """A file written by a code snippet in its scratch directory.
+
+    The file is not copied, it stays in the scratch directory, which is kept
+    until the artifacts and the scratch directory are released.
+
+    Attributes
+    ----------
+    name : str
+        The path of the file relative to the scratch directory.
+    path : str
+        The absolute path of the file.
+    size : int
+        The size of the file in bytes.
+    scratch : ScratchDirectory
+        The scratch directory holding the file.
+    """
+
+    name: str
+    path: str
+    size: int
+    scratch: "ScratchDirectory" = field(repr=False, compare=False)
+
+    def read_bytes(self) -> bytes:
+        """Returns the content of the file.
+
+        Returns
+        -------
+        bytes
+            The content of the file.
+        """
+        with open(self.path, "rb") as file:
+            return file.read()
+
+    def read_text(self, encoding: str = "utf-8") -> str:
+        """Returns the content of the file decoded as text.
+
+        Parameters
+        ----------
+        encoding : str
+            The encoding of the file (default is "utf-8").
+
+        Returns
+        -------
+        str
+            The decoded content of the file.
+        """
+        with open(self.path, "r", encoding=encoding, errors="replace") as file:
+            return file.read()
+
+
+class ScratchDirectory:
+    """The private working directory of one code execution.
+
+    Every execution gets an empty directory, so files written by concurrent runs
+    do not collide and do not pile up in the executor directory. The root can be
+    a tmpfs such as ``/dev/shm`` to keep the I/O of the snippets off the disk.
+    The directory is removed when it is cleaned up or when it and its artifacts
+    are garbage collected.
+
+    Attributes
+    ----------
+    path : str
+        The absolute path of the directory.
+    """
+
+    def __init__(self, root: Optional[str] = None) -> None:
+        """Creates the directory.
+
+        Parameters
+        ----------
+        root : Optional[str]
+            The directory the scratch directory is created in, created if missing
+            (default is None, the temporary directory).
+        """
+        if root is not None:
+            os.makedirs(root, exist_ok=True)
+        self.path = os.path.abspath(tempfile.mkdtemp(prefix=SCRATCH_PREFIX, dir=root))
+        self._finalizer = weakref.finalize(
+            self, shutil.rmtree, self.path, ignore_errors=True
+        )
+
+    @property
+    def closed(self) -> bool:
+        """Whether the directory was removed."""
+        return not self._finalizer.alive
+
+    def artifacts(self) -> List[Artifact]:
+        """Lists the files written in the directory, without reading them.
+
+        Symbolic links are skipped, they may point outside of the directory.
+
+        Returns
+        -------
+        List[Artifact]
+            The files sorted by name, they keep the directory alive.
+        """
+        artifacts = []
+        for dirpath, _, filenames in os.walk(self.path):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                if os.path.islink(path) or not os.path.isfile(path):
+                    continue
+                artifacts.append(
+                    Artifact(
+                        name=os.path.relpath(path, self.path),
+                        path=path,
+                        size=os.path.getsize(path),
+                        scratch=self,
+                    )
+                )
+        return sorted(artifacts, key=lambda artifact: artifact.name)
+
+    def cleanup(self) -> None:
+        """Removes the directory and its files, artifacts included."""
+        self._finalizer()
+
+    def __enter__(self) -> "ScratchDirectory":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.cleanup()
@@ -0,0 +1,172 @@
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from ..code.resources import ResourceLimits
+from ..code.runtime import interpreter_script
+from ..code.worker_pool import PythonWorker
+from ..constants import SESSION_SCRIPT
+
+
+class _SessionWorker(PythonWorker):
+    """A worker whose snippets share one persistent namespace."""
+
+    script = interpreter_script(SESSION_SCRIPT)
+
+
+class PythonSession:
+    """A persistent interpreter whose globals survive between code snippets.
+
+    Snippets run one at a time in the same ``__main__`` namespace, so the data
+    loaded and the modules imported by a snippet are available to the following
+    ones. The interpreter is stopped when the session stays idle for
+    ``idle_timeout`` seconds, or when a snippet times out or kills it; the
+    session is then closed and its state is lost.
+
+    Attributes
+    ----------
+    venv_executor : str
+        The path to the Python interpreter in the virtual environment.
+    timeout : int
+        The maximum number of seconds a snippet may run.
+    idle_timeout : Optional[float]
+        The number of idle seconds after which the interpreter is stopped.
+    last_used : float
+        The monotonic time of the last request.
+    """
+
+    def __init__(
+        self,
+        venv_executor: str,
+        wd: str = ".",
+        timeout: int = 120,
+        idle_timeout: Optional[float] = 600,
+        limits: Optional[ResourceLimits] = None,
+    ) -> None:
+        """Starts the session interpreter.
+
+        Parameters
+        ----------
+        venv_executor : str
+            The path to the Python interpreter in the virtual environment.
+        wd : str
+            working directory the interpreter is started in.
+        timeout : int
+            The maximum number of seconds a snippet may run (default is 120).
+        idle_timeout : Optional[float]
+            The number of idle seconds after which the interpreter is stopped
+            (default is 600, None keeps it until closed).
+        limits : Optional[ResourceLimits]
+            The resource limits applied to the interpreter, except the CPU time
+            limit which would add up over the snippets (default is None).
+        """
+        self.venv_executor = venv_executor
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self.last_used = time.monotonic()
+        self._worker: Optional[_SessionWorker] = _SessionWorker(
+            venv_executor, os.path.abspath(wd), limits
+        )
+        self._lock = threading.Lock()
+        self._idle_timer: Optional[threading.Timer] = None
+        if idle_timeout is not None:
+            self._arm_idle_timer(idle_timeout)
+
+    @property
+    def closed(self) -> bool:
+        """Whether the interpreter was stopped."""
+        return self._worker is None or not self._worker.is_alive()
+
+    def _arm_idle_timer(self, delay: float) -> None:
+        """Starts the timer checking whether the session is idle after delay."""
+        self._idle_timer = threading.Timer(delay, self._expire)
+        self._idle_timer.daemon = True
+        self._idle_timer.start()
+
+    def _expire(self) -> None:
+        """Stops the interpreter if it stayed idle, otherwise checks again later."""
+        with self._lock:
+            if self._worker is None:
+                return
+            remaining = self.idle_timeout - (time.monotonic() - self.last_used)
+            if remaining > 0:
+                self._arm_idle_timer(remaining)
+            else:
+                self._worker.close()
+                self._worker = None
+
+    def _request(self, request: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+        """Sends a request to the interpreter, keeping the session alive."""
+        with self._lock:
+            if self.closed:
+                raise RuntimeError("the python session is closed")
+            try:
+                return self._worker._request(request, timeout)
+            finally:
+                self.last_used = time.monotonic()
+
+    def execute(self, code: str, wd: str) -> Dict[str, Any]:
+        """Executes a code snippet in the session namespace.
+
+        Parameters
+        ----------
+        code : str
+            The Python code to be executed.
+        wd : str
+            working directory of the snippet.
+
+        Returns
+        -------
+        Dict[str, Any]
+            The response holding "stdout", "stderr", "returncode", "rss", the
+            lifetime "peak_rss" of the interpreter, "globals" and, where
+            measurable, "user_cpu", "system_cpu" and the "execution_peak_rss" of
+            the snippet.
+
+        Raises
+        ------
+        RuntimeError
+            If the session is closed.
+        TimeoutError
+            If the snippet runs longer than the timeout, the session is closed.
+        CodeExecutionError
+            If the interpreter exits without answering, the session is closed.
+        """
+        return self._request({"code": code, "wd": os.path.abspath(wd)}, self.timeout)
+
+    def reset(self) -> None:
+        """Clears the session namespace, the imported modules stay loaded.
+
+        Raises
+        ------
+        RuntimeError
+            If the session is closed.
+        """
+        self._request({"op": "reset"}, self.timeout)
+
+    def memory(self) -> Dict[str, Any]:
+        """Reports the memory of the session interpreter.
+
+        Returns
+        -------
+        Dict[str, Any]
+            The current "rss" (None where it cannot be read) and "peak_rss" of the
+            interpreter in bytes and the names of the session "globals".
+
+        Raises
+        ------
+        RuntimeError
+            If the session is closed.
+        """
+        response = self._request({"op": "stats"}, self.timeout)
+        return {name: response[name] for name in ("rss", "peak_rss", "globals")}
+
+    def close(self) -> None:
+        """Stops the interpreter, the session state is lost."""
+        with self._lock:
+            if self._idle_timer is not None:
+                self._idle_timer.cancel()
+            if self._worker is not None:
+                self._worker.close()
+                self._worker = None
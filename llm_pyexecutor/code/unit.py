@@ -0,0 +1,238 @@
+import ast
+import hashlib
+from functools import cached_property
+from types import CodeType
+from typing import Dict, List, Optional, Union
+
+CODE_FILENAME = "<llm_code>"
+IMPORT_ERRORS = frozenset(
+    ["ImportError", "ModuleNotFoundError", "Exception", "BaseException"]
+)
+DYNAMIC_IMPORTS = frozenset(["import_module", "__import__"])
+
+
+def _name_of(node: ast.AST) -> Optional[str]:
+    """Returns the last component of a name or attribute node, e.g. "suppress"."""
+    if isinstance(node, ast.Name):
+        return node.id
+    if isinstance(node, ast.Attribute):
+        return node.attr
+    return None
+
+
+def _catches_import_error(handler: ast.ExceptHandler) -> bool:
+    """Checks whether an except clause catches the error of a failed import."""
+    if handler.type is None:
+        return True
+    types = handler.type.elts if isinstance(handler.type, ast.Tuple) else [handler.type]
+    return any(_name_of(node) in IMPORT_ERRORS for node in types)
+
+
+class _ImportCollector(ast.NodeVisitor):
+    """Collects the imports of a tree, tracking whether they are guarded."""
+
+    def __init__(self) -> None:
+        self.imports: List[Dict[str, Union[str, bool]]] = []
+        self._guards = 0
+
+    def _add(self, module: str, name: str, alias: Optional[str]) -> None:
+        self.imports.append(
+            {
+                "module": module.split(".")[0],
+                "name": name,
+                "alias": alias or name,
+                "optional": self._guards > 0,
+            }
+        )
+
+    def _visit_guarded(self, nodes: List[ast.AST]) -> None:
+        self._guards += 1
+        for node in nodes:
+            self.visit(node)
+        self._guards -= 1
+
+    def visit_Import(self, node: ast.Import) -> None:
+        for alias in node.names:
+            self._add(alias.name, alias.name, alias.asname)
+
+    def visit_ImportFrom(self, node: ast.ImportFrom) -> None:
+        if node.level > 0 or node.module is None:
+            return
+        for alias in node.names:
+            self._add(node.module, alias.name, alias.asname)
+
+    def visit_Try(self, node: ast.Try) -> None:
+        if any(_catches_import_error(handler) for handler in node.handlers):
+            self._visit_guarded(node.body)
+        else:
+            for child in node.body:
+                self.visit(child)
+        for child in node.handlers + node.orelse + node.finalbody:
+            self.visit(child)
+
+    def visit_With(self, node: ast.With) -> None:
+        for item in node.items:
+            self.visit(item)
+        suppresses = any(
+            isinstance(item.context_expr, ast.Call)
+            and _name_of(item.context_expr.func) == "suppress"
+            and any(_name_of(arg) in IMPORT_ERRORS for arg in item.context_expr.args)
+            for item in node.items
+        )
+        if suppresses:
+            self._visit_guarded(node.body)
+        else:
+            for child in node.body:
+                self.visit(child)
+
+    def visit_Call(self, node: ast.Call) -> None:
+        if (
+            _name_of(node.func) in DYNAMIC_IMPORTS
+            and node.args
+            and isinstance(node.args[0], ast.Constant)
+            and isinstance(node.args[0].value, str)
+            and node.args[0].value
+            and not node.args[0].value.startswith(".")
+        ):
+            self._add(node.args[0].value, node.args[0].value, None)
+        self.generic_visit(node)
+
+
+class CodeUnit:
+    """
+    The extracted code of one request, parsed once and shared by every stage.
+
+    Extraction, dependency analysis, result caching and execution all read the
+    parsed tree, the imports, the hash and the compiled code object of the unit
+    instead of parsing the source again. Code that does not parse still makes a
+    unit, its syntax error is raised when the tree is needed and is otherwise
+    reported by the interpreter running the source.
+
+    Attributes:
+        source (str): The code as extracted from the text.
+        digest (str): The SHA-256 hex digest of the source.
+        syntax_error (Optional[SyntaxError]): The error raised parsing the source,
+            None if it parsed.
+    """
+
+    def __init__(self, source: str, filename: str = CODE_FILENAME) -> None:
+        """
+        Parses the source.
+
+        Args:
+            source (str): The Python code.
+            filename (str): The file name reported in tracebacks of the compiled
+                code (default is "<llm_code>").
+
+        Raises:
+            TypeError: If the source is not a string.
+        """
+        if not isinstance(source, str):
+            raise TypeError("Code must be a string.")
+        self.source = source
+        self.filename = filename
+        self.digest = hashlib.sha256(source.encode("utf-8")).hexdigest()
+        self.syntax_error: Optional[SyntaxError] = None
+        self._tree: Optional[ast.Module] = None
+        try:
+            self._tree = ast.parse(source, filename)
+        except SyntaxError as error:
+            self.syntax_error = error
+
+    @classmethod
+    def of(cls, code: Union["CodeUnit", str]) -> "CodeUnit":
+        """
+        Returns the unit of some code, parsing it only if it is not a unit yet.
+
+        Args:
+            code (Union[CodeUnit, str]): A unit or Python source.
+
+        Returns:
+            CodeUnit: The unit of the code.
+        """
+        return code if isinstance(code, CodeUnit) else cls(code)
+
+    @property
+    def is_valid(self) -> bool:
+        """Whether the source parsed."""
+        return self.syntax_error is None
+
+    @property
+    def tree(self) -> ast.Module:
+        """
+        The parsed module.
+
+        Raises:
+            SyntaxError: If the source does not parse.
+        """
+        if self._tree is None:
+            raise self.syntax_error
+        return self._tree
+
+    @cached_property
+    def imports(self) -> List[Dict[str, Union[str, bool]]]:
+        """
+        The imports found anywhere in the tree, including the ones nested in
+        functions, classes and branches and the ``importlib.import_module`` and
+        ``__import__`` calls with a literal module name. Every import is a
+        dictionary holding the top-level "module", the imported "name", its
+        "alias" and whether it is "optional", i.e. guarded by a ``try`` catching
+        ``ImportError`` or by ``contextlib.suppress(ImportError)``. Relative
+        imports are skipped.
+
+        Raises:
+            SyntaxError: If the source does not parse.
+        """
+        collector = _ImportCollector()
+        collector.visit(self.tree)
+        return collector.imports
+
+    @cached_property
+    def compiled(self) -> CodeType:
+        """
+        The code object of the module, it also catches the errors found only by
+        the compiler, e.g. a ``return`` outside of a function.
+
+        Raises:
+            SyntaxError: If the source does not compile.
+        """
+        return compile(self.tree, self.filename, "exec")
+
+    def check_compiles(self) -> None:
+        """
+        Compiles the code, so that code the interpreter would reject fails before
+        anything is installed or run. The code object is kept in ``compiled``.
+
+        Raises:
+            SyntaxError: If the source does not compile.
+        """
+        _ = self.compiled
+
+    @cached_property
+    def normalized(self) -> str:
+        """
+        The source regenerated from the tree with astor, dropping comments and
+        normalizing the formatting of every top-level statement.
+
+        Raises:
+            SyntaxError: If the source does not parse.
+        """
+        import astor
+
+        return "".join(astor.to_source(node) for node in self.tree.body)
+
+    def runnable_source(self, normalize: bool = True) -> str:
+        """
+        Returns the source sent to the interpreter.
+
+        Args:
+            normalize (bool): Whether the astor normalized source is returned
+                instead of the original one (default is True).
+
+        Returns:
+            str: The source to run.
+        """
+        return self.normalized if normalize else self.source
+
+    def __str__(self) -> str:
+        return self.source
@@ -0,0 +1,377 @@
+import functools
+import json
+import os
+import subprocess
+import threading
+from typing import Any, Dict, List, Optional
+
+from ..code.exceptions import CodeExecutionError
+from ..code.resources import ResourceLimits
+from ..code.runtime import interpreter_script
+from ..constants import WORKER_SCRIPT
+
+
+class PythonWorker:
+    """A long-lived interpreter process that executes code snippets sent over a pipe.
+
+    The worker runs ``WORKER_SCRIPT`` with the virtual environment interpreter,
+    reads one JSON request per line from its stdin and answers with one JSON
+    response per line. Every snippet is executed in a fresh namespace, while the
+    modules it imports stay loaded in the worker for the following snippets.
+
+    Attributes
+    ----------
+    venv_executor : str
+        The path to the Python interpreter in the virtual environment.
+    tasks : int
+        The number of snippets executed by this worker.
+    peak_rss : int
+        The peak resident set size of the worker over its lifetime in bytes, as
+        last reported.
+    """
+
+    script = interpreter_script(WORKER_SCRIPT)
+
+    def __init__(
+        self, venv_executor: str, wd: str, limits: Optional[ResourceLimits] = None
+    ) -> None:
+        """Starts the worker process.
+
+        Parameters
+        ----------
+        venv_executor : str
+            The path to the Python interpreter in the virtual environment.
+        wd : str
+            working directory the worker is started in.
+        limits : Optional[ResourceLimits]
+            The resource limits applied to the worker process, except the CPU time
+            limit which would add up over all snippets (default is None).
+        """
+        self.venv_executor = venv_executor
+        self.tasks = 0
+        self.peak_rss = 0
+        self._process = subprocess.Popen(
+            [venv_executor, "-c", self.script],
+            cwd=wd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            encoding="utf-8",
+            preexec_fn=(
+                functools.partial(limits.apply, include_cpu=False)
+                if limits is not None and os.name == "posix"
+                else None
+            ),
+        )
+
+    def is_alive(self) -> bool:
+        """Checks whether the worker process is still running.
+
+        Returns
+        -------
+        bool
+            True if the worker process has not exited.
+        """
+        return self._process.poll() is None
+
+    def run(
+        self,
+        code: str,
+        wd: str,
+        timeout: int,
+        spill_threshold: Optional[int] = None,
+        spill_dir: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Executes a code snippet in the worker.
+
+        Parameters
+        ----------
+        code : str
+            The Python code to be executed.
+        wd : str
+            working directory of the snippet.
+        timeout : int
+            The maximum number of seconds the snippet may run.
+        spill_threshold : Optional[int]
+            The stdout size in bytes above which the worker writes the output to
+            a file instead of sending it (default is None, never).
+        spill_dir : Optional[str]
+            The directory of the spilled outputs (default is None, the temporary
+            directory).
+
+        Returns
+        -------
+        Dict[str, Any]
+            The worker response holding "stdout", "stderr", "returncode", the
+            lifetime "peak_rss" of the worker and, where measurable, "user_cpu",
+            "system_cpu" and the "execution_peak_rss" of the snippet. A spilled
+            output is sent as the "stdout_path" of its file and an empty "stdout".
+
+        Raises
+        ------
+        TimeoutError
+            If the snippet runs longer than timeout, the worker is killed.
+        CodeExecutionError
+            If the worker exits without answering.
+        """
+        request = {"code": code, "wd": wd}
+        if spill_threshold is not None:
+            request.update(spill_bytes=spill_threshold, spill_dir=spill_dir)
+        response = self._request(request, timeout)
+        self.tasks += 1
+        return response
+
+    def _request(self, request: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+        """Sends a request to the worker and waits for its response.
+
+        Parameters
+        ----------
+        request : Dict[str, Any]
+            The JSON request.
+        timeout : float
+            The maximum number of seconds to wait, the worker is killed after.
+
+        Returns
+        -------
+        Dict[str, Any]
+            The JSON response.
+
+        Raises
+        ------
+        TimeoutError
+            If no response arrived within timeout.
+        CodeExecutionError
+            If the worker exits without answering.
+        """
+        timed_out = threading.Event()
+
+        def kill() -> None:
+            timed_out.set()
+            self._process.kill()
+
+        timer = threading.Timer(timeout, kill)
+        timer.start()
+        try:
+            self._process.stdin.write(json.dumps(request) + "\n")
+            self._process.stdin.flush()
+            line = self._process.stdout.readline()
+        except (BrokenPipeError, OSError):
+            line = ""
+        finally:
+            timer.cancel()
+        if not line:
+            self.close()
+            if timed_out.is_set():
+                raise TimeoutError(
+                    f"timeout, running code takes more than {timeout} seconds"
+                )
+            raise CodeExecutionError("python worker exited unexpectedly")
+        response = json.loads(line)
+        self.peak_rss = response["peak_rss"]
+        return response
+
+    def close(self) -> None:
+        """Stops the worker process."""
+        if self.is_alive():
+            self._process.kill()
+        self._process.wait()
+        for stream in (self._process.stdin, self._process.stdout):
+            try:
+                stream.close()
+            except OSError:
+                pass
+
+
+class PythonWorkerPool:
+    """A pool of warm interpreter processes used to execute code snippets.
+
+    Workers are started lazily up to ``size`` and reused between snippets, so
+    interpreter startup and module imports are paid once per worker instead of
+    once per snippet. A worker is recycled after ``max_tasks_per_worker``
+    snippets or once its peak RSS exceeds ``max_rss_mb``.
+
+    Attributes
+    ----------
+    venv_executor : str
+        The path to the Python interpreter in the virtual environment.
+    size : int
+        The maximum number of workers running at the same time.
+    max_tasks_per_worker : int
+        The number of snippets after which a worker is replaced.
+    max_rss_mb : Optional[int]
+        The peak RSS in megabytes after which a worker is replaced.
+    timeout : int
+        The maximum number of seconds a snippet may run.
+    limits : Optional[ResourceLimits]
+        The resource limits applied to the worker processes.
+    """
+
+    def __init__(
+        self,
+        venv_executor: str,
+        size: int = 2,
+        max_tasks_per_worker: int = 100,
+        max_rss_mb: Optional[int] = None,
+        timeout: int = 120,
+        limits: Optional[ResourceLimits] = None,
+    ) -> None:
+        """Initializes the pool without starting any worker.
+
+        Parameters
+        ----------
+        venv_executor : str
+            The path to the Python interpreter in the virtual environment.
+        size : int
+            The maximum number of workers (default is 2).
+        max_tasks_per_worker : int
+            The number of snippets after which a worker is replaced (default is 100).
+        max_rss_mb : Optional[int]
+            The peak RSS in megabytes after which a worker is replaced
+            (default is None, no limit).
+        timeout : int
+            The maximum number of seconds a snippet may run (default is 120).
+        limits : Optional[ResourceLimits]
+            The resource limits applied to the worker processes, the CPU time limit
+            is not applied since workers run many snippets (default is None).
+
+        Raises
+        ------
+        ValueError
+            If size or max_tasks_per_worker is less than 1.
+        """
+        if size < 1:
+            raise ValueError("Pool size must be greater than 0")
+        if max_tasks_per_worker < 1:
+            raise ValueError("max_tasks_per_worker must be greater than 0")
+        self.venv_executor = venv_executor
+        self.size = size
+        self.max_tasks_per_worker = max_tasks_per_worker
+        self.max_rss_mb = max_rss_mb
+        self.timeout = timeout
+        self.limits = limits
+        self._idle: List[PythonWorker] = []
+        self._running = 0
+        self._closed = False
+        self._condition = threading.Condition()
+
+    def _acquire(self, wd: str) -> PythonWorker:
+        """Takes an idle worker, starting a new one if the pool is not full."""
+        with self._condition:
+            while True:
+                if self._closed:
+                    raise RuntimeError("worker pool is closed")
+                while self._idle:
+                    worker = self._idle.pop()
+                    if worker.is_alive():
+                        return worker
+                    worker.close()
+                    self._running -= 1
+                if self._running < self.size:
+                    self._running += 1
+                    break
+                self._condition.wait()
+        try:
+            return PythonWorker(self.venv_executor, wd, self.limits)
+        except BaseException:
+            with self._condition:
+                self._running -= 1
+                self._condition.notify()
+            raise
+
+    def start(self, wd: str = ".") -> None:
+        """Starts workers until the pool is full.
+
+        Workers are otherwise started by the first snippets, starting them ahead
+        takes the interpreter startup out of the first executions.
+
+        Parameters
+        ----------
+        wd : str
+            The initial working directory of the workers.
+        """
+        wd = os.path.abspath(wd)
+        while True:
+            with self._condition:
+                if self._closed or self._running >= self.size:
+                    return
+                self._running += 1
+            try:
+                worker = PythonWorker(self.venv_executor, wd, self.limits)
+            except BaseException:
+                with self._condition:
+                    self._running -= 1
+                    self._condition.notify()
+                raise
+            self._release(worker)
+
+    def _should_recycle(self, worker: PythonWorker) -> bool:
+        """Checks whether a worker reached one of the recycling limits."""
+        if worker.tasks >= self.max_tasks_per_worker:
+            return True
+        if self.max_rss_mb is not None:
+            return worker.peak_rss > self.max_rss_mb * 1024 * 1024
+        return False
+
+    def _release(self, worker: PythonWorker) -> None:
+        """Returns a worker to the pool, or stops it if it must be recycled."""
+        with self._condition:
+            if self._closed or not worker.is_alive() or self._should_recycle(worker):
+                worker.close()
+                self._running -= 1
+            else:
+                self._idle.append(worker)
+            self._condition.notify()
+
+    def execute(
+        self,
+        code: str,
+        wd: str,
+        spill_threshold: Optional[int] = None,
+        spill_dir: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Executes a code snippet on one of the pool workers.
+
+        Parameters
+        ----------
+        code : str
+            The Python code to be executed.
+        wd : str
+            working directory of the snippet.
+        spill_threshold : Optional[int]
+            The stdout size in bytes above which the output is written to a file
+            instead of being sent back (default is None, never).
+        spill_dir : Optional[str]
+            The directory of the spilled outputs (default is None, the temporary
+            directory).
+
+        Returns
+        -------
+        Dict[str, Any]
+            The worker response holding "stdout", "stderr", "returncode", the
+            lifetime "peak_rss" of the worker and, where measurable, "user_cpu",
+            "system_cpu" and the "execution_peak_rss" of the snippet. A spilled
+            output is returned as the "stdout_path" of its file and an empty
+            "stdout".
+
+        Raises
+        ------
+        TimeoutError
+            If the snippet runs longer than the pool timeout.
+        CodeExecutionError
+            If the worker exits without answering.
+        """
+        wd = os.path.abspath(wd)
+        worker = self._acquire(wd)
+        try:
+            return worker.run(code, wd, self.timeout, spill_threshold, spill_dir)
+        finally:
+            self._release(worker)
+
+    def close(self) -> None:
+        """Stops all idle workers; busy workers are stopped when released."""
+        with self._condition:
+            self._closed = True
+            while self._idle:
+                self._idle.pop().close()
+                self._running -= 1
+            self._condition.notify_all()
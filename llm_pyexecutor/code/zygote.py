@@ -0,0 +1,289 @@
+import itertools
+import json
+import os
+import signal
+import subprocess
+import tempfile
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+from ..code.exceptions import CodeExecutionError
+from ..code.output import new_spill_file
+from ..code.resources import ResourceLimits
+from ..code.runtime import interpreter_script
+from ..constants import ZYGOTE_SCRIPT
+
+
+class _ZygoteProcess:
+    """A single zygote process and the thread reading its events."""
+
+    def __init__(self, venv_executor: str, preload_modules: List[str]) -> None:
+        """Starts the zygote and waits until the modules are preloaded."""
+        self._process = subprocess.Popen(
+            [
+                venv_executor,
+                "-c",
+                interpreter_script(ZYGOTE_SCRIPT),
+                json.dumps(preload_modules),
+            ],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            encoding="utf-8",
+        )
+        ready = self._process.stdout.readline()
+        if not ready:
+            self._process.wait()
+            raise CodeExecutionError("zygote process exited during preloading")
+        self.failed_modules: List[str] = json.loads(ready)["failed"]
+        self._pending: Dict[int, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._reader = threading.Thread(target=self._read_events, daemon=True)
+        self._reader.start()
+
+    def is_alive(self) -> bool:
+        """Checks whether the zygote process is still running."""
+        return self._process.poll() is None
+
+    def _read_events(self) -> None:
+        """Dispatches the zygote events to the pending executions."""
+        for line in self._process.stdout:
+            event = json.loads(line)
+            with self._lock:
+                task = self._pending.get(event["id"])
+            if task is None:
+                continue
+            if event["event"] == "started":
+                task["pid"] = event["pid"]
+            else:
+                for key in ("returncode", "user_cpu", "system_cpu", "peak_rss"):
+                    task[key] = event.get(key)
+                task["done"].set()
+        with self._lock:
+            for task in self._pending.values():
+                task["done"].set()
+
+    def submit(self, task_id: int, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Asks the zygote to fork a child for the request."""
+        task = {"done": threading.Event(), "pid": None, "returncode": None}
+        with self._lock:
+            self._pending[task_id] = task
+        try:
+            self._process.stdin.write(json.dumps(dict(request, id=task_id)) + "\n")
+            self._process.stdin.flush()
+        except (BrokenPipeError, OSError):
+            task["done"].set()
+        return task
+
+    def discard(self, task_id: int) -> None:
+        """Forgets a finished execution."""
+        with self._lock:
+            self._pending.pop(task_id, None)
+
+    def shutdown(self) -> None:
+        """Stops accepting requests, the zygote exits once its children exited."""
+        try:
+            self._process.stdin.close()
+        except OSError:
+            pass
+
+    def kill(self) -> None:
+        """Kills the zygote process."""
+        if self.is_alive():
+            self._process.kill()
+        self._process.wait()
+
+
+class PythonZygote:
+    """A fork server that executes code snippets with preloaded modules.
+
+    A zygote process running the virtual environment interpreter imports the
+    configured modules once, then forks a child for every snippet. The children
+    share the already imported modules copy-on-write, so heavy imports such as
+    numpy or pandas are warm when the snippet starts. The zygote is restarted when
+    the fingerprint of the installed packages changes, so newly installed
+    packages are picked up. Requires ``os.fork``, i.e. a POSIX system.
+
+    Attributes
+    ----------
+    venv_executor : str
+        The path to the Python interpreter in the virtual environment.
+    preload_modules : List[str]
+        The modules imported by the zygote before forking.
+    timeout : int
+        The maximum number of seconds a snippet may run.
+    limits : Optional[ResourceLimits]
+        The resource limits applied to every forked child.
+    """
+
+    def __init__(
+        self,
+        venv_executor: str,
+        preload_modules: List[str],
+        packages_fingerprint: Optional[Callable[[], str]] = None,
+        timeout: int = 120,
+        limits: Optional[ResourceLimits] = None,
+    ) -> None:
+        """Initializes the zygote, the process is started on first use.
+
+        Parameters
+        ----------
+        venv_executor : str
+            The path to the Python interpreter in the virtual environment.
+        preload_modules : List[str]
+            The modules imported by the zygote before forking.
+        packages_fingerprint : Optional[Callable[[], str]]
+            A callable returning a fingerprint of the installed packages, the zygote
+            is restarted whenever it changes (default is None, never restarted).
+        timeout : int
+            The maximum number of seconds a snippet may run (default is 120).
+        limits : Optional[ResourceLimits]
+            The resource limits applied to every forked child (default is None).
+
+        Raises
+        ------
+        RuntimeError
+            If the platform does not support ``os.fork``.
+        """
+        if not hasattr(os, "fork"):
+            raise RuntimeError("zygote execution requires os.fork (POSIX only)")
+        self.venv_executor = venv_executor
+        self.preload_modules = list(preload_modules)
+        self.timeout = timeout
+        self.limits = limits
+        self._packages_fingerprint = packages_fingerprint
+        self._fingerprint: Optional[str] = None
+        self._zygote: Optional[_ZygoteProcess] = None
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+
+    @property
+    def failed_modules(self) -> List[str]:
+        """The preload modules the running zygote failed to import."""
+        return [] if self._zygote is None else list(self._zygote.failed_modules)
+
+    def _get_zygote(self) -> _ZygoteProcess:
+        """Returns the running zygote, (re)starting it when needed."""
+        fingerprint = (
+            self._packages_fingerprint() if self._packages_fingerprint else None
+        )
+        with self._lock:
+            if (
+                self._zygote is None
+                or not self._zygote.is_alive()
+                or fingerprint != self._fingerprint
+            ):
+                if self._zygote is not None:
+                    self._zygote.shutdown()
+                self._zygote = _ZygoteProcess(self.venv_executor, self.preload_modules)
+                self._fingerprint = fingerprint
+            return self._zygote
+
+    def start(self) -> None:
+        """Starts the zygote so the preload modules are imported before first use."""
+        self._get_zygote()
+
+    def execute(
+        self,
+        code: str,
+        wd: str,
+        spill_threshold: Optional[int] = None,
+        spill_dir: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Executes a code snippet in a child forked from the zygote.
+
+        The child writes its output to files, a stdout larger than the spill
+        threshold is moved to the spill directory instead of being read.
+
+        Parameters
+        ----------
+        code : str
+            The Python code to be executed.
+        wd : str
+            working directory of the snippet.
+        spill_threshold : Optional[int]
+            The stdout size in bytes above which the output is not read but kept
+            in a file (default is None, never).
+        spill_dir : Optional[str]
+            The directory of the spilled outputs and of the output files of the
+            child (default is None, the temporary directory).
+
+        Returns
+        -------
+        Dict[str, Any]
+            The execution result holding "stdout", "stderr", "returncode",
+            "user_cpu", "system_cpu" and the "execution_peak_rss" of the forked
+            child. A spilled output is returned as the "stdout_path" of its file
+            and an empty "stdout".
+
+        Raises
+        ------
+        TimeoutError
+            If the snippet runs longer than the timeout, the child is killed.
+        CodeExecutionError
+            If the zygote exits before reporting the result.
+        """
+        zygote = self._get_zygote()
+        task_id = next(self._ids)
+        response = {}
+        with tempfile.TemporaryDirectory(
+            prefix="llm_pyexecutor_", dir=spill_dir
+        ) as tmp_dir:
+            stdout_path = os.path.join(tmp_dir, "stdout")
+            stderr_path = os.path.join(tmp_dir, "stderr")
+            task = zygote.submit(
+                task_id,
+                {
+                    "code": code,
+                    "wd": os.path.abspath(wd),
+                    "stdout": stdout_path,
+                    "stderr": stderr_path,
+                    "limits": self.limits.to_dict() if self.limits else {},
+                },
+            )
+            try:
+                if not task["done"].wait(self.timeout):
+                    if task["pid"] is not None:
+                        try:
+                            os.kill(task["pid"], signal.SIGKILL)
+                        except ProcessLookupError:
+                            pass
+                    raise TimeoutError(
+                        f"timeout, running code takes more than {self.timeout} seconds"
+                    )
+            finally:
+                zygote.discard(task_id)
+            if task["returncode"] is None:
+                raise CodeExecutionError("zygote process exited unexpectedly")
+            if (
+                spill_threshold is not None
+                and os.path.exists(stdout_path)
+                and os.path.getsize(stdout_path) > spill_threshold
+            ):
+                fd, response["stdout_path"] = new_spill_file(spill_dir)
+                os.close(fd)
+                os.replace(stdout_path, response["stdout_path"])
+            outputs = []
+            for path in (stdout_path, stderr_path):
+                if os.path.exists(path):
+                    with open(path, "r", encoding="utf-8", errors="replace") as file:
+                        outputs.append(file.read())
+                else:
+                    outputs.append("")
+        response.update(
+            stdout=outputs[0],
+            stderr=outputs[1],
+            returncode=task["returncode"],
+            user_cpu=task["user_cpu"],
+            system_cpu=task["system_cpu"],
+            execution_peak_rss=task["peak_rss"],
+        )
+        return response
+
+    def close(self) -> None:
+        """Stops the zygote process."""
+        with self._lock:
+            if self._zygote is not None:
+                self._zygote.shutdown()
+                self._zygote.kill()
+                self._zygote = None
@@ -7,3 +7,171 @@ for package in std_lib_modules:
     standard_packages.append(package)
 print(standard_packages)
 """
+
+# The main loops of the interpreters running the code, they follow the runtime of
+# ``llm_pyexecutor.code.runtime`` in the script, see ``interpreter_script``.
+WORKER_SCRIPT = """request_fd, response_fd = take_over_stdio()
+meter = Meter()
+for request in receive(request_fd):
+    namespace = new_namespace()
+    meter.start()
+    returncode, stdout, stderr = run_captured(request["code"], namespace, request["wd"])
+    del namespace
+    response = {"stdout": stdout, "stderr": stderr, "returncode": returncode}
+    meter.stop(response)
+    spill_bytes = request.get("spill_bytes")
+    if spill_bytes is not None and len(stdout) > spill_bytes // 4:
+        data = stdout.encode("utf-8", errors="replace")
+        if len(data) > spill_bytes:
+            import tempfile
+
+            fd, path = tempfile.mkstemp(
+                prefix="stdout-", suffix=".txt", dir=request.get("spill_dir")
+            )
+            with os.fdopen(fd, "wb") as file:
+                file.write(data)
+            response["stdout"] = ""
+            response["stdout_path"] = path
+        del data
+    del stdout
+    send(response_fd, response)
+"""
+
+SESSION_SCRIPT = """import gc
+import importlib
+
+request_fd, response_fd = take_over_stdio()
+meter = Meter()
+namespace = new_namespace()
+for request in receive(request_fd):
+    op = request.get("op", "run")
+    returncode, stdout, stderr = 0, "", ""
+    meter.start()
+    if op == "reset":
+        namespace = new_namespace()
+        gc.collect()
+    elif op == "run":
+        importlib.invalidate_caches()
+        returncode, stdout, stderr = run_captured(
+            request["code"], namespace, request["wd"]
+        )
+    response = {
+        "stdout": stdout,
+        "stderr": stderr,
+        "returncode": returncode,
+        "rss": current_rss(),
+        "globals": sorted(name for name in namespace if not name.startswith("__")),
+    }
+    meter.stop(response)
+    send(response_fd, response)
+"""
+
+ZYGOTE_SCRIPT = """import importlib
+import select
+
+
+def run(request):
+    returncode = 1
+    try:
+        apply_limits(request.get("limits", {}))
+        for stream, target in ((1, request["stdout"]), (2, request["stderr"])):
+            fd = os.open(target, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            os.dup2(fd, stream)
+            os.close(fd)
+        returncode = run_code(request["code"], new_namespace(), request["wd"])
+    except BaseException:
+        traceback.print_exc()
+    try:
+        sys.stdout.flush()
+        sys.stderr.flush()
+    finally:
+        os._exit(returncode)
+
+
+request_fd, response_fd = take_over_stdio(stdout_fd=-1)
+failed = []
+for module in json.loads(sys.argv[1]):
+    try:
+        importlib.import_module(module)
+    except Exception:
+        failed.append(module)
+send(response_fd, {"event": "ready", "failed": failed})
+
+children = {}
+buffer = b""
+accepting = True
+while accepting or children:
+    timeout = 0.02 if children else None
+    readable = []
+    if accepting:
+        readable, _, _ = select.select([request_fd], [], [], timeout)
+    elif children:
+        select.select([], [], [], timeout)
+    if readable:
+        data = os.read(request_fd, 65536)
+        if not data:
+            accepting = False
+        buffer += data
+        while b"\\n" in buffer:
+            line, buffer = buffer.split(b"\\n", 1)
+            request = json.loads(line)
+            pid = os.fork()
+            if pid == 0:
+                os.close(request_fd)
+                os.close(response_fd)
+                run(request)
+            children[pid] = request["id"]
+            send(response_fd, {"event": "started", "id": request["id"], "pid": pid})
+    while children:
+        pid, status, rusage = os.wait4(-1, os.WNOHANG)
+        if pid == 0:
+            break
+        request_id = children.pop(pid, None)
+        if request_id is not None:
+            send(
+                response_fd,
+                {
+                    "event": "exited",
+                    "id": request_id,
+                    "returncode": os.waitstatus_to_exitcode(status),
+                    "user_cpu": rusage.ru_utime,
+                    "system_cpu": rusage.ru_stime,
+                    "peak_rss": maxrss_to_bytes(rusage.ru_maxrss),
+                },
+            )
+"""
+
+# Top-level import names whose distribution on PyPI has a different name.
+IMPORT_TO_DISTRIBUTION = {
+    "attr": "attrs",
+    "bs4": "beautifulsoup4",
+    "cairo": "pycairo",
+    "Crypto": "pycryptodome",
+    "cv2": "opencv-python",
+    "dateutil": "python-dateutil",
+    "docx": "python-docx",
+    "dotenv": "python-dotenv",
+    "fitz": "pymupdf",
+    "gi": "pygobject",
+    "jose": "python-jose",
+    "jwt": "pyjwt",
+    "magic": "python-magic",
+    "markdown_it": "markdown-it-py",
+    "MySQLdb": "mysqlclient",
+    "OpenSSL": "pyopenssl",
+    "PIL": "pillow",
+    "pptx": "python-pptx",
+    "psycopg2": "psycopg2-binary",
+    "serial": "pyserial",
+    "skimage": "scikit-image",
+    "sklearn": "scikit-learn",
+    "slugify": "python-slugify",
+    "socks": "pysocks",
+    "telegram": "python-telegram-bot",
+    "usb": "pyusb",
+    "win32api": "pywin32",
+    "win32con": "pywin32",
+    "wx": "wxpython",
+    "yaml": "pyyaml",
+    "zmq": "pyzmq",
+}
@@ -1,3 +1,28 @@
-from llm_pyexecutor.environment_manager.virtual_environment import (
-    VirtualEnvironmentManager,
-)
+from typing import TYPE_CHECKING
+
+from llm_pyexecutor._lazy import lazy_exports
+
+if TYPE_CHECKING:
+    from llm_pyexecutor.environment_manager.distributions import (
+        InstalledDistributionIndex,
+    )
+    from llm_pyexecutor.environment_manager.virtual_environment import (
+        VirtualEnvironmentManager,
+    )
+    from llm_pyexecutor.environment_manager.pool import VirtualEnvironmentPool
+    from llm_pyexecutor.environment_manager.resolver import ImportNameResolver
+    from llm_pyexecutor.environment_manager.template import VenvTemplate
+    from llm_pyexecutor.environment_manager.wheelhouse import Wheelhouse
+
+_EXPORTS = {
+    "InstalledDistributionIndex": ".distributions",
+    "VirtualEnvironmentManager": ".virtual_environment",
+    "VirtualEnvironmentPool": ".pool",
+    "ImportNameResolver": ".resolver",
+    "VenvTemplate": ".template",
+    "Wheelhouse": ".wheelhouse",
+}
+
+__all__ = sorted(_EXPORTS)
+
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
@@ -0,0 +1,260 @@
+import csv
+import hashlib
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple, Union
+
+_REQUIREMENT_NAME = re.compile(r"^\s*([A-Za-z0-9](?:[A-Za-z0-9._-]*[A-Za-z0-9])?)")
+_METADATA_SUFFIXES = (".dist-info", ".egg-info")
+
+
+def normalize_distribution_name(name: str) -> str:
+    """
+    Normalizes a distribution name as described in PEP 503.
+
+    Args:
+        name (str): The distribution name, e.g. "Scikit_Learn".
+
+    Returns:
+        str: The normalized name, e.g. "scikit-learn".
+    """
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+
+def requirement_name(requirement: str) -> str:
+    """
+    Extracts the distribution name from a requirement string.
+
+    Args:
+        requirement (str): A requirement such as "pandas[excel]>=2.0".
+
+    Returns:
+        str: The distribution name, e.g. "pandas", or the stripped requirement if
+        no name can be found.
+    """
+    match = _REQUIREMENT_NAME.match(requirement)
+    return match.group(1) if match else requirement.strip()
+
+
+class InstalledDistributionIndex:
+    """
+    An in-process index of the distributions installed in a site-packages directory.
+
+    The index is built by reading the ``*.dist-info`` (and legacy ``*.egg-info``)
+    metadata directly, it maps normalized distribution names to their versions and
+    records the top-level import names every distribution provides. It is
+    invalidated by the mtime of the site-packages directory and refreshed
+    incrementally, only the metadata directories that appeared since the last scan
+    are read.
+
+    Attributes:
+        site_packages (Path): The site-packages directory that is indexed.
+    """
+
+    def __init__(self, site_packages: Union[Path, str]) -> None:
+        """
+        Initializes the index, the directory is scanned on first use.
+
+        Args:
+            site_packages (Union[Path, str]): The site-packages directory to index.
+        """
+        self.site_packages = Path(site_packages)
+        self._entries: Dict[str, Tuple[str, str, FrozenSet[str]]] = {}
+        self._versions: Dict[str, str] = {}
+        self._import_names: Dict[str, Set[str]] = {}
+        self._mtime: Optional[int] = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _read_top_level(metadata_dir: Path) -> FrozenSet[str]:
+        """
+        Reads the top-level import names of a distribution.
+
+        ``top_level.txt`` is used when present, otherwise the names are derived
+        from the first path component of the files listed in ``RECORD``.
+        """
+        top_level_file = metadata_dir / "top_level.txt"
+        if top_level_file.exists():
+            with open(top_level_file, "r", encoding="utf-8") as file:
+                names = {line.strip().split("/")[0] for line in file}
+            return frozenset(name for name in names if name)
+        record_file = metadata_dir / "RECORD"
+        if not record_file.exists():
+            return frozenset()
+        names = set()
+        with open(record_file, "r", encoding="utf-8", newline="") as file:
+            for row in csv.reader(file):
+                if not row:
+                    continue
+                top = row[0].replace("\\", "/").split("/")[0]
+                if (
+                    top in ("..", "__pycache__")
+                    or top.endswith(_METADATA_SUFFIXES)
+                    or top.endswith((".pth", ".data"))
+                ):
+                    continue
+                if "/" not in row[0].replace("\\", "/"):
+                    if not top.endswith((".py", ".so", ".pyd")):
+                        continue
+                    top = top.split(".")[0]
+                if top.isidentifier():
+                    names.add(top)
+        return frozenset(names)
+
+    @staticmethod
+    def _read_distribution(metadata_dir: Path) -> Optional[Tuple[str, str]]:
+        """
+        Reads the name and version of a distribution from its metadata directory.
+        """
+        from email.parser import HeaderParser
+
+        for metadata_name in ("METADATA", "PKG-INFO"):
+            metadata_file = metadata_dir / metadata_name
+            if metadata_file.exists():
+                with open(metadata_file, "r", encoding="utf-8") as file:
+                    headers = HeaderParser().parse(file, headersonly=True)
+                if headers.get("Name"):
+                    return headers["Name"], headers.get("Version", "")
+        return None
+
+    def _scan(self) -> None:
+        """Adds new metadata directories to the index and drops removed ones."""
+        try:
+            current = {
+                entry.name
+                for entry in os.scandir(self.site_packages)
+                if entry.name.endswith(_METADATA_SUFFIXES)
+            }
+            mtime = os.stat(self.site_packages).st_mtime_ns
+        except FileNotFoundError:
+            current, mtime = set(), None
+        for removed in set(self._entries) - current:
+            del self._entries[removed]
+        for added in current - set(self._entries):
+            metadata_dir = self.site_packages / added
+            try:
+                distribution = self._read_distribution(metadata_dir)
+                top_level = self._read_top_level(metadata_dir)
+            except (OSError, UnicodeDecodeError, csv.Error):
+                continue
+            if distribution is not None:
+                name, version = distribution
+                self._entries[added] = (name, version, top_level)
+        self._versions = {}
+        self._import_names = {}
+        for name, version, top_level in self._entries.values():
+            normalized = normalize_distribution_name(name)
+            self._versions[normalized] = version
+            for import_name in top_level:
+                self._import_names.setdefault(import_name, set()).add(normalized)
+        self._mtime = mtime
+
+    def _ensure_fresh(self) -> None:
+        """Rescans the directory if its mtime changed since the last scan."""
+        try:
+            mtime = os.stat(self.site_packages).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        if self._mtime is None or mtime != self._mtime:
+            self._scan()
+
+    def refresh(self) -> None:
+        """
+        Refreshes the index, e.g. after installing packages.
+
+        Only metadata directories that were added since the last scan are read.
+        """
+        with self._lock:
+            self._scan()
+
+    def distributions(self) -> Dict[str, str]:
+        """
+        Returns the installed distributions.
+
+        Returns:
+            Dict[str, str]: A mapping of normalized distribution names to versions.
+        """
+        with self._lock:
+            self._ensure_fresh()
+            return dict(self._versions)
+
+    def fingerprint(self) -> str:
+        """
+        Returns a fingerprint of the installed distributions and their versions.
+
+        Returns:
+            str: A SHA-256 hex digest that changes whenever a distribution is
+            installed, removed or upgraded.
+        """
+        distributions = self.distributions()
+        digest = hashlib.sha256()
+        for name in sorted(distributions):
+            digest.update(f"{name}=={distributions[name]}\n".encode("utf-8"))
+        return digest.hexdigest()
+
+    def import_names(self) -> Dict[str, FrozenSet[str]]:
+        """
+        Returns the top-level import names provided by the installed distributions.
+
+        Returns:
+            Dict[str, FrozenSet[str]]: A mapping of import names to the normalized
+            names of the distributions providing them.
+        """
+        with self._lock:
+            self._ensure_fresh()
+            return {
+                name: frozenset(dists) for name, dists in self._import_names.items()
+            }
+
+    def providers(self, import_name: str) -> FrozenSet[str]:
+        """
+        Returns the installed distributions providing a top-level import name.
+
+        Args:
+            import_name (str): A top-level import name, e.g. "yaml".
+
+        Returns:
+            FrozenSet[str]: The normalized names of the providing distributions.
+        """
+        with self._lock:
+            self._ensure_fresh()
+            return frozenset(self._import_names.get(import_name, ()))
+
+    def is_installed(self, name: str) -> bool:
+        """
+        Checks whether a distribution or a top-level import name is installed.
+
+        Args:
+            name (str): A distribution name, requirement string or import name.
+
+        Returns:
+            bool: True if a matching distribution is installed.
+        """
+        with self._lock:
+            self._ensure_fresh()
+            return self._is_installed(name)
+
+    def _is_installed(self, name: str) -> bool:
+        """Looks a name up in the index without refreshing it."""
+        dist_name = requirement_name(name)
+        return (
+            normalize_distribution_name(dist_name) in self._versions
+            or dist_name in self._import_names
+        )
+
+    def missing(self, names: Iterable[str]) -> List[str]:
+        """
+        Returns the names that are not installed, preserving their order.
+
+        Args:
+            names (Iterable[str]): Distribution names, requirement strings or
+                import names.
+
+        Returns:
+            List[str]: The names without a matching installed distribution.
+        """
+        with self._lock:
+            self._ensure_fresh()
+            return [name for name in names if not self._is_installed(name)]
@@ -0,0 +1,358 @@
+import base64
+import csv
+import hashlib
+import os
+import queue
+import shutil
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set, Tuple, Union
+
+from ..environment_manager.template import VenvTemplate
+from ..environment_manager.virtual_environment import VirtualEnvironmentManager
+
+
+class _Baseline:
+    """
+    The files of the site-packages and scripts of an environment right after its
+    creation, with the hashes their distributions recorded.
+    """
+
+    def __init__(
+        self,
+        roots: List[Path],
+        files: Dict[str, Tuple[int, int]],
+        directories: Set[str],
+        hashes: Dict[str, Tuple[str, str]],
+    ) -> None:
+        self.roots = roots
+        self.files = files
+        self.directories = directories
+        self.hashes = hashes
+
+    @staticmethod
+    def _walk(root: Path) -> Tuple[Dict[str, Tuple[int, int]], Set[str]]:
+        """Returns the size and mtime of every file under a directory, and its
+        subdirectories. Symbolic links are recorded as files and not followed."""
+        files = {}
+        directories = set()
+        for dirpath, dirnames, filenames in os.walk(root):
+            for name in list(dirnames):
+                path = os.path.join(dirpath, name)
+                if os.path.islink(path):
+                    dirnames.remove(name)
+                    filenames.append(name)
+                else:
+                    directories.add(path)
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                try:
+                    stat = os.lstat(path)
+                except FileNotFoundError:
+                    continue
+                files[path] = (stat.st_size, stat.st_mtime_ns)
+        return files, directories
+
+    @staticmethod
+    def _recorded_hashes(
+        site_packages: Path, files: Dict[str, Tuple[int, int]]
+    ) -> Dict[str, Tuple[str, str]]:
+        """Reads the hashes of the installed files from the ``RECORD`` files."""
+        hashes = {}
+        for record in site_packages.glob("*.dist-info/RECORD"):
+            with open(record, "r", encoding="utf-8", newline="") as file:
+                for row in csv.reader(file):
+                    if len(row) < 2 or "=" not in row[1]:
+                        continue
+                    path = os.path.normpath(os.path.join(site_packages, row[0]))
+                    if path in files:
+                        algorithm, _, digest = row[1].partition("=")
+                        hashes[path] = (algorithm, digest)
+        return hashes
+
+    @staticmethod
+    def _hash_matches(path: str, algorithm: str, digest: str) -> bool:
+        """Checks a file against the urlsafe base64 digest of its ``RECORD`` entry."""
+        try:
+            hasher = hashlib.new(algorithm)
+            with open(path, "rb") as file:
+                for block in iter(lambda: file.read(1 << 20), b""):
+                    hasher.update(block)
+        except (OSError, ValueError):
+            return False
+        encoded = base64.urlsafe_b64encode(hasher.digest()).rstrip(b"=")
+        return encoded.decode("ascii") == digest
+
+    @classmethod
+    def capture(cls, env: VirtualEnvironmentManager) -> "_Baseline":
+        """Records the baseline of an environment."""
+        site_packages = env.get_site_packages()
+        roots = [site_packages, Path(env.get_pyexecutor()).parent]
+        files: Dict[str, Tuple[int, int]] = {}
+        directories: Set[str] = set()
+        for root in roots:
+            root_files, root_directories = cls._walk(root)
+            files.update(root_files)
+            directories.update(root_directories)
+        hashes = cls._recorded_hashes(site_packages, files)
+        return cls(roots, files, directories, hashes)
+
+    def reset(self, env: VirtualEnvironmentManager) -> bool:
+        """
+        Removes the files added since the baseline was captured.
+
+        Returns:
+            bool: False if a file of the baseline was removed or modified, its size,
+            mtime or recorded hash differs, the environment can then not be reset
+            by removing files.
+        """
+        files: Dict[str, Tuple[int, int]] = {}
+        directories: Set[str] = set()
+        for root in self.roots:
+            root_files, root_directories = self._walk(root)
+            files.update(root_files)
+            directories.update(root_directories)
+        for path, stat in self.files.items():
+            if files.get(path) != stat:
+                return False
+        for path, (algorithm, digest) in self.hashes.items():
+            if not self._hash_matches(path, algorithm, digest):
+                return False
+        for path in sorted(directories - self.directories):
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+        for path in set(files) - set(self.files):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        env.get_installed_distributions().refresh()
+        return True
+
+
+class VirtualEnvironmentPool:
+    """
+    A pool of ready virtual environments leased to isolated sessions.
+
+    The pool keeps ``size`` environments ready under its base directory. A session
+    leases one environment and returns it when it ends. A returned environment is
+    reset to its baseline package set by removing every file and directory that
+    appeared in its site-packages and scripts since it was created. If any file of
+    the baseline was removed or modified, i.e. its size or mtime changed or it no
+    longer matches the hash in its distribution ``RECORD``, the environment is
+    discarded instead. A reset environment is kept
+    only while fewer than ``size`` environments are ready, otherwise it is
+    removed. Environments are created and reset on background threads, so leasing
+    does not wait on environment creation as long as the pool keeps up. Creating
+    environments from a ``VenvTemplate`` makes refills fast.
+
+    Attributes:
+        base_dir (Path): The directory holding the environments of the pool.
+        size (int): The number of environments kept ready.
+        template (Optional[VenvTemplate]): The template environments are cloned from.
+        logger: A logging object for logging messages.
+    """
+
+    def __init__(
+        self,
+        base_dir: Union[Path, str],
+        logger,
+        size: int = 2,
+        template: Optional[VenvTemplate] = None,
+        timeout: int = 200,
+    ) -> None:
+        """
+        Initializes the pool and starts creating its environments.
+
+        Args:
+            base_dir (Union[Path, str]): The directory holding the environments.
+            logger: A logger object for logging messages.
+            size (int): The number of environments kept ready (default is 2).
+            template (Optional[VenvTemplate]): A template the environments are cloned
+                from (default is None, environments are created with ensurepip).
+            timeout (int): The timeout of the pip calls of the environments
+                (default is 200 seconds).
+
+        Raises:
+            ValueError: If size is less than 1.
+        """
+        if size < 1:
+            raise ValueError("size must be greater than 0")
+        self.base_dir = Path(base_dir).absolute()
+        self.base_dir.mkdir(parents=True, exist_ok=True)
+        self.size = size
+        self.template = template
+        self.timeout = timeout
+        self.logger = logger
+        self._ready: "queue.Queue[VirtualEnvironmentManager]" = queue.Queue()
+        self._baselines: Dict[Path, _Baseline] = {}
+        self._leased: Set[Path] = set()
+        self._pending = 0
+        self._closed = False
+        self._lock = threading.Lock()
+        self._background = ThreadPoolExecutor(
+            max_workers=2, thread_name_prefix="venv-pool"
+        )
+        self._refill()
+
+    def _create(self) -> None:
+        """Creates a new environment and makes it available."""
+        try:
+            env = VirtualEnvironmentManager(
+                env_name=".venv",
+                base_dir=self.base_dir / f"env-{uuid.uuid4().hex[:12]}",
+                logger=self.logger,
+                timeout=self.timeout,
+                template=self.template,
+            )
+            baseline = _Baseline.capture(env)
+        except Exception as error:
+            self.logger.error(f"Failed to create a pooled environment: {error}")
+            with self._lock:
+                self._pending -= 1
+            return
+        with self._lock:
+            self._pending -= 1
+            if self._closed:
+                discard = True
+            else:
+                discard = False
+                self._baselines[env.env_path] = baseline
+        if discard:
+            self._destroy(env)
+        else:
+            self._ready.put(env)
+
+    def _refill(self) -> None:
+        """Schedules the creation of the missing environments."""
+        with self._lock:
+            if self._closed:
+                return
+            missing = self.size - self._ready.qsize() - self._pending
+            self._pending += max(missing, 0)
+        for _ in range(max(missing, 0)):
+            self._background.submit(self._create)
+
+    def _destroy(self, env: VirtualEnvironmentManager) -> None:
+        """Removes an environment from disk."""
+        with self._lock:
+            self._baselines.pop(env.env_path, None)
+        shutil.rmtree(env.env_path.parent, ignore_errors=True)
+
+    def lease(self, timeout: Optional[float] = None) -> VirtualEnvironmentManager:
+        """
+        Leases a ready environment.
+
+        Args:
+            timeout (Optional[float]): The maximum number of seconds to wait for an
+                environment when none is ready (default is None, wait forever).
+
+        Returns:
+            VirtualEnvironmentManager: An environment in its baseline state.
+
+        Raises:
+            RuntimeError: If the pool is closed.
+            TimeoutError: If no environment became ready within the timeout.
+        """
+        if self._closed:
+            raise RuntimeError("the virtual environment pool is closed")
+        try:
+            env = self._ready.get_nowait()
+        except queue.Empty:
+            self.logger.warning("No pooled environment ready, waiting for one")
+            self._refill()
+            try:
+                env = self._ready.get(timeout=timeout)
+            except queue.Empty:
+                raise TimeoutError("no pooled virtual environment became ready")
+        with self._lock:
+            self._leased.add(env.env_path)
+        self._refill()
+        return env
+
+    def _reset(self, env: VirtualEnvironmentManager) -> None:
+        """
+        Resets a returned environment and makes it available again, unless the
+        pool was refilled in the meantime, then it is destroyed without a reset.
+        """
+        with self._lock:
+            baseline = self._baselines.get(env.env_path)
+            full = self._ready.qsize() + self._pending >= self.size
+            keep = not self._closed and baseline is not None and not full
+            if keep:
+                # The reset counts as a pending environment, so refills do not
+                # create one in its place.
+                self._pending += 1
+        if not keep:
+            self._destroy(env)
+            self._refill()
+            return
+        reset = baseline.reset(env)
+        with self._lock:
+            self._pending -= 1
+            closed = self._closed
+        if closed or not reset:
+            self.logger.info(f"Discarding pooled environment {env.env_path}")
+            self._destroy(env)
+            self._refill()
+            return
+        self._ready.put(env)
+
+    def release(self, env: VirtualEnvironmentManager) -> None:
+        """
+        Returns a leased environment, it is reset in the background.
+
+        Args:
+            env (VirtualEnvironmentManager): The environment returned by ``lease``.
+
+        Raises:
+            ValueError: If the environment was not leased from this pool.
+        """
+        with self._lock:
+            if env.env_path not in self._leased:
+                raise ValueError(f"{env.env_path} was not leased from this pool")
+            self._leased.discard(env.env_path)
+            closed = self._closed
+        if closed:
+            self._destroy(env)
+        else:
+            self._background.submit(self._reset, env)
+
+    @contextmanager
+    def session(
+        self, timeout: Optional[float] = None
+    ) -> Iterator[VirtualEnvironmentManager]:
+        """
+        Leases an environment for the duration of a ``with`` block.
+
+        Args:
+            timeout (Optional[float]): The maximum number of seconds to wait for an
+                environment (default is None, wait forever).
+
+        Yields:
+            VirtualEnvironmentManager: An environment in its baseline state.
+        """
+        env = self.lease(timeout)
+        try:
+            yield env
+        finally:
+            self.release(env)
+
+    def close(self) -> None:
+        """
+        Stops refilling and removes the ready environments.
+
+        Leased environments are removed when they are released.
+        """
+        with self._lock:
+            self._closed = True
+        self._background.shutdown(wait=True)
+        while True:
+            try:
+                env = self._ready.get_nowait()
+            except queue.Empty:
+                break
+            self._destroy(env)
@@ -0,0 +1,104 @@
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+from ..constants import IMPORT_TO_DISTRIBUTION
+from ..environment_manager.distributions import InstalledDistributionIndex
+
+
+class ImportNameResolver:
+    """
+    Resolves top-level import names to the distributions to install.
+
+    An import name is resolved, in order, from the distributions installed in the
+    virtual environment (read from their ``top_level.txt`` or ``RECORD``), from
+    the in-memory mapping, from the mapping added with ``update``, from the bundled
+    ``IMPORT_TO_DISTRIBUTION`` table and finally to itself. Every lookup is a dictionary access.
+
+    Attributes:
+        index (Optional[InstalledDistributionIndex]): The index of the installed
+            distributions.
+        mapping_path (Optional[Path]): The JSON file the updated mapping is
+            persisted to.
+    """
+
+    def __init__(
+        self,
+        index: Optional[InstalledDistributionIndex] = None,
+        mapping_path: Optional[Union[Path, str]] = None,
+        mapping: Optional[Dict[str, str]] = None,
+    ) -> None:
+        """
+        Initializes the resolver, loading the persisted mapping if any.
+
+        Args:
+            index (Optional[InstalledDistributionIndex]): The index of the installed
+                distributions (default is None).
+            mapping_path (Optional[Union[Path, str]]): A JSON file holding an
+                import name to distribution mapping that extends the bundled one,
+                it is written by ``update`` (default is None, not persisted).
+            mapping (Optional[Dict[str, str]]): Import name to distribution mappings
+                overriding the persisted and bundled ones, kept in memory only
+                (default is None).
+        """
+        self.index = index
+        self.mapping_path = Path(mapping_path) if mapping_path is not None else None
+        self._mapping: Dict[str, str] = {}
+        self._overrides: Dict[str, str] = dict(mapping or {})
+        self._lock = threading.Lock()
+        if self.mapping_path is not None and self.mapping_path.exists():
+            with open(self.mapping_path, "r", encoding="utf-8") as file:
+                self._mapping.update(json.load(file))
+
+    def update(self, mapping: Dict[str, str]) -> None:
+        """
+        Adds import name to distribution mappings, overriding the bundled ones.
+
+        The mapping is persisted to ``mapping_path`` when it is set.
+
+        Args:
+            mapping (Dict[str, str]): The distributions keyed by import name.
+        """
+        with self._lock:
+            self._mapping.update(mapping)
+            if self.mapping_path is not None:
+                self.mapping_path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = self.mapping_path.with_suffix(f".{os.getpid()}.tmp")
+                with open(tmp_path, "w", encoding="utf-8") as file:
+                    json.dump(self._mapping, file, indent=2, sort_keys=True)
+                os.replace(tmp_path, self.mapping_path)
+
+    def resolve(self, import_name: str) -> str:
+        """
+        Returns the distribution providing an import name.
+
+        Args:
+            import_name (str): A top-level import name, e.g. "sklearn".
+
+        Returns:
+            str: The distribution name, e.g. "scikit-learn".
+        """
+        if self.index is not None:
+            providers = self.index.providers(import_name)
+            if providers:
+                return min(providers)
+        distribution = self._overrides.get(import_name)
+        if distribution is None:
+            distribution = self._mapping.get(import_name)
+        if distribution is None:
+            distribution = IMPORT_TO_DISTRIBUTION.get(import_name, import_name)
+        return distribution
+
+    def resolve_many(self, import_names: List[str]) -> List[str]:
+        """
+        Returns the distributions providing import names, without duplicates.
+
+        Args:
+            import_names (List[str]): The top-level import names.
+
+        Returns:
+            List[str]: The distribution names in the order of the import names.
+        """
+        return list(dict.fromkeys(self.resolve(name) for name in import_names))
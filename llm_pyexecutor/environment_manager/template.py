@@ -0,0 +1,300 @@
+import csv
+import json
+import os
+import shutil
+import subprocess
+import sys
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Union
+
+from ..environment_manager.exceptions import PipInstallationError
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+_MARKER = ".llm_pyexecutor_template.json"
+# The Linux ioctl sharing the extents of a file copy-on-write (btrfs, XFS, ...).
+_FICLONE = 0x40049409
+
+
+def _reflink(source: Path, destination: Path) -> bool:
+    """
+    Copies a file by sharing its blocks copy-on-write, where the file system can.
+
+    Returns:
+        bool: Whether the file was cloned, False if reflinks are not supported.
+    """
+    if fcntl is None or not sys.platform.startswith("linux"):
+        return False
+    try:
+        with open(source, "rb") as src, open(destination, "wb") as dst:
+            fcntl.ioctl(dst.fileno(), _FICLONE, src.fileno())
+    except OSError:
+        destination.unlink(missing_ok=True)
+        return False
+    shutil.copystat(source, destination)
+    return True
+
+
+class VenvTemplate:
+    """
+    A base virtual environment that new executor environments are cloned from.
+
+    The template is built once with pip and the configured packages. Cloning it
+    copies every file into the new environment and rewrites the files holding the
+    template path (the scripts of the bin directory, ``pyvenv.cfg`` and ``.pth``
+    files), no pip or ensurepip run is needed. On file systems supporting reflinks
+    the copies share their blocks with the template copy-on-write, so a clone is
+    ready in milliseconds. Elsewhere the package files recorded with a hash in the
+    ``RECORD`` of their distribution are hardlinked and made read-only, and the
+    other files are copied. Hardlinks are only used by users other than root, for
+    whom the missing write permission stops code from writing into an installed
+    file shared with the template and the other clones. The scripts and metadata
+    files of the environment are never hardlinked.
+
+    Attributes:
+        path (Path): The directory of the template environment.
+        packages (List[str]): The packages installed in the template.
+        with_pip (bool): Whether pip is installed in the template.
+        timeout (int): The maximum time to wait for the pip install.
+        logger: A logging object for logging messages.
+    """
+
+    def __init__(
+        self,
+        path: Union[Path, str],
+        packages: Optional[List[str]] = None,
+        with_pip: bool = True,
+        timeout: int = 600,
+        logger=None,
+    ) -> None:
+        """
+        Initializes the template, it is built on first use.
+
+        Args:
+            path (Union[Path, str]): The directory of the template environment.
+            packages (Optional[List[str]]): The packages installed in the template
+                (default is None, no packages).
+            with_pip (bool): Whether pip is installed in the template (default is True).
+            timeout (int): The timeout for the pip install (default is 600 seconds).
+            logger: A logger object for logging messages (default is None).
+        """
+        self.path = Path(path).absolute()
+        self.packages = sorted(packages or [])
+        self.with_pip = with_pip
+        self.timeout = timeout
+        self.logger = logger
+        self._lock = threading.Lock()
+
+    def _log(self, message: str) -> None:
+        """Logs an info message if a logger is configured."""
+        if self.logger is not None:
+            self.logger.info(message)
+
+    def _read_marker(self) -> Optional[dict]:
+        """Returns the description of the built template, if any."""
+        try:
+            with open(self.path / _MARKER, "r", encoding="utf-8") as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+    def _is_current(self, marker: Optional[dict]) -> bool:
+        """Checks whether the built template matches the configuration."""
+        return (
+            marker is not None
+            and marker.get("packages") == self.packages
+            and marker.get("with_pip") == self.with_pip
+        )
+
+    def _build(self, build_path: Path) -> None:
+        """Creates the template environment in the given directory."""
+        import venv
+
+        self._log(f"Building Virtual Environment Template at {self.path}")
+        env_builder = venv.EnvBuilder(with_pip=self.with_pip)
+        env_builder.create(build_path)
+        context = env_builder.ensure_directories(build_path)
+        if self.packages:
+            try:
+                result = subprocess.run(
+                    [context.env_exe, "-m", "pip", "install"] + self.packages,
+                    timeout=self.timeout,
+                    capture_output=True,
+                    encoding="utf-8",
+                )
+            except subprocess.TimeoutExpired:
+                raise TimeoutError("pip install timed out")
+            if result.returncode != 0:
+                raise PipInstallationError(err=result.stderr, out=result.stdout)
+        with open(build_path / _MARKER, "w", encoding="utf-8") as file:
+            json.dump(
+                {
+                    "prefix": str(build_path),
+                    "packages": self.packages,
+                    "with_pip": self.with_pip,
+                },
+                file,
+            )
+
+    def ensure(self) -> Path:
+        """
+        Builds the template unless an up to date one exists.
+
+        The template is built in a temporary directory next to ``path`` and moved
+        in place once complete, so a partially built template is never cloned and
+        concurrent builders do not clash.
+
+        Returns:
+            Path: The directory of the template environment.
+
+        Raises:
+            TimeoutError: If the pip install times out.
+            PipInstallationError: If the packages could not be installed.
+        """
+        with self._lock:
+            marker = self._read_marker()
+            if self._is_current(marker):
+                return self.path
+            if self.path.exists():
+                self._log("Virtual Environment Template is outdated, rebuilding")
+                shutil.rmtree(self.path, ignore_errors=True)
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            build_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+            shutil.rmtree(build_path, ignore_errors=True)
+            try:
+                self._build(build_path)
+                os.rename(build_path, self.path)
+            except OSError:
+                if not self._is_current(self._read_marker()):
+                    raise
+            finally:
+                shutil.rmtree(build_path, ignore_errors=True)
+            return self.path
+
+    def _linkable_files(self) -> Set[Path]:
+        """
+        Returns the template files that clones may hardlink.
+
+        Returns:
+            Set[Path]: The paths, relative to the template, of the package files
+            recorded with a hash in the ``RECORD`` of their distribution, empty for
+            root, who can write into read-only files, and where ``os.geteuid`` is
+            not available.
+        """
+        if not hasattr(os, "geteuid") or os.geteuid() == 0:
+            return set()
+        linkable = set()
+        for site_packages in self.path.glob("lib/python*/site-packages"):
+            for record in site_packages.glob("*.dist-info/RECORD"):
+                with open(record, "r", encoding="utf-8", newline="") as file:
+                    for row in csv.reader(file):
+                        if len(row) < 2 or "=" not in row[1]:
+                            continue
+                        path = Path(os.path.normpath(site_packages / row[0]))
+                        if site_packages not in path.parents:
+                            continue
+                        relative = path.relative_to(self.path)
+                        if not self._needs_rewrite(relative):
+                            linkable.add(relative)
+        return linkable
+
+    @staticmethod
+    def _hardlink(source: Path, destination: Path) -> bool:
+        """
+        Hardlinks a template file after removing its write permissions.
+
+        Returns:
+            bool: Whether the file was linked, False if hardlinks are not supported.
+        """
+        mode = source.stat().st_mode
+        try:
+            if mode & 0o222:
+                os.chmod(source, mode & ~0o222)
+            os.link(source, destination)
+        except OSError:
+            return False
+        return True
+
+    @staticmethod
+    def _needs_rewrite(relative: Path) -> bool:
+        """Checks whether a template file may hold the template path."""
+        return (
+            relative.parts[0] in ("bin", "Scripts")
+            or relative.name == "pyvenv.cfg"
+            or relative.suffix == ".pth"
+        )
+
+    def clone(self, target: Union[Path, str]) -> Path:
+        """
+        Creates a new virtual environment from the template.
+
+        Args:
+            target (Union[Path, str]): The directory of the new environment, it must
+                not exist.
+
+        Returns:
+            Path: The directory of the new environment.
+
+        Raises:
+            FileExistsError: If the target directory already exists.
+        """
+        self.ensure()
+        target = Path(target).absolute()
+        if target.exists():
+            raise FileExistsError(f"{target} already exists")
+        prefix = self._read_marker()["prefix"].encode("utf-8")
+        replacement = str(target).encode("utf-8")
+        staging = target.with_name(f"{target.name}.{os.getpid()}.tmp")
+        shutil.rmtree(staging, ignore_errors=True)
+        linkable = self._linkable_files()
+        strategies: Dict[str, int] = {"reflinked": 0, "hardlinked": 0, "copied": 0}
+        reflink = True
+        hardlink = len(linkable) > 0
+        try:
+            for root, dirs, files in os.walk(self.path):
+                relative_root = Path(root).relative_to(self.path)
+                (staging / relative_root).mkdir(parents=True, exist_ok=True)
+                for name in dirs:
+                    source = Path(root) / name
+                    if source.is_symlink():
+                        os.symlink(os.readlink(source), staging / relative_root / name)
+                dirs[:] = [
+                    name for name in dirs if not (Path(root) / name).is_symlink()
+                ]
+                for name in files:
+                    if relative_root == Path(".") and name == _MARKER:
+                        continue
+                    source = Path(root) / name
+                    destination = staging / relative_root / name
+                    if source.is_symlink():
+                        os.symlink(os.readlink(source), destination)
+                        continue
+                    if self._needs_rewrite(relative_root / name):
+                        content = source.read_bytes()
+                        if prefix in content:
+                            destination.write_bytes(
+                                content.replace(prefix, replacement)
+                            )
+                            shutil.copymode(source, destination)
+                            continue
+                    if reflink and _reflink(source, destination):
+                        strategies["reflinked"] += 1
+                        continue
+                    reflink = False
+                    if hardlink and relative_root / name in linkable:
+                        if self._hardlink(source, destination):
+                            strategies["hardlinked"] += 1
+                            continue
+                        hardlink = False
+                    shutil.copy2(source, destination)
+                    strategies["copied"] += 1
+            os.rename(staging, target)
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+        summary = ", ".join(f"{count} {name}" for name, count in strategies.items())
+        self._log(f"Cloned Virtual Environment Template into {target} ({summary})")
+        return target
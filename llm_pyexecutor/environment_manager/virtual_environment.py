@@ -1,10 +1,50 @@
+import hashlib
+import os
 import subprocess
+import sys
+import threading
 from pathlib import Path
-from typing import Union, List, Any
+from typing import TYPE_CHECKING, Union, List, Any, Optional
 from types import SimpleNamespace
+from ..environment_manager.distributions import InstalledDistributionIndex
 from ..environment_manager.exceptions import PipInstallationError
-import venv
-import re
+from ..environment_manager.template import VenvTemplate
+from ..environment_manager.wheelhouse import Wheelhouse
+from ..process import kill_async_process
+
+if TYPE_CHECKING:
+    import asyncio
+
+
+def interpreter_fingerprint(venv_executor: str) -> List[Union[str, int]]:
+    """
+    Builds the fingerprint of an interpreter from its real path, version and mtime.
+
+    The version is read from the ``pyvenv.cfg`` of the virtual environment the
+    interpreter belongs to, so no subprocess is needed. The standard library module
+    cache and the result cache both key on it.
+
+    Args:
+        venv_executor (str): The path to the Python interpreter in the virtual environment.
+
+    Returns:
+        List[Union[str, int]]: The interpreter path, version and mtime in nanoseconds.
+    """
+    real_path = os.path.realpath(venv_executor)
+    version = ""
+    venv_config = Path(venv_executor).absolute().parent.parent / "pyvenv.cfg"
+    if venv_config.exists():
+        with open(venv_config, "r", encoding="utf-8") as file:
+            for line in file:
+                key, _, value = line.partition("=")
+                if key.strip() in ("version", "version_info"):
+                    version = value.strip()
+                    break
+    return [
+        str(Path(venv_executor).absolute()),
+        version,
+        os.stat(real_path).st_mtime_ns,
+    ]
 
 
 class VirtualEnvironmentManager:
@@ -18,7 +58,12 @@ class VirtualEnvironmentManager:
         env_path (Path): The full path to the virtual environment.
         timeout (int): The maximum time to wait for subprocess calls.
         logger: A logging object for logging messages.
+        template (Optional[VenvTemplate]): The template new environments are cloned from.
+        wheelhouse (Optional[Wheelhouse]): The local wheels dependencies are installed from.
+        offline (bool): Whether dependencies are installed from the wheelhouse only.
         _executor_venv (SimpleNamespace): An object representing the virtual environment.
+        _distributions (InstalledDistributionIndex): An index of the distributions
+            installed in the virtual environment.
     """
 
     def __init__(
@@ -27,6 +72,9 @@ class VirtualEnvironmentManager:
         base_dir: Union[Path, str],
         logger,
         timeout: int = 200,
+        template: Optional[VenvTemplate] = None,
+        wheelhouse: Optional[Wheelhouse] = None,
+        offline: bool = False,
     ) -> None:
         """
         Initializes the VirtualEnvironmentManager with the specified environment name and base directory.
@@ -36,10 +84,18 @@ class VirtualEnvironmentManager:
             base_dir (Union[Path, str]): The base directory for the virtual environment.
             timeout (int): The timeout for subprocess calls (default is 200 seconds).
             logger: A logger object for logging messages.
+            template (Optional[VenvTemplate]): A template the environment is cloned
+                from when it does not exist yet, instead of running ensurepip
+                (default is None).
+            wheelhouse (Optional[Wheelhouse]): A local wheelhouse pip looks for wheels
+                in before the package index (default is None).
+            offline (bool): Whether the package index is disabled so dependencies
+                are resolved from the wheelhouse only (default is False).
 
         Raises:
             ValueError: If env_name or base_dir is not a string or Path object.
             ValueError: If timeout is less than 1.
+            ValueError: If offline is set without a wheelhouse.
         """
         if isinstance(env_name, str):
             self.env_name = Path(env_name)
@@ -55,24 +111,35 @@ class VirtualEnvironmentManager:
         else:
             raise ValueError("base_dir must be a string or a Path object")
 
-        self.env_path = self.base_dir / self.env_name
+        self.env_path = (self.base_dir / self.env_name).absolute()
 
         if timeout < 1:
             raise ValueError("Timeout must be greater than 0")
         self.timeout = timeout
         self.logger = logger
+        self.template = template
+        if offline and wheelhouse is None:
+            raise ValueError("offline installation requires a wheelhouse")
+        self.wheelhouse = wheelhouse
+        self.offline = offline
 
         self._executor_venv = self._setup_environment()
+        self._distributions = InstalledDistributionIndex(self.get_site_packages())
+        self._install_lock = threading.Lock()
+        self._async_install_lock = None
 
     def _setup_environment(self) -> SimpleNamespace:
         """
-        Sets up the virtual environment by creating it if it does not exist.
+        Sets up the virtual environment by creating it if it does not exist, cloning
+        the template when one is configured.
 
         Returns:
             SimpleNamespace: An object containing the environment executable path.
 
         Logs messages about the creation of the environment and whether it already exists.
         """
+        import venv
+
         self.logger.info("Creating Executor Virtual Environment")
         env_args = {"with_pip": True}
         env_builder = venv.EnvBuilder(**env_args)
@@ -80,6 +147,9 @@ class VirtualEnvironmentManager:
         if self.env_path.exists():
             self.logger.info("Found Existing Environment")
             return env_builder.ensure_directories(self.env_path)
+        elif self.template is not None:
+            self.template.clone(self.env_path)
+            return env_builder.ensure_directories(self.env_path)
         else:
             env_builder.create(self.env_path)
             return env_builder.ensure_directories(self.env_path)
@@ -88,6 +158,9 @@ class VirtualEnvironmentManager:
         """
         Installs additional dependencies using pip in the virtual environment.
 
+        Installs into the same environment are serialized, dependencies that were
+        installed while waiting for another installation are skipped.
+
         Args:
             deps (List[str]): A list of dependency names to install.
             wd : str
@@ -97,34 +170,141 @@ class VirtualEnvironmentManager:
             TimeoutError: If the pip install command times out.
             PipInstallationError: If the installation fails for any reason.
         """
+        with self._install_lock:
+            deps = self._distributions.missing(deps)
+            if len(deps) == 0:
+                return
+            self._install(deps, wd)
+
+    def _pip_install_command(self, deps: List[str]) -> List[str]:
+        """Returns the pip command installing the given dependencies."""
+        cmd = [self._executor_venv.env_exe, "-m", "pip", "install"]
+        if self.wheelhouse is not None:
+            cmd += self.wheelhouse.install_options(offline=self.offline)
+        return cmd + deps
+
+    def _installation_error(
+        self, deps: List[str], stderr: str, stdout: str
+    ) -> PipInstallationError:
+        """Logs a failed installation and returns the error to raise."""
+        self.logger.error("Error Occurred during installation due to:" f"{stderr}")
+        if self.offline:
+            missing = self.wheelhouse.missing(deps)
+            if missing:
+                stderr = f"No wheels of {missing} in {self.wheelhouse.path}\n{stderr}"
+        return PipInstallationError(err=stderr, out=stdout)
+
+    def _install(self, deps: List[str], wd: str) -> None:
+        """Runs pip install for the given dependencies."""
         self.logger.info(f"install additional dependencies {deps} using pip")
-        cmd = [self._executor_venv.env_exe, "-m", "pip", "install"] + deps
         try:
             result = subprocess.run(
-                cmd,
-                check=True,
+                self._pip_install_command(deps),
                 cwd=wd,
                 timeout=self.timeout,
                 capture_output=True,
                 encoding="utf-8",
             )
-            self.logger.info("dependencies successfully installed!!")
-        except subprocess.CalledProcessError:
-            self.logger.error(
-                "Error Occurred during installation, please check your Internet connection"
-            )
-            raise PipInstallationError(
-                err="Check Your Internet Connection",
-                out=f"pip failed to install: {deps}",
-            )
         except subprocess.TimeoutExpired:
             self.logger.error("pip install timed out")
             raise TimeoutError("pip install timed out")
         if result.returncode != 0:
-            self.logger.error(
-                "Error Occurred during installation due to:" f"{result.stderr}"
+            raise self._installation_error(deps, result.stderr, result.stdout)
+        self.logger.info("dependencies successfully installed!!")
+        self._distributions.refresh()
+
+    def _get_async_install_lock(self) -> "asyncio.Lock":
+        """
+        Returns the lock queueing the ``ainstall_additional_dependencies`` calls of the
+        running loop.
+
+        Returns:
+            asyncio.Lock: The lock bound to the running event loop.
+        """
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        if self._async_install_lock is None or self._async_install_lock[0] is not loop:
+            self._async_install_lock = (loop, asyncio.Lock())
+        return self._async_install_lock[1]
+
+    async def _acquire_install_lock(self) -> None:
+        """
+        Acquires the install lock shared with the synchronous installs.
+
+        The lock is acquired on a thread of the default executor, so the loop is not
+        blocked while another thread installs. If the calling task is cancelled
+        meanwhile, the lock is released as soon as the thread acquires it.
+        """
+        import asyncio
+
+        acquire = asyncio.get_running_loop().run_in_executor(
+            None, self._install_lock.acquire
+        )
+        try:
+            await asyncio.shield(acquire)
+        except asyncio.CancelledError:
+            acquire.add_done_callback(lambda _: self._install_lock.release())
+            raise
+
+    async def ainstall_additional_dependencies(self, deps: List[str], wd: str = "."):
+        """
+        Asynchronous version of ``install_additional_dependencies``.
+
+        pip runs in a subprocess started with ``asyncio.create_subprocess_exec``, the
+        child is killed if the calling task is cancelled or the timeout expires.
+        Installs started on the same loop wait in FIFO order on an ``asyncio.Lock``,
+        so at most one of them waits on a thread for the installs of other threads.
+
+        Args:
+            deps (List[str]): A list of dependency names to install.
+            wd : str
+                working directory default to current working directory.
+
+        Raises:
+            TimeoutError: If the pip install command times out.
+            PipInstallationError: If the installation fails for any reason.
+        """
+        async with self._get_async_install_lock():
+            await self._acquire_install_lock()
+            try:
+                await self._ainstall(deps, wd)
+            finally:
+                self._install_lock.release()
+
+    async def _ainstall(self, deps: List[str], wd: str) -> None:
+        """Runs pip install for the missing dependencies, with the install lock held."""
+        import asyncio
+
+        deps = self._distributions.missing(deps)
+        if len(deps) == 0:
+            return
+        self.logger.info(f"install additional dependencies {deps} using pip")
+        process = await asyncio.create_subprocess_exec(
+            *self._pip_install_command(deps),
+            cwd=wd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        try:
+            stdout, stderr = await asyncio.wait_for(
+                process.communicate(), timeout=self.timeout
             )
-            raise PipInstallationError(err=result.stderr, out=result.stdout)
+        except asyncio.TimeoutError:
+            await kill_async_process(process)
+            self.logger.error("pip install timed out")
+            raise TimeoutError("pip install timed out")
+        except asyncio.CancelledError:
+            await kill_async_process(process)
+            raise
+        if process.returncode != 0:
+            raise self._installation_error(
+                deps,
+                stderr.decode("utf-8", errors="replace"),
+                stdout.decode("utf-8", errors="replace"),
+            )
+        self.logger.info("dependencies successfully installed!!")
+        self._distributions.refresh()
 
     def get_pyexecutor(self) -> str:
         """
@@ -135,55 +315,66 @@ class VirtualEnvironmentManager:
         """
         return self._executor_venv.env_exe
 
+    def get_site_packages(self) -> Path:
+        """
+        Returns the site-packages directory of the virtual environment.
+
+        Returns:
+            Path: The path to the site-packages directory.
+        """
+        if sys.platform == "win32":
+            return self.env_path / "Lib" / "site-packages"
+        candidates = sorted(self.env_path.glob("lib/python*/site-packages"))
+        if candidates:
+            return candidates[0]
+        version = f"python{sys.version_info.major}.{sys.version_info.minor}"
+        return self.env_path / "lib" / version / "site-packages"
+
+    def get_installed_distributions(self) -> InstalledDistributionIndex:
+        """
+        Returns the index of the distributions installed in the virtual environment.
+
+        Returns:
+            InstalledDistributionIndex: The installed distribution index.
+        """
+        return self._distributions
+
+    def fingerprint(self) -> str:
+        """
+        Returns a fingerprint of the interpreter and installed distributions.
+
+        Returns:
+            str: A SHA-256 hex digest that changes when the interpreter, its version
+            or any installed distribution changes.
+        """
+        digest = hashlib.sha256()
+        for part in interpreter_fingerprint(self.get_pyexecutor()):
+            digest.update(f"{part}\0".encode("utf-8"))
+        digest.update(self._distributions.fingerprint().encode("utf-8"))
+        return digest.hexdigest()
+
     def check_additional_dependencies(
         self, deps: List[str], wd: str = "."
     ) -> List[Any]:
         """
         Checks if additional dependencies are installed in the virtual environment.
 
+        The check is answered by the installed distribution index, which reads the
+        site-packages metadata directly, so no pip process is started. A dependency
+        is considered installed if a distribution with the same name, or one that
+        provides a top-level module with that name, is installed.
+
         Args:
             deps (List[str]): A list of dependency names to check.
             wd : str
-                working directory default to current working directory.
+                working directory default to current working directory, kept for
+                backward compatibility.
 
         Returns:
             List[Any]: A list of uninstalled dependencies.
-
-        Raises:
-            TimeoutError: If the pip show command times out
-            PipInstallationError: If the checking fails for any reason.
         """
         self.logger.info(f"Checking additional dependencies: {deps}")
-        uninstalled_deps = []
-        try:
-            cmd = [self._executor_venv.env_exe, "-m", "pip", "show"] + deps
-            result = subprocess.run(
-                cmd,
-                check=True,
-                cwd=wd,
-                timeout=self.timeout,
-                encoding="utf-8",
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-            )
-            if len(result.stderr) > 0:
-                pkgs = result.stderr.split(":")[-1].split(",")
-                pkgs = [ele.strip().replace("\n", "") for ele in pkgs]
-                # Regular expression to match ANSI escape codes
-                ansi_escape = re.compile(r"\x1B[@-_][0-?]*[ -/]*[@-~]")
-                # Remove ANSI escape codes
-                pkgs = [ansi_escape.sub("", ele) for ele in pkgs]
-                uninstalled_deps.extend(pkgs)
-                self.logger.info(f"Found Uninstalled dependencies: {uninstalled_deps}")
-            return uninstalled_deps
-        except subprocess.CalledProcessError:
-            return deps
-        except subprocess.TimeoutExpired:
-            self.logger.error("pip install timed out")
-            raise TimeoutError("pip install timed out")
-        if result.returncode != 0:
-            self.logger.error(
-                "Error Occurred during checking due to:" f"{result.stderr}"
-            )
-            raise PipInstallationError(err=result.stderr, out=result.stdout)
+        uninstalled_deps = self._distributions.missing(deps)
+        if len(uninstalled_deps) > 0:
+            self.logger.info(f"Found Uninstalled dependencies: {uninstalled_deps}")
+        return uninstalled_deps
@@ -0,0 +1,165 @@
+import shutil
+import subprocess
+from pathlib import Path
+from typing import Dict, List, Union
+
+from ..environment_manager.distributions import (
+    normalize_distribution_name,
+    requirement_name,
+)
+from ..environment_manager.exceptions import PipInstallationError
+
+
+class Wheelhouse:
+    """
+    A local directory of wheels that dependencies are installed from.
+
+    Wheels are prefetched once with ``pip wheel``, which downloads the wheels of
+    the packages and their dependencies or builds them from source distributions.
+    Installs can then prefer the wheelhouse (``--find-links``) or resolve from it
+    only (``--no-index --find-links``), in which case no network access is needed
+    and an install is a local file copy.
+
+    Attributes:
+        path (Path): The directory holding the wheels.
+        timeout (int): The maximum time to wait for ``pip wheel``.
+        logger: A logging object for logging messages.
+    """
+
+    def __init__(self, path: Union[Path, str], logger=None, timeout: int = 600) -> None:
+        """
+        Initializes the wheelhouse, creating its directory if needed.
+
+        Args:
+            path (Union[Path, str]): The directory holding the wheels.
+            logger: A logger object for logging messages (default is None).
+            timeout (int): The timeout for ``pip wheel`` (default is 600 seconds).
+        """
+        self.path = Path(path).absolute()
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.logger = logger
+        self.timeout = timeout
+
+    def wheels(self) -> Dict[str, List[Path]]:
+        """
+        Returns the wheels of the wheelhouse.
+
+        Returns:
+            Dict[str, List[Path]]: The wheel files keyed by normalized distribution
+            name.
+        """
+        wheels: Dict[str, List[Path]] = {}
+        for wheel in sorted(self.path.glob("*.whl")):
+            name = normalize_distribution_name(wheel.name.split("-")[0])
+            wheels.setdefault(name, []).append(wheel)
+        return wheels
+
+    def has(self, requirement: str) -> bool:
+        """
+        Checks whether the wheelhouse holds a wheel of a requirement.
+
+        Args:
+            requirement (str): A requirement such as "pandas>=2.0".
+
+        Returns:
+            bool: True if a wheel of the distribution is present, whatever its version.
+        """
+        return normalize_distribution_name(requirement_name(requirement)) in (
+            self.wheels()
+        )
+
+    def missing(self, requirements: List[str]) -> List[str]:
+        """
+        Returns the requirements without a wheel in the wheelhouse.
+
+        Args:
+            requirements (List[str]): The requirements to check.
+
+        Returns:
+            List[str]: The requirements that have no wheel.
+        """
+        wheels = self.wheels()
+        return [
+            requirement
+            for requirement in requirements
+            if normalize_distribution_name(requirement_name(requirement)) not in wheels
+        ]
+
+    def add(self, wheel: Union[Path, str]) -> Path:
+        """
+        Copies a wheel file into the wheelhouse, e.g. on an air-gapped node.
+
+        Args:
+            wheel (Union[Path, str]): The path of the wheel file.
+
+        Returns:
+            Path: The path of the wheel in the wheelhouse.
+
+        Raises:
+            ValueError: If the file is not a wheel.
+        """
+        wheel = Path(wheel)
+        if wheel.suffix != ".whl":
+            raise ValueError(f"{wheel} is not a wheel file")
+        destination = self.path / wheel.name
+        if wheel.absolute() != destination:
+            shutil.copy2(wheel, destination)
+        return destination
+
+    def prefetch(self, packages: List[str], venv_executor: str) -> List[str]:
+        """
+        Downloads or builds the wheels of packages and their dependencies.
+
+        Packages that already have a wheel are skipped, the wheelhouse itself is
+        searched first so only missing wheels are fetched.
+
+        Args:
+            packages (List[str]): The requirements to prefetch.
+            venv_executor (str): The interpreter of the virtual environment the
+                wheels are built for.
+
+        Returns:
+            List[str]: The requirements that were fetched.
+
+        Raises:
+            TimeoutError: If ``pip wheel`` times out.
+            PipInstallationError: If ``pip wheel`` fails.
+        """
+        packages = self.missing(packages)
+        if len(packages) == 0:
+            return []
+        if self.logger is not None:
+            self.logger.info(f"prefetching wheels of {packages}")
+        cmd = [
+            venv_executor,
+            "-m",
+            "pip",
+            "wheel",
+            "--wheel-dir",
+            str(self.path),
+            "--find-links",
+            str(self.path),
+        ] + packages
+        try:
+            result = subprocess.run(
+                cmd, timeout=self.timeout, capture_output=True, encoding="utf-8"
+            )
+        except subprocess.TimeoutExpired:
+            raise TimeoutError("pip wheel timed out")
+        if result.returncode != 0:
+            raise PipInstallationError(err=result.stderr, out=result.stdout)
+        return packages
+
+    def install_options(self, offline: bool = False) -> List[str]:
+        """
+        Returns the pip install options resolving from the wheelhouse.
+
+        Args:
+            offline (bool): Whether the package index is disabled, so packages are
+                resolved from the wheelhouse only (default is False).
+
+        Returns:
+            List[str]: The pip install options.
+        """
+        options = ["--find-links", str(self.path)]
+        return ["--no-index"] + options if offline else options
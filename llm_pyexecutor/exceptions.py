@@ -0,0 +1,44 @@
+"""Module for Custom Exceptions
+
+This module defines custom exceptions for handling errors related to
+scheduling code executions and to the execution server.
+"""
+
+
+class SchedulerFullError(Exception):
+    """Exception raised when an execution is rejected by a full scheduler queue.
+
+    Attributes:
+        max_queue (int): The number of executions the queue holds.
+    """
+
+    def __init__(self, max_queue: int) -> None:
+        """Initializes the SchedulerFullError with the size of the full queue.
+
+        Args:
+            max_queue (int): The number of executions the queue holds.
+        """
+        self.max_queue = max_queue
+        super().__init__(
+            f"Execution rejected, the scheduler queue is full ({max_queue} queued)"
+        )
+
+
+class ExecutorServerError(Exception):
+    """Exception raised when the execution server answers a request with an error.
+
+    Attributes:
+        status (int): The HTTP status of the response.
+        msg (str): The error message sent by the server.
+    """
+
+    def __init__(self, status: int, msg: str) -> None:
+        """Initializes the ExecutorServerError with the status and message.
+
+        Args:
+            status (int): The HTTP status of the response.
+            msg (str): The error message sent by the server.
+        """
+        self.status = status
+        self.msg = msg
+        super().__init__(f"Execution server error {status}: {msg}")
@@ -0,0 +1,202 @@
+import re
+from typing import Iterable, List, NamedTuple, Optional, Union
+
+PYTHON_LANGUAGES = frozenset({"python", "py", "python3", "py3"})
+SHELL_LANGUAGES = frozenset(
+    {"shell", "sh", "bash", "zsh", "powershell", "ps1", "pwsh", "cmd", "bat"}
+)
+OUTPUT_LANGUAGES = frozenset({"", "output", "text", "txt", "plaintext"})
+
+_LANGUAGE_TAG = re.compile(r"[\w+#.-]*")
+
+
+class FencedBlock(NamedTuple):
+    """
+    A fenced block found in an LLM response.
+
+    Attributes:
+        kind (str): The block type, "python", "shell", "output" (untagged or plain
+            text blocks) or "other".
+        language (str): The language tag following the opening fence.
+        content (str): The text between the language tag and the closing fence.
+        start (int): The offset of the opening fence in the response.
+        end (int): The offset right after the closing fence, or the end of the
+            response for an unterminated block.
+        closed (bool): Whether the block has a closing fence.
+    """
+
+    kind: str
+    language: str
+    content: str
+    start: int
+    end: int
+    closed: bool = True
+
+
+def block_kind(language: str) -> str:
+    """
+    Returns the block type of a language tag.
+
+    Args:
+        language (str): The language tag of a fenced block.
+
+    Returns:
+        str: "python", "shell", "output" or "other".
+    """
+    language = language.lower()
+    if language in PYTHON_LANGUAGES:
+        return "python"
+    if language in SHELL_LANGUAGES:
+        return "shell"
+    if language in OUTPUT_LANGUAGES:
+        return "output"
+    return "other"
+
+
+def dedup_lines(text: str) -> str:
+    """
+    Removes duplicate lines, keeping the first occurrence of each line, in linear time.
+
+    Args:
+        text (str): The input text.
+
+    Returns:
+        str: The unique lines, each terminated by a newline.
+    """
+    return "".join(line + "\n" for line in dict.fromkeys(text.split("\n")))
+
+
+class FencedBlockParser:
+    """
+    A single-pass tokenizer splitting an LLM response into fenced blocks.
+
+    The response can be fed in chunks as it is streamed, every call to ``feed``
+    returns the blocks completed by the chunk. Every character is scanned once:
+    the text of the block being read is kept as a list of chunks joined once when
+    the block closes, prose between blocks is dropped as soon as it is scanned,
+    and only the end of a chunk that may be the start of a fence is carried over
+    to the next one.
+
+    Attributes:
+        separator (str): The fence delimiting the blocks.
+    """
+
+    def __init__(self, separator: str = "```") -> None:
+        """
+        Initializes the parser.
+
+        Args:
+            separator (str): The fence delimiting the blocks (default is "```").
+
+        Raises:
+            ValueError: If the separator is empty.
+        """
+        if not separator:
+            raise ValueError("separator must not be empty")
+        self.separator = separator
+        self._tail = ""
+        self._offset = 0
+        self._parts: List[str] = []
+        self._open: Optional[int] = None
+
+    def _make_block(
+        self, segment: str, start: int, end: int, closed: bool
+    ) -> FencedBlock:
+        """Builds the block of the text found between two fences."""
+        language = _LANGUAGE_TAG.match(segment).group()
+        return FencedBlock(
+            kind=block_kind(language),
+            language=language,
+            content=segment[len(language) :],
+            start=start,
+            end=end,
+            closed=closed,
+        )
+
+    def feed(self, chunk: str) -> List[FencedBlock]:
+        """
+        Feeds the next chunk of the response.
+
+        Args:
+            chunk (str): The next part of the response.
+
+        Returns:
+            List[FencedBlock]: The blocks closed by the chunk, in order.
+        """
+        text = self._tail + chunk
+        width = len(self.separator)
+        blocks = []
+        position = 0
+        while True:
+            index = text.find(self.separator, position)
+            if index == -1:
+                break
+            if self._open is None:
+                self._open = self._offset + index
+            else:
+                self._parts.append(text[position:index])
+                blocks.append(
+                    self._make_block(
+                        "".join(self._parts),
+                        self._open,
+                        self._offset + index + width,
+                        closed=True,
+                    )
+                )
+                self._parts = []
+                self._open = None
+            position = index + width
+        keep = max(len(text) - width + 1, position)
+        if self._open is not None and keep > position:
+            self._parts.append(text[position:keep])
+        self._tail = text[keep:]
+        self._offset += keep
+        return blocks
+
+    def close(self) -> List[FencedBlock]:
+        """
+        Ends the response, returning the unterminated block if any.
+
+        The parser is reset and can be used for another response.
+
+        Returns:
+            List[FencedBlock]: The unterminated last block, or an empty list.
+        """
+        blocks = []
+        if self._open is not None:
+            self._parts.append(self._tail)
+            blocks.append(
+                self._make_block(
+                    "".join(self._parts),
+                    self._open,
+                    self._offset + len(self._tail),
+                    closed=False,
+                )
+            )
+        self._tail = ""
+        self._offset = 0
+        self._parts = []
+        self._open = None
+        return blocks
+
+
+def parse_fenced_blocks(
+    text: Union[str, Iterable[str]], separator: str = "```"
+) -> List[FencedBlock]:
+    """
+    Splits a response, given as a string or as chunks, into fenced blocks.
+
+    Args:
+        text (Union[str, Iterable[str]]): The response or its chunks.
+        separator (str): The fence delimiting the blocks (default is "```").
+
+    Returns:
+        List[FencedBlock]: The blocks of the response in order.
+    """
+    parser = FencedBlockParser(separator)
+    chunks = [text] if isinstance(text, str) else text
+    blocks = []
+    for chunk in chunks:
+        blocks.extend(parser.feed(chunk))
+    blocks.extend(parser.close())
+    return blocks
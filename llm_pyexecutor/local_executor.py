@@ -1,18 +1,78 @@
 import os
+import threading
 import traceback
+import weakref
 from pathlib import Path
-from typing import Optional
-
-from llm_pyexecutor.cli import PipCommandsExtrator
-from llm_pyexecutor.code import (
-    PythonCodeExecutor,
-    PythonCodeExtractor,
-    extract_dependecies,
-    is_standard_package,
-)
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from llm_pyexecutor.code.exceptions import CodeExecutionError
 from llm_pyexecutor.constants import STANDARD_PKG_SCRIPT
-from llm_pyexecutor.environment_manager import VirtualEnvironmentManager
-from llm_pyexecutor.logger import ExecutorLogger
+
+# The components are imported by their factories and the methods using them, so
+# importing the executor does not import the workers, caches and environments.
+if TYPE_CHECKING:
+    import asyncio
+
+    from llm_pyexecutor.cli import PipCommandsExtrator
+    from llm_pyexecutor.code import (
+        CodeRunResult,
+        CodeUnit,
+        ExecutionResultCache,
+        OutputChunk,
+        PythonCodeExecutor,
+        PythonCodeExtractor,
+        PythonWorkerPool,
+        PythonZygote,
+        ResourceLimits,
+        ScratchDirectory,
+    )
+    from llm_pyexecutor.environment_manager import (
+        ImportNameResolver,
+        VenvTemplate,
+        VirtualEnvironmentManager,
+        Wheelhouse,
+    )
+    from llm_pyexecutor.logger import ExecutorLogger
+    from llm_pyexecutor.result import ExecutionResult
+    from llm_pyexecutor.session import ExecutionSession
+
+
+# The components every execution uses, created by ``warmup`` or the first execution.
+_EXECUTION_COMPONENTS = (
+    "_logger",
+    "_code_extractor",
+    "_pip_extractor",
+    "_executor_venv",
+    "_import_resolver",
+    "_code_executor",
+    "_result_cache",
+)
+
+
+class _component:
+    """
+    A component of the executor that is created on first access.
+
+    The factory runs under the executor's initialization lock and its result is
+    stored in the instance ``__dict__``, which takes precedence over this non-data
+    descriptor, so later accesses are plain attribute lookups. Assigning the
+    attribute in ``__init__`` provides the component up front.
+    """
+
+    def __init__(self, factory: Callable[[Any], Any]) -> None:
+        self.factory = factory
+        self.__doc__ = factory.__doc__
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        self.name = name
+
+    def __get__(self, instance: Any, owner: Optional[type] = None) -> Any:
+        if instance is None:
+            return self
+        with instance._init_lock:
+            if self.name not in instance.__dict__:
+                instance.__dict__[self.name] = self.factory(instance)
+            return instance.__dict__[self.name]
 
 
 class LLMPythonCodeExecutor:
@@ -26,14 +86,124 @@ class LLMPythonCodeExecutor:
         executor_dir_path: Optional[str] = ".",
         write_logs: Optional[bool] = True,
         venv_name: str = ".venv",
+        worker_pool_size: int = 0,
+        worker_max_tasks: int = 100,
+        worker_max_rss_mb: Optional[int] = None,
+        max_concurrency: Optional[int] = None,
+        preload_modules: Optional[List[str]] = None,
+        cache_size: int = 0,
+        cache_ttl: Optional[float] = None,
+        cache_on_disk: bool = False,
+        max_output_bytes: Optional[int] = None,
+        output_limit_policy: str = "truncate",
+        resource_limits: "Optional[ResourceLimits]" = None,
+        venv_template: "Optional[VenvTemplate]" = None,
+        venv_manager: "Optional[VirtualEnvironmentManager]" = None,
+        use_wheelhouse: bool = False,
+        offline_install: bool = False,
+        import_name_mapping: Optional[Dict[str, str]] = None,
+        normalize_code: bool = True,
+        install_optional_imports: bool = False,
+        log_level: str = "INFO",
+        json_logs: bool = True,
+        log_to_console: bool = False,
+        max_log_payload_chars: Optional[int] = 4096,
+        log_truncation_policy: str = "head_tail",
+        spill_output_bytes: Optional[int] = None,
+        scratch_dirs: bool = False,
+        scratch_root: Optional[str] = None,
+        capture_artifacts: bool = True,
     ) -> None:
         """
         A class to execute Python code generated by a language model (LLM) in a controlled environment.
 
+        Construction only validates the options and creates the executor directory,
+        the logger, extractors, virtual environment, workers and caches are created
+        on first use. Call ``warmup``, or ``awarmup`` from an event loop, to create
+        them ahead of the first execution.
+
         Attributes:
             name (str): The name of the executor.
             executor_dir_path (Path): The directory path where the executor will operate.
             venv_name (str): The name of the virtual environment to be created.
+            worker_pool_size (int): The number of warm interpreter workers used to execute
+                code, 0 disables the pool and starts a new subprocess per execution.
+            worker_max_tasks (int): The number of executions after which a worker is replaced.
+            worker_max_rss_mb (Optional[int]): The peak RSS in megabytes after which a worker
+                is replaced.
+            max_concurrency (Optional[int]): The maximum number of concurrent ``aexecute``
+                calls, defaults to the number of CPUs.
+            preload_modules (Optional[List[str]]): Modules imported once by a zygote process
+                that forks a child per execution, so the imports are warm. The zygote is
+                restarted when the installed packages change. POSIX only.
+            cache_size (int): The number of execution results kept in the result cache,
+                0 disables the cache. Results are keyed by the cleaned code and the
+                virtual environment fingerprint, a hit skips dependency checks and the run.
+            cache_ttl (Optional[float]): The number of seconds a cached result stays valid.
+            cache_on_disk (bool): Whether cached results are also stored under the
+                executor directory.
+            max_output_bytes (Optional[int]): The maximum number of output bytes yielded by
+                ``execute_stream``.
+            output_limit_policy (str): What ``execute_stream`` does when the output limit
+                is reached, "truncate" drops further output and kills the process if it
+                keeps writing, "kill" kills the process at once.
+            resource_limits (Optional[ResourceLimits]): CPU time, memory, open files and
+                process limits applied to every execution, POSIX only. Workers of the
+                pool skip the CPU time limit since it would add up over executions.
+            venv_template (Optional[VenvTemplate]): A template virtual environment that
+                is copied when the executor environment does not exist yet, which is
+                much faster than creating it with ensurepip.
+            venv_manager (Optional[VirtualEnvironmentManager]): An existing environment
+                to execute code in instead of the executor's own one, e.g. one leased
+                from a ``VirtualEnvironmentPool`` for an isolated session.
+            use_wheelhouse (bool): Whether dependencies are looked up in a wheelhouse
+                under the executor directory before the package index, wheels are
+                added to it with ``prefetch``.
+            offline_install (bool): Whether dependencies are installed from the
+                wheelhouse only, without network access. Implies use_wheelhouse.
+            import_name_mapping (Optional[Dict[str, str]]): Distributions to install for
+                import names, extending the bundled mapping (e.g. {"cv2":
+                "opencv-python-headless"}). Updates made through the resolver are
+                persisted under the executor directory.
+            normalize_code (bool): Whether the extracted code is regenerated from its
+                syntax tree with astor before it runs, dropping comments and
+                normalizing formatting. When False the code runs exactly as extracted,
+                which skips the round-trip on large scripts.
+            install_optional_imports (bool): Whether the missing packages of optional
+                imports, the ones guarded by a ``try`` catching ``ImportError``, are
+                installed as well. By default only the packages of required imports
+                are installed, optional imports are expected to have a fallback.
+            log_level (str): The level of the console and file logs.
+            json_logs (bool): Whether the log file holds one JSON record per line,
+                tagged with the executor and request ids, instead of formatted text.
+            log_to_console (bool): Whether the executor writes its records to stdout
+                itself. By default they only reach the loguru handlers of the
+                application, loguru's stderr handler unless it was removed.
+            max_log_payload_chars (Optional[int]): The maximum number of characters
+                logged for the LLM text, the code, the results and the errors, longer
+                ones are shortened according to ``log_truncation_policy``. None logs
+                them whole.
+            log_truncation_policy (str): The part of a long payload that is logged,
+                "head_tail", "head" or "tail".
+            spill_output_bytes (Optional[int]): The output size in bytes above which
+                the stdout of an execution is written to a file under the executor
+                directory instead of being held in memory. The result then holds the
+                head and tail of the output, the whole output is available through
+                ``ExecutionResult.stdout_spill``, a memory-mapped view removed with
+                the result. Spilled results are not cached. None keeps every output
+                in memory.
+            scratch_dirs (bool): Whether every execution runs in its own empty
+                scratch directory instead of the executor directory, so concurrent
+                runs do not collide on file names and their files do not pile up.
+                The directory is removed after the run, or once the result holding
+                its artifacts is released. Stateful sessions keep the executor
+                directory.
+            scratch_root (Optional[str]): The directory the scratch directories are
+                created in, e.g. "/dev/shm" to keep the files of the snippets on a
+                tmpfs. None uses the "scratch" directory of the executor.
+            capture_artifacts (bool): Whether the files written in the scratch
+                directory are listed in ``ExecutionResult.artifacts``, they are not
+                copied. Results with artifacts are not cached.
             _logger (ExecutorLogger): Logger for logging execution details.
             _code_extractor (PythonCodeExtractor): Extractor for extracting Python code from text.
             _code_executor (PythonCodeExecutor): Executor for executing the extracted Python code.
@@ -47,19 +217,165 @@ class LLMPythonCodeExecutor:
             raise ValueError(f"{executor_dir_path} doesn't Exist on your system")
         self.path = self.executor_dir_path / self.name
         self.venv_name = venv_name
+        self.write_logs = write_logs
+        self.worker_pool_size = worker_pool_size
+        self.worker_max_tasks = worker_max_tasks
+        self.worker_max_rss_mb = worker_max_rss_mb
+        self.max_concurrency = max_concurrency or os.cpu_count() or 1
+        self.preload_modules = preload_modules
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        self.cache_on_disk = cache_on_disk
+        self.max_output_bytes = max_output_bytes
+        self.output_limit_policy = output_limit_policy
+        self.resource_limits = resource_limits
+        self.venv_template = venv_template
+        self.use_wheelhouse = use_wheelhouse or offline_install
+        self.offline_install = offline_install
+        self.import_name_mapping = import_name_mapping
+        self.normalize_code = normalize_code
+        self.install_optional_imports = install_optional_imports
+        self.log_level = log_level
+        self.json_logs = json_logs
+        self.log_to_console = log_to_console
+        self.max_log_payload_chars = max_log_payload_chars
+        self.log_truncation_policy = log_truncation_policy
+        self.spill_output_bytes = spill_output_bytes
+        self.scratch_dirs = scratch_dirs
+        self.scratch_root = scratch_root
+        self.capture_artifacts = capture_artifacts
+        self._async_semaphore = None
+        self._sessions: "weakref.WeakSet[ExecutionSession]" = weakref.WeakSet()
+        self._init_lock = threading.RLock()
+        if venv_manager is not None:
+            self._executor_venv = venv_manager
         self._intialize_executor_environment()
-        if write_logs:
-            self._logger = ExecutorLogger(
-                logs_path=os.path.join(self.executor_dir_path, self.name, "logs")
-            )
-        else:
-            self._logger = ExecutorLogger()
-        self._logger.info("starting code execution tool")
-        self._code_extractor = PythonCodeExtractor()
-        self._code_executor = PythonCodeExecutor()
-        self._pip_extractor = PipCommandsExtrator()
-        self._executor_venv = VirtualEnvironmentManager(
-            env_name=self.venv_name, base_dir=str(self.path), logger=self._logger
+
+    @_component
+    def _logger(self) -> "ExecutorLogger":
+        """Logger for logging execution details."""
+        from llm_pyexecutor.logger import ExecutorLogger
+
+        logger = ExecutorLogger(
+            logs_path=os.path.join(self.path, "logs") if self.write_logs else None,
+            level=self.log_level,
+            json_logs=self.json_logs,
+            console=self.log_to_console,
+            max_payload_chars=self.max_log_payload_chars,
+            truncation_policy=self.log_truncation_policy,
+        )
+        logger.info("starting code execution tool")
+        return logger
+
+    @_component
+    def _code_extractor(self) -> "PythonCodeExtractor":
+        """Extractor for extracting Python code from text."""
+        from llm_pyexecutor.code import PythonCodeExtractor
+
+        return PythonCodeExtractor()
+
+    @_component
+    def _pip_extractor(self) -> "PipCommandsExtrator":
+        """Extractor for extracting pip commands from text."""
+        from llm_pyexecutor.cli import PipCommandsExtrator
+
+        return PipCommandsExtrator()
+
+    @_component
+    def _wheelhouse(self) -> "Optional[Wheelhouse]":
+        """The wheelhouse dependencies are installed from, if enabled."""
+        from llm_pyexecutor.environment_manager import Wheelhouse
+
+        if not self.use_wheelhouse:
+            return None
+        return Wheelhouse(self.path / "wheelhouse", logger=self._logger)
+
+    @_component
+    def _executor_venv(self) -> "VirtualEnvironmentManager":
+        """Manages the virtual environment for code execution."""
+        from llm_pyexecutor.environment_manager import VirtualEnvironmentManager
+
+        return VirtualEnvironmentManager(
+            env_name=self.venv_name,
+            base_dir=str(self.path),
+            logger=self._logger,
+            template=self.venv_template,
+            wheelhouse=self._wheelhouse,
+            offline=self.offline_install,
+        )
+
+    @_component
+    def _import_resolver(self) -> "ImportNameResolver":
+        """Resolves missing import names to the distributions to install."""
+        from llm_pyexecutor.environment_manager import ImportNameResolver
+
+        return ImportNameResolver(
+            self._executor_venv.get_installed_distributions(),
+            mapping_path=self.path / "import_names.json",
+            mapping=self.import_name_mapping,
+        )
+
+    @_component
+    def _worker_pool(self) -> "Optional[PythonWorkerPool]":
+        """The pool of warm python workers, if enabled."""
+        from llm_pyexecutor.code import PythonWorkerPool
+
+        if self.worker_pool_size <= 0:
+            return None
+        self._logger.info(f"using a pool of {self.worker_pool_size} python workers")
+        return PythonWorkerPool(
+            self._executor_venv.get_pyexecutor(),
+            size=self.worker_pool_size,
+            max_tasks_per_worker=self.worker_max_tasks,
+            max_rss_mb=self.worker_max_rss_mb,
+            limits=self.resource_limits,
+        )
+
+    @_component
+    def _zygote(self) -> "Optional[PythonZygote]":
+        """The zygote forking a child per execution, if enabled."""
+        from llm_pyexecutor.code import PythonZygote
+
+        if not self.preload_modules:
+            return None
+        if not hasattr(os, "fork"):
+            self._logger.warning("zygote execution requires os.fork, ignoring")
+            return None
+        self._logger.info(f"using a zygote preloading {self.preload_modules}")
+        return PythonZygote(
+            self._executor_venv.get_pyexecutor(),
+            self.preload_modules,
+            packages_fingerprint=(
+                self._executor_venv.get_installed_distributions().fingerprint
+            ),
+            limits=self.resource_limits,
+        )
+
+    @_component
+    def _code_executor(self) -> "PythonCodeExecutor":
+        """Executor for executing the extracted Python code."""
+        from llm_pyexecutor.code import PythonCodeExecutor
+
+        return PythonCodeExecutor(
+            worker_pool=self._worker_pool,
+            zygote=self._zygote,
+            limits=self.resource_limits,
+            normalize_code=self.normalize_code,
+            spill_threshold=self.spill_output_bytes,
+            spill_dir=str(self.path / "outputs"),
+        )
+
+    @_component
+    def _result_cache(self) -> "Optional[ExecutionResultCache]":
+        """The cache of execution results, if enabled."""
+        from llm_pyexecutor.code import ExecutionResultCache
+
+        if self.cache_size <= 0:
+            return None
+        return ExecutionResultCache(
+            max_entries=self.cache_size,
+            ttl=self.cache_ttl,
+            cache_dir=(self.path / "cache") if self.cache_on_disk else None,
         )
 
     def __str__(self) -> str:
@@ -71,6 +387,97 @@ class LLMPythonCodeExecutor:
         """
         pass
 
+    def warmup(self) -> None:
+        """
+        Creates the components of the executor ahead of the first execution.
+
+        The virtual environment is created, the standard library modules of its
+        interpreter are probed and the python workers and the zygote, if enabled,
+        are started, so the first execution pays none of these costs.
+        """
+        from llm_pyexecutor.code import is_standard_package
+
+        self._create_components()
+        is_standard_package(
+            self._executor_venv.get_pyexecutor(), self._standard_packages_script(), "."
+        )
+        if self._worker_pool is not None:
+            self._worker_pool.start(str(self.executor_dir_path))
+        if self._zygote is not None:
+            self._zygote.start()
+        self._logger.info("code execution tool is warmed up")
+
+    def _create_components(self) -> None:
+        """Creates the components every execution uses, if not created yet."""
+        for name in _EXECUTION_COMPONENTS:
+            getattr(self, name)
+
+    async def awarmup(self) -> None:
+        """
+        Asynchronous version of ``warmup``, run on a thread so the event loop keeps
+        serving other tasks while the virtual environment is created.
+        """
+        import asyncio
+
+        await asyncio.to_thread(self.warmup)
+
+    def close(self) -> None:
+        """
+        Releases the resources held by the executor, closing the open sessions,
+        stopping the python workers and the zygote if any and flushing and removing
+        the log handlers. Components that were never created are left alone.
+        """
+        for session in list(self._sessions):
+            session.close()
+        for name in ("_worker_pool", "_zygote", "_logger"):
+            component = self.__dict__.get(name)
+            if component is not None:
+                component.close()
+
+    def session(
+        self, idle_timeout: Optional[float] = 600, timeout: int = 120
+    ) -> "ExecutionSession":
+        """
+        Starts a stateful session whose runs share one persistent interpreter.
+
+        The globals defined and the modules imported by the code of a text stay
+        available to the code of the following texts run in the session. The
+        session can be used as a context manager and is closed with the executor.
+
+        Parameters:
+            idle_timeout (Optional[float]): The number of idle seconds after which
+                the session is closed (default is 600, None keeps it until closed).
+            timeout (int): The maximum number of seconds the code of a text may run
+                (default is 120).
+
+        Returns:
+            ExecutionSession: The session, see ``ExecutionSession.run``.
+        """
+        from llm_pyexecutor.session import ExecutionSession
+
+        session = ExecutionSession(self, idle_timeout=idle_timeout, timeout=timeout)
+        self._sessions.add(session)
+        return session
+
+    def prefetch(self, packages: List[str]) -> List[str]:
+        """
+        Downloads or builds the wheels of packages into the executor wheelhouse.
+
+        Parameters:
+            packages (List[str]): The requirements to prefetch, their dependencies
+                are prefetched as well.
+
+        Returns:
+            List[str]: The requirements that were fetched, packages that already
+            have a wheel are skipped.
+
+        Raises:
+            ValueError: If the executor does not use a wheelhouse.
+        """
+        if self._wheelhouse is None:
+            raise ValueError("prefetch requires use_wheelhouse or offline_install")
+        return self._wheelhouse.prefetch(packages, self._executor_venv.get_pyexecutor())
+
     def _intialize_executor_environment(self) -> None:
         """
         Initializes the executor environment by creating necessary directories and files.
@@ -85,95 +492,617 @@ class LLMPythonCodeExecutor:
             ) as file:
                 file.write(STANDARD_PKG_SCRIPT)
 
-    def execute(self, text: str) -> str:
+    def _standard_packages_script(self) -> str:
         """
-        Executes the provided text as Python code after extracting it from the input string.
+        Returns the path of the script listing the standard library modules.
+
+        Returns:
+            str: The path to the standard package script.
+        """
+        return str(self.path / "scripts" / "is_standard_pkg.py")
+
+    def _cache_key(self, code: "CodeUnit") -> str:
+        """
+        Returns the result cache key of the code in the executor environment.
+
+        Parameters:
+            code (CodeUnit): The extracted Python code.
+
+        Returns:
+            str: The hash of the code as it runs and the virtual environment fingerprint.
+        """
+        from llm_pyexecutor.code import ExecutionResultCache
+
+        return ExecutionResultCache.make_key(
+            self._code_executor.runnable_source(code), self._executor_venv.fingerprint()
+        )
+
+    def _store_result(
+        self, code: "CodeUnit", code_result: str, use_cache: bool
+    ) -> None:
+        """
+        Stores a successful execution result in the result cache, if enabled.
+
+        Parameters:
+            code (CodeUnit): The extracted Python code.
+            code_result (str): The result of the code execution.
+            use_cache (bool): Whether the caller allowed caching this execution.
+        """
+        if self._result_cache is not None and use_cache:
+            self._result_cache.put(self._cache_key(code), code_result)
+
+    def _prepare(
+        self,
+        text: str,
+        use_cache: bool = True,
+        record: "Optional[ExecutionResult]" = None,
+    ) -> "Tuple[CodeUnit, List[str], Optional[str]]":
+        """
+        Extracts the code from the text and finds the dependencies to install.
+
+        The code is parsed and compiled once into a ``CodeUnit`` that the cache
+        lookup, the dependency analysis and the run share, so code that does not
+        compile fails before anything is installed or run. When the result of the
+        code is cached, dependency checking is skipped.
 
         Parameters:
             text (str): The input text containing Python code to be executed.
+            use_cache (bool): Whether the result cache may be used.
+            record (Optional[ExecutionResult]): The result the stage timings are
+                recorded on, if any.
 
         Returns:
-            str: Returns the result of the code execution or an error message if an exception occurs.
+            Tuple[CodeUnit, List[str], Optional[str]]: The extracted code, the uninstalled
+            dependencies and the cached result of the code, if any.
+
+        Raises:
+            SyntaxError: If the code does not compile.
+        """
+        from llm_pyexecutor.result import ExecutionResult
+
+        if record is None:
+            record = ExecutionResult()
+        code, extracted_pkgs, cached_result = self._lookup(text, use_cache, record)
+        if cached_result is not None:
+            return code, [], cached_result
+        return code, self._dependencies(code, extracted_pkgs, record), None
+
+    def _lookup(
+        self, text: str, use_cache: bool, record: "ExecutionResult"
+    ) -> "Tuple[CodeUnit, List[str], Optional[str]]":
+        """
+        Extracts the code and pip packages from the text and looks its result up.
+
+        Parameters:
+            text (str): The input text containing Python code to be executed.
+            use_cache (bool): Whether the result cache may be used.
+            record (ExecutionResult): The result the stage timings are recorded on.
+
+        Returns:
+            Tuple[CodeUnit, List[str], Optional[str]]: The extracted code, the packages
+            of the pip commands in the text and the cached result of the code, if any.
+
+        Raises:
+            SyntaxError: If the code does not compile.
+        """
+        from llm_pyexecutor.fences import parse_fenced_blocks
+
+        self._logger.payload("LLM Generated Text", text)
+        with record.stage("extraction"):
+            self._logger.info("Searching for Packages to install from text")
+            blocks = parse_fenced_blocks(text)
+            extracted_pkgs = self._pip_extractor.extract_packages_from_blocks(blocks)
+            code = self._code_extractor.extract_unit_from_blocks(blocks)
+        self._logger.payload("Extracted Python Code", code.source)
+        # Fails fast with a SyntaxError on the errors found only by the compiler,
+        # e.g. a return outside of a function, before any install or interpreter.
+        code.check_compiles()
+        if self._result_cache is not None and use_cache:
+            with record.stage("cache_lookup"):
+                cached_result = self._result_cache.get(self._cache_key(code))
+            if cached_result is not None:
+                self._logger.info("Found Cached Code Execution Result")
+                return code, extracted_pkgs, cached_result
+        return code, extracted_pkgs, None
+
+    def _dependencies(
+        self,
+        code: "CodeUnit",
+        extracted_pkgs: List[str],
+        record: "ExecutionResult",
+    ) -> List[str]:
+        """
+        Finds the dependencies of the code that are not installed yet.
+
+        Packages from pip commands in the text are used when present, otherwise the
+        imports of the code that are not part of the standard library are used,
+        wherever they appear in the code, so that all of them are installed in one
+        batch before the run. Optional imports are skipped unless
+        ``install_optional_imports`` is set. The missing import names are resolved to
+        the distributions providing them.
+
+        Parameters:
+            code (CodeUnit): The extracted Python code.
+            extracted_pkgs (List[str]): The packages of the pip commands in the text.
+            record (ExecutionResult): The result the stage timings are recorded on.
+
+        Returns:
+            List[str]: The uninstalled dependencies.
+        """
+        from llm_pyexecutor.code import extract_dependecies, is_standard_package
+
+        if len(extracted_pkgs) == 0:
+            with record.stage("dependency_analysis"):
+                code_deps = extract_dependecies(code)
+            self._logger.payload("Python Code Dependencies", code_deps)
+            with record.stage("stdlib_probe"):
+                standard_deps = is_standard_package(
+                    self._executor_venv.get_pyexecutor(),
+                    self._standard_packages_script(),
+                    ".",
+                )
+            third_party = [
+                deps for deps in code_deps if deps["module"] not in standard_deps
+            ]
+            required = {deps["module"] for deps in third_party if not deps["optional"]}
+            if not self.install_optional_imports:
+                skipped = {deps["module"] for deps in third_party} - required
+                if len(skipped) > 0:
+                    self._logger.info(f"Skipping Optional Imports: {sorted(skipped)}")
+                third_party = [
+                    deps for deps in third_party if deps["module"] in required
+                ]
+            additional_pkgs = list(
+                dict.fromkeys(deps["module"] for deps in third_party)
+            )
+            if len(additional_pkgs) == 0:
+                self._logger.info("No installation Needed")
+                return []
+            self._logger.info("Check if packages are installed")
+        else:
+            self._logger.info(
+                "Found Packages to install from text: " f"{extracted_pkgs}"
+            )
+            additional_pkgs = extracted_pkgs
+        with record.stage("installed_check"):
+            uninstalled_deps = self._executor_venv.check_additional_dependencies(
+                additional_pkgs, str(self.executor_dir_path)
+            )
+        if len(extracted_pkgs) == 0 and len(uninstalled_deps) > 0:
+            uninstalled_deps = self._import_resolver.resolve_many(uninstalled_deps)
+        if len(uninstalled_deps) > 0:
+            self._logger.info(f"Found Extra Dependecies: {uninstalled_deps}")
+        return uninstalled_deps
+
+    def _error_result(self) -> str:
+        """
+        Logs the exception being handled and returns it as an execution result.
+
+        Returns:
+            str: The error message holding the traceback of the exception.
+        """
+        from llm_pyexecutor.logger import truncate
+
+        error = "Error Occured During Code Execution: \n" f"{traceback.format_exc()}"
+        self._logger.error(truncate(error, self._logger.max_payload_chars))
+        return error
+
+    def _record_output(
+        self, code: "CodeUnit", run_result: "CodeRunResult", use_cache: bool
+    ) -> str:
+        """
+        Logs the output of a run and stores it in the result cache.
+
+        A spilled output is logged from its file according to the truncation policy
+        and is not cached, so its whole output stays reachable from the result.
+
+        Parameters:
+            code (CodeUnit): The extracted Python code.
+            run_result (CodeRunResult): The result of the code run.
+            use_cache (bool): Whether the caller allowed caching this execution.
+
+        Returns:
+            str: The standard output of the code, the head and tail of a spilled one.
+
+        Raises:
+            CodeExecutionError: If the code exits with a non-zero exit code.
+        """
+        if run_result.returncode != 0:
+            raise CodeExecutionError(run_result.stderr)
+        spill = run_result.stdout_spill
+        if spill is None:
+            self._logger.payload("Code Execution Result", run_result.stdout)
+            self._store_result(code, run_result.stdout, use_cache)
+        else:
+            self._logger.info(
+                f"Code Execution Result of {spill.size} bytes spilled to {spill.path}"
+            )
+            self._logger.payload("Code Execution Result", spill)
+        return run_result.stdout
+
+    def _scratch(self) -> "Optional[ScratchDirectory]":
+        """
+        Creates the scratch directory of an execution, if enabled.
+
+        Returns:
+            Optional[ScratchDirectory]: The scratch directory, None when executions
+            run in the executor directory.
+        """
+        from llm_pyexecutor.code import ScratchDirectory
+
+        if not self.scratch_dirs:
+            return None
+        return ScratchDirectory(self.scratch_root or str(self.path / "scratch"))
+
+    def _working_dir(self, scratch: "Optional[ScratchDirectory]") -> str:
+        """
+        Returns the working directory of an execution.
+
+        Parameters:
+            scratch (Optional[ScratchDirectory]): The scratch directory of the
+                execution, if any.
+
+        Returns:
+            str: The scratch directory, or the executor directory.
+        """
+        return str(self.executor_dir_path) if scratch is None else scratch.path
+
+    def _run(self, code: "CodeUnit", use_cache: bool) -> str:
+        """
+        Runs the extracted code in the executor environment and logs its resource usage
+        and output.
+
+        Parameters:
+            code (CodeUnit): The extracted Python code.
+            use_cache (bool): Whether the caller allowed caching this execution.
+
+        Returns:
+            str: The standard output of the code.
+
+        Raises:
+            CodeExecutionError: If the code exits with a non-zero exit code.
+        """
+        scratch = self._scratch()
+        try:
+            run_result: CodeRunResult = self._code_executor.run_code(
+                self._executor_venv.get_pyexecutor(),
+                code,
+                self._working_dir(scratch),
+            )
+        finally:
+            if scratch is not None:
+                scratch.cleanup()
+        self._logger.info(f"Resource Usage: {run_result.usage}")
+        return self._record_output(code, run_result, use_cache)
+
+    def execute_detailed(self, text: str, use_cache: bool = True) -> "ExecutionResult":
+        """
+        Executes the provided text as Python code and returns a structured result.
+
+        Besides the output and exit code of the code, the result holds the time spent
+        in every stage: text extraction, result cache lookup, dependency analysis,
+        standard library probe, installed check, pip install and code run. Errors are
+        not raised but recorded in the ``error`` field of the result. With
+        ``scratch_dirs`` the files written by the code are listed in its
+        ``artifacts``.
+
+        Parameters:
+            text (str): The input text containing Python code to be executed.
+            use_cache (bool): Whether the result cache may be used, pass False for
+                non-deterministic code. Ignored when the cache is disabled.
+
+        Returns:
+            ExecutionResult: The output, exit code, resource usage and stage timings
+            of the execution.
 
         Raises:
             TypeError: If the provided text argument is not a string.
         """
-        if isinstance(text, str):
+        from llm_pyexecutor.result import ExecutionResult
+
+        if not isinstance(text, str):
+            self._logger.error("Expected text argument to be string")
+            raise TypeError("Expected text argument to be string")
+        result = ExecutionResult()
+        scratch = None
+        with self._logger.request() as request_id:
+            result.request_id = request_id
             try:
-                self._logger.info("LLM Generated Text: \n" f"{text}")
-                self._logger.info("Searching for Packages to install from text")
-                extracted_pkgs = self._pip_extractor.extract_packages(text)
-                code = self._code_extractor.extract_code(text)
-                self._logger.info("Extracted Python Code: \n" f"{code}")
-                if len(extracted_pkgs) == 0:
-                    code_deps = extract_dependecies(code)
-                    self._logger.info("Python Code Dependencies: \n" f"{code_deps}")
-                    venv_executor = self._executor_venv.get_pyexecutor()
-                    standard_deps = is_standard_package(
-                        venv_executor,
-                        str((self.path / "scripts" / "is_standard_pkg.py")),
-                        ".",
-                    )
-                    additional_pkgs = list(
-                        {
-                            deps["module"]
-                            for deps in code_deps
-                            if deps["module"] not in standard_deps
-                        }
-                    )
-                    if len(additional_pkgs) == 0:
-                        self._logger.info("No installation Needed")
-                    else:
-                        self._logger.info("Check if packages are installed")
-                        uninstalled_deps = (
-                            self._executor_venv.check_additional_dependencies(
-                                additional_pkgs, str(self.executor_dir_path)
-                            )
+                code, uninstalled_deps, cached_result = self._prepare(
+                    text, use_cache, record=result
+                )
+                if cached_result is not None:
+                    result.stdout = cached_result
+                    result.exit_code = 0
+                    result.cached = True
+                    return result
+                if len(uninstalled_deps) > 0:
+                    self._logger.info("Installing Dependencies in Progress!!!")
+                    with result.stage("pip_install"):
+                        self._executor_venv.install_additional_dependencies(
+                            uninstalled_deps, str(self.executor_dir_path)
                         )
-                        if len(uninstalled_deps) > 0:
-                            self._logger.info(
-                                f"Found Extra Dependecies: {uninstalled_deps}"
-                            )
-                            self._logger.info("Installing Dependencies in Progress!!!")
-                            self._executor_venv.install_additional_dependencies(
-                                uninstalled_deps, str(self.executor_dir_path)
-                            )
-                            self._logger.info("Installation Successfully Completed!!")
-                else:
+                    self._logger.info("Installation Successfully Completed!!")
+                scratch = self._scratch()
+                with result.stage("code_run"):
+                    run_result = self._code_executor.run_code(
+                        self._executor_venv.get_pyexecutor(),
+                        code,
+                        self._working_dir(scratch),
+                    )
+                self._logger.info(f"Resource Usage: {run_result.usage}")
+                result.stdout = run_result.stdout
+                result.stderr = run_result.stderr
+                result.exit_code = run_result.returncode
+                result.usage = run_result.usage
+                result.stdout_spill = run_result.stdout_spill
+                if scratch is not None and self.capture_artifacts:
+                    result.artifacts = scratch.artifacts()
+                if len(result.artifacts) > 0:
                     self._logger.info(
-                        "Found Packages to install from text: " f"{extracted_pkgs}"
+                        "Captured Artifacts: "
+                        f"{[artifact.name for artifact in result.artifacts]}"
+                    )
+                self._record_output(
+                    code, run_result, use_cache and len(result.artifacts) == 0
+                )
+            except Exception:
+                result.error = self._error_result()
+            finally:
+                if scratch is not None and len(result.artifacts) == 0:
+                    scratch.cleanup()
+                self._logger.info(f"Stage Timings: {result.timings}")
+        return result
+
+    def execute(self, text: str, use_cache: bool = True) -> str:
+        """
+        Executes the provided text as Python code after extracting it from the input string.
+
+        Parameters:
+            text (str): The input text containing Python code to be executed.
+            use_cache (bool): Whether the result cache may be used, pass False for
+                non-deterministic code. Ignored when the cache is disabled.
+
+        Returns:
+            str: Returns the result of the code execution or an error message if an exception occurs.
+
+        Raises:
+            TypeError: If the provided text argument is not a string.
+        """
+        return self.execute_detailed(text, use_cache).output
+
+    def _get_async_semaphore(self) -> "asyncio.Semaphore":
+        """
+        Returns the semaphore limiting concurrent ``aexecute`` calls on the running loop.
+
+        Returns:
+            asyncio.Semaphore: The semaphore bound to the running event loop.
+        """
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        if self._async_semaphore is None or self._async_semaphore[0] is not loop:
+            self._async_semaphore = (loop, asyncio.Semaphore(self.max_concurrency))
+        return self._async_semaphore[1]
+
+    async def aexecute(self, text: str, use_cache: bool = True) -> str:
+        """
+        Asynchronous version of ``execute``.
+
+        The standard library probe, pip install and the code run are started with
+        ``asyncio.create_subprocess_exec``, so a single event loop can drive many
+        executions. At most ``max_concurrency`` executions run at the same time,
+        cancelling the calling task kills the running child process. The components
+        created on first use, e.g. the virtual environment, and the code extraction
+        and dependency analysis run on a thread, so they do not block the loop.
+
+        Parameters:
+            text (str): The input text containing Python code to be executed.
+            use_cache (bool): Whether the result cache may be used, pass False for
+                non-deterministic code. Ignored when the cache is disabled.
+
+        Returns:
+            str: Returns the result of the code execution or an error message if an exception occurs.
+
+        Raises:
+            TypeError: If the provided text argument is not a string.
+        """
+        if not isinstance(text, str):
+            self._logger.error("Expected text argument to be string")
+            raise TypeError("Expected text argument to be string")
+        import asyncio
+
+        from llm_pyexecutor.code import ais_standard_package
+        from llm_pyexecutor.result import ExecutionResult
+
+        if any(name not in self.__dict__ for name in _EXECUTION_COMPONENTS):
+            await asyncio.to_thread(self._create_components)
+        async with self._get_async_semaphore():
+            with self._logger.request():
+                try:
+                    record = ExecutionResult()
+                    code, extracted_pkgs, cached_result = await asyncio.to_thread(
+                        self._lookup, text, use_cache, record
                     )
-                    venv_executor = self._executor_venv.get_pyexecutor()
-                    uninstalled_deps = (
-                        self._executor_venv.check_additional_dependencies(
-                            extracted_pkgs, str(self.executor_dir_path)
+                    if cached_result is not None:
+                        return cached_result
+                    if len(extracted_pkgs) == 0:
+                        # Probes the interpreter without blocking the loop, the
+                        # dependency analysis then finds the probe cached.
+                        await ais_standard_package(
+                            self._executor_venv.get_pyexecutor(),
+                            self._standard_packages_script(),
+                            ".",
                         )
+                    uninstalled_deps = await asyncio.to_thread(
+                        self._dependencies, code, extracted_pkgs, record
                     )
                     if len(uninstalled_deps) > 0:
-                        self._logger.info(
-                            f"Found Extra Dependecies: {uninstalled_deps}"
-                        )
                         self._logger.info("Installing Dependencies in Progress!!!")
-                        self._executor_venv.install_additional_dependencies(
+                        await self._executor_venv.ainstall_additional_dependencies(
                             uninstalled_deps, str(self.executor_dir_path)
                         )
                         self._logger.info("Installation Successfully Completed!!")
-                code_result = self._code_executor.execute_code(
-                    venv_executor,
-                    code,
-                    str(self.executor_dir_path),
+                    scratch = self._scratch()
+                    try:
+                        run_result = await self._code_executor.arun_code(
+                            self._executor_venv.get_pyexecutor(),
+                            code,
+                            self._working_dir(scratch),
+                        )
+                    finally:
+                        if scratch is not None:
+                            scratch.cleanup()
+                    return self._record_output(code, run_result, use_cache)
+                except Exception:
+                    return self._error_result()
+
+    def execute_many(
+        self,
+        texts: List[str],
+        max_workers: Optional[int] = None,
+        use_cache: bool = True,
+    ) -> List[str]:
+        """
+        Executes the Python code of many texts as one batch.
+
+        The code and dependencies of all texts are extracted up front, the union of
+        the uninstalled dependencies is installed with a single pip call and the
+        snippets are then executed in parallel.
+
+        Parameters:
+            texts (List[str]): The input texts containing Python code to be executed.
+            max_workers (Optional[int]): The maximum number of snippets executed at the
+                same time, defaults to the number of CPUs.
+            use_cache (bool): Whether the result cache may be used, pass False for
+                non-deterministic code. Ignored when the cache is disabled.
+
+        Returns:
+            List[str]: The result of every code execution, or its error message, in
+            the order of the input texts.
+
+        Raises:
+            TypeError: If one of the provided texts is not a string.
+        """
+        if not all(isinstance(text, str) for text in texts):
+            self._logger.error("Expected text argument to be string")
+            raise TypeError("Expected text argument to be string")
+        results: List[Optional[str]] = [None] * len(texts)
+        prepared = {}
+        request_ids = {}
+        for position, text in enumerate(texts):
+            with self._logger.request() as request_id:
+                try:
+                    code, deps, cached_result = self._prepare(text, use_cache)
+                except Exception:
+                    results[position] = self._error_result()
+                    continue
+            if cached_result is not None:
+                results[position] = cached_result
+            else:
+                prepared[position] = (code, deps)
+                request_ids[position] = request_id
+        batch_deps = list(
+            dict.fromkeys(dep for _, deps in prepared.values() for dep in deps)
+        )
+        if len(batch_deps) > 0:
+            try:
+                self._logger.info("Installing Dependencies in Progress!!!")
+                self._executor_venv.install_additional_dependencies(
+                    batch_deps, str(self.executor_dir_path)
                 )
-                self._logger.info("Code Execution Result: \n" f"{code_result}")
-                return code_result
+                self._logger.info("Installation Successfully Completed!!")
             except Exception:
-                self._logger.error(
-                    "Error Occured During Code Execution: \n"
-                    f"{traceback.format_exc()}"
-                )
-                return (
-                    "Error Occured During Code Execution: \n"
-                    f"{traceback.format_exc()}"
-                )
-        else:
+                error = self._error_result()
+                for position, (_, deps) in list(prepared.items()):
+                    if len(deps) > 0:
+                        results[position] = error
+                        del prepared[position]
+
+        def run(code: "CodeUnit", request_id: str) -> str:
+            with self._logger.request(request_id):
+                try:
+                    return self._run(code, use_cache)
+                except Exception:
+                    return self._error_result()
+
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(
+            max_workers=max_workers or os.cpu_count() or 1
+        ) as thread_pool:
+            futures = {
+                position: thread_pool.submit(run, code, request_ids[position])
+                for position, (code, _) in prepared.items()
+            }
+            for position, future in futures.items():
+                results[position] = future.result()
+        return results
+
+    def execute_stream(self, text: str) -> "Iterator[OutputChunk]":
+        """
+        Executes the provided text as Python code and yields its output as it is produced.
+
+        Dependencies are installed before the first chunk is yielded. The output is
+        bounded by ``max_output_bytes`` according to ``output_limit_policy``, errors
+        are yielded as a final "stderr" chunk holding the error message. Streamed
+        executions are never cached.
+
+        Parameters:
+            text (str): The input text containing Python code to be executed.
+
+        Returns:
+            Iterator[OutputChunk]: The stdout and stderr chunks of the execution.
+
+        Raises:
+            TypeError: If the provided text argument is not a string.
+        """
+        if not isinstance(text, str):
             self._logger.error("Expected text argument to be string")
             raise TypeError("Expected text argument to be string")
+        return self._stream(text)
+
+    def _stream(self, text: str) -> "Iterator[OutputChunk]":
+        """
+        Generator behind ``execute_stream``.
+
+        Parameters:
+            text (str): The input text containing Python code to be executed.
+
+        Yields:
+            OutputChunk: The stdout and stderr chunks of the execution.
+        """
+        from llm_pyexecutor.code import OutputChunk
+        from llm_pyexecutor.logger import ExecutorLogger
+
+        request_id = ExecutorLogger.new_request_id()
+        scratch = None
+        try:
+            with self._logger.request(request_id):
+                code, uninstalled_deps, _ = self._prepare(text, use_cache=False)
+                if len(uninstalled_deps) > 0:
+                    self._logger.info("Installing Dependencies in Progress!!!")
+                    self._executor_venv.install_additional_dependencies(
+                        uninstalled_deps, str(self.executor_dir_path)
+                    )
+                    self._logger.info("Installation Successfully Completed!!")
+            streamed = 0
+            scratch = self._scratch()
+            for chunk in self._code_executor.stream_code(
+                self._executor_venv.get_pyexecutor(),
+                code,
+                self._working_dir(scratch),
+                max_output_bytes=self.max_output_bytes,
+                on_output_limit=self.output_limit_policy,
+            ):
+                streamed += len(chunk.data)
+                yield chunk
+            with self._logger.request(request_id):
+                self._logger.info(f"Code Execution Streamed {streamed} characters")
+        except Exception:
+            with self._logger.request(request_id):
+                error = self._error_result()
+            yield OutputChunk("stderr", error)
+        finally:
+            if scratch is not None:
+                scratch.cleanup()
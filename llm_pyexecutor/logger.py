@@ -1,9 +1,158 @@
+import os
+import queue
 import sys
+import threading
+import uuid
+import weakref
+from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
-from typing import Optional
+from typing import IO, Callable, Iterator, List, Optional, Union
 
-from loguru import logger
+from llm_pyexecutor.code.output import TRUNCATION_POLICIES, SpilledOutput
+
+
+class _RotatingFile:
+    """
+    A log file that is renamed with a timestamp suffix and started anew once it
+    grows past ``max_bytes``, as loguru names its rotated files.
+    """
+
+    def __init__(self, path: Path, max_bytes: int) -> None:
+        self.path = path
+        self.max_bytes = max_bytes
+        self._file = open(path, "a", encoding="utf-8")
+        self._size = self._file.tell()
+
+    def _rotate(self) -> None:
+        """Renames the current file and opens a new one."""
+        self._file.close()
+        stamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S_%f")
+        os.replace(self.path, self.path.with_name(f"{self.path.stem}.{stamp}.log"))
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._size = 0
+
+    def write(self, message: str) -> None:
+        """Appends a formatted record, rotating the file first if it is full."""
+        if self._size > 0 and self._size + len(message) > self.max_bytes:
+            self._rotate()
+        self._file.write(message)
+        self._size += len(message)
+
+    def flush(self) -> None:
+        """Flushes the file."""
+        self._file.flush()
+
+    def stop(self) -> None:
+        """Flushes and closes the file, called when the handler is removed."""
+        self._file.close()
+
+
+class _QueuedSink:
+    """
+    A loguru sink handing the formatted records to a writer thread through a
+    bounded queue, so logging never blocks on the output. While the queue is full
+    records are dropped, and the writer notes how many before the next record.
+    """
+
+    def __init__(self, output: Union[IO[str], _RotatingFile], max_queue: int) -> None:
+        self._output = output
+        self._queue: "queue.Queue[Optional[str]]" = queue.Queue(max_queue)
+        self._dropped = 0
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(
+            target=self._write, name="llm-pyexecutor-log-sink", daemon=True
+        )
+        self._thread.start()
+
+    def write(self, message: str) -> None:
+        """Queues a formatted record, dropping it if the queue is full."""
+        try:
+            self._queue.put_nowait(str(message))
+        except queue.Full:
+            with self._lock:
+                self._dropped += 1
+
+    def _write(self) -> None:
+        """Writes the queued records until the sink is stopped."""
+        while True:
+            message = self._queue.get()
+            if message is None:
+                return
+            with self._lock:
+                dropped, self._dropped = self._dropped, 0
+            try:
+                if dropped:
+                    self._output.write(f"[{dropped} log records dropped, queue full]\n")
+                self._output.write(message)
+                if self._queue.empty():
+                    self._output.flush()
+            except (OSError, ValueError):
+                pass
+
+    def stop(self) -> None:
+        """Writes the queued records and stops the writer thread."""
+        self._queue.put(None)
+        self._thread.join()
+        if isinstance(self._output, _RotatingFile):
+            self._output.stop()
+        else:
+            self._output.flush()
+
+
+def _owned_by(executor_id: str) -> Callable[[dict], bool]:
+    """Returns a filter accepting only the records bound to an executor id."""
+
+    def owns(record: dict) -> bool:
+        return record["extra"].get("executor_id") == executor_id
+
+    return owns
+
+
+def _remove_handlers(handler_ids: List[int]) -> None:
+    """Removes loguru handlers, the ones already removed are skipped."""
+    from loguru import logger
+
+    for handler_id in handler_ids:
+        try:
+            logger.remove(handler_id)
+        except ValueError:
+            pass
+    handler_ids.clear()
+
+
+def truncate(text: str, max_chars: Optional[int], policy: str = "head_tail") -> str:
+    """
+    Shortens a text, noting how many characters were dropped.
+
+    Args:
+        text (str): The text to shorten.
+        max_chars (Optional[int]): The maximum number of characters kept, None keeps
+            the whole text.
+        policy (str): The part of the text kept, "head_tail", "head" or "tail"
+            (default is "head_tail").
+
+    Returns:
+        str: The text, or the part of it selected by the policy if it is longer
+        than max_chars.
+
+    Raises:
+        ValueError: If the policy is unknown.
+    """
+    if policy not in TRUNCATION_POLICIES:
+        raise ValueError(
+            f"unknown truncation policy {policy}, expected one of {TRUNCATION_POLICIES}"
+        )
+    if max_chars is None or len(text) <= max_chars:
+        return text
+    marker = f"... [{len(text) - max_chars} characters truncated] ..."
+    if policy == "head":
+        return f"{text[:max_chars]}\n{marker}\n"
+    if policy == "tail":
+        return f"{marker}\n{text[-max_chars:]}"
+    head = max_chars // 2
+    tail = max_chars - head
+    return f"{text[:head]}\n{marker}\n{text[-tail:]}"
 
 
 class ExecutorLogger:
@@ -12,11 +161,47 @@ class ExecutorLogger:
     customizable logging interface. It supports logging to both console and
     file with different formats and log levels.
 
+    Every instance owns its handlers: records are bound to the instance id and
+    its sinks only accept their own records, so several executors in a process
+    do not clobber or duplicate each other's logs. The handlers of the application
+    are left alone, loguru's default stderr handler included. Since loguru has a
+    single global logger they also receive the executor records, so by default
+    the console output of the executor is the one of the application and every
+    record is printed once. With ``console=True`` the instance writes its own
+    records to stdout, the application then keeps them out of its handlers with
+    a filter on the "executor_id" extra field, e.g. by replacing the default
+    handler with ``logger.add(sys.stderr, filter=lambda r: "executor_id" not in
+    r["extra"])``, or keeps the large payloads out of its INFO sinks with
+    ``payload_level="DEBUG"``.
+
+    Records are written by a background thread through a bounded queue, records
+    logged while the queue is full are dropped and counted. Payloads (LLM texts,
+    code and outputs) are truncated to ``max_payload_chars`` according to
+    ``truncation_policy``, spilled outputs are read from their file only for the
+    part that is logged. The file sink writes one JSON record per line, holding
+    the request id of the execution that logged it. The handlers are removed by
+    ``close`` or when the instance is garbage collected.
+
     Attributes:
-        logger: An instance of the Loguru logger.
+        logger: An instance of the Loguru logger, bound to the executor id.
+        executor_id (str): The id the records of this instance are bound to.
+        max_payload_chars (Optional[int]): The maximum length of a logged payload.
+        truncation_policy (str): The part of a long payload that is logged.
+        payload_level (str): The level payloads are logged at.
     """
 
-    def __init__(self, logs_path: Optional[str] = None, level: str = "INFO"):
+    def __init__(
+        self,
+        logs_path: Optional[str] = None,
+        level: str = "INFO",
+        json_logs: bool = True,
+        enqueue: bool = True,
+        max_payload_chars: Optional[int] = 4096,
+        payload_level: str = "INFO",
+        truncation_policy: str = "head_tail",
+        max_queued_records: int = 10000,
+        console: bool = False,
+    ):
         """
         Initializes the ExecutorLogger.
 
@@ -26,38 +211,170 @@ class ExecutorLogger:
                                        is disabled.
             level (str): The logging level (e.g., "DEBUG", "INFO", "WARNING",
                           "ERROR", "CRITICAL"). Default is "INFO".
+            json_logs (bool): Whether the log file holds one JSON record per line
+                              instead of formatted text. Default is True.
+            enqueue (bool): Whether records are written by a background thread, so
+                            logging does not block on the sinks. Default is True.
+            max_payload_chars (Optional[int]): The maximum number of characters of
+                                               a payload, longer ones keep their
+                                               head and tail. None disables
+                                               truncation. Default is 4096.
+            payload_level (str): The level payloads are logged at, e.g. "DEBUG" to
+                                 leave them out of INFO logs. Default is "INFO".
+            truncation_policy (str): The part of a long payload that is logged,
+                                     "head_tail", "head" or "tail". Default is
+                                     "head_tail".
+            max_queued_records (int): The maximum number of records waiting for
+                                      the background thread of a sink, records
+                                      beyond it are dropped. Default is 10000.
+            console (bool): Whether the records are also written to stdout by a
+                            handler of this instance, instead of being left to
+                            the handlers of the application. Default is False.
+
+        Raises:
+            ValueError: If the truncation policy is unknown.
         """
-        self.logger = logger
-        self.logger.remove()  # Remove the default logger
-        self.logger.add(sys.stdout, level=level, format=self._get_console_format())
+        from loguru import logger
+
+        if truncation_policy not in TRUNCATION_POLICIES:
+            raise ValueError(
+                f"unknown truncation policy {truncation_policy}, expected one of "
+                f"{TRUNCATION_POLICIES}"
+            )
+
+        self.executor_id = uuid.uuid4().hex[:12]
+        self.max_payload_chars = max_payload_chars
+        self.payload_level = payload_level
+        self.truncation_policy = truncation_policy
+        self.logger = logger.bind(executor_id=self.executor_id)
+        owns = _owned_by(self.executor_id)
+
+        def sink(output: Union[IO[str], _RotatingFile]) -> object:
+            return _QueuedSink(output, max_queued_records) if enqueue else output
+
+        self._handler_ids: List[int] = []
+        if console:
+            self._handler_ids.append(
+                logger.add(
+                    sink(sys.stdout),
+                    level=level,
+                    format=self._get_console_format,
+                    filter=owns,
+                    colorize=hasattr(sys.stdout, "isatty") and sys.stdout.isatty(),
+                )
+            )
 
         if logs_path:
-            self.logger.add(
+            log_file = _RotatingFile(
                 Path(logs_path) / f"logs_{datetime.now().strftime('%Y%m%d')}.log",
-                level=level,
-                format=self._get_file_format(),
-                rotation="10 MB",
+                max_bytes=10 * 1024 * 1024,
             )
+            self._handler_ids.append(
+                logger.add(
+                    sink(log_file),
+                    level=level,
+                    format=self._get_file_format,
+                    filter=owns,
+                    serialize=json_logs,
+                )
+            )
+        self._finalizer = weakref.finalize(self, _remove_handlers, self._handler_ids)
 
     @staticmethod
-    def _get_console_format() -> str:
+    def new_request_id() -> str:
+        """
+        Generates a request id.
+
+        Returns:
+            str: A random 12 hex digits id.
+        """
+        return uuid.uuid4().hex[:12]
+
+    @contextmanager
+    def request(self, request_id: Optional[str] = None) -> Iterator[str]:
+        """
+        Tags the records logged in the ``with`` block with a request id.
+
+        The id is kept in a context variable, so it follows the asyncio task or
+        thread running the block.
+
+        Args:
+            request_id (Optional[str]): The request id (default is None, a new one
+                is generated).
+
+        Yields:
+            str: The request id.
+        """
+        request_id = request_id or self.new_request_id()
+        with self.logger.contextualize(request_id=request_id):
+            yield request_id
+
+    def payload(self, label: str, text: object) -> None:
+        """
+        Logs a possibly large text, truncated to ``max_payload_chars``.
+
+        Args:
+            label (str): What the text is, e.g. "Extracted Python Code".
+            text (object): The text, a spilled output, or an object whose string
+                form is logged.
+        """
+        if isinstance(text, SpilledOutput):
+            if self.max_payload_chars is None:
+                text = text.read()
+            else:
+                text = text.preview(self.max_payload_chars, self.truncation_policy)
+        else:
+            text = truncate(str(text), self.max_payload_chars, self.truncation_policy)
+        self.logger.log(self.payload_level, f"{label}: \n{text}")
+
+    def close(self) -> None:
+        """
+        Waits for the enqueued records to be written and removes the handlers of
+        this instance.
+        """
+        self._finalizer()
+
+    @staticmethod
+    def _get_console_format(record: Optional[dict] = None) -> str:
         """
         Provides the format for console logging.
 
+        Args:
+            record (Optional[dict]): The record to format, its request id is
+                                     shown when it has one.
+
         Returns:
             str: The format string for console log messages.
         """
-        return "<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <level>{message}</level>"
+        request = ""
+        if record is not None and "request_id" in record["extra"]:
+            request = "<cyan>{extra[request_id]}</cyan> | "
+        return (
+            "<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | "
+            + request
+            + "<level>{message}</level>\n{exception}"
+        )
 
     @staticmethod
-    def _get_file_format() -> str:
+    def _get_file_format(record: Optional[dict] = None) -> str:
         """
         Provides the format for file logging.
 
+        Args:
+            record (Optional[dict]): The record to format, its request id is
+                                     shown when it has one.
+
         Returns:
             str: The format string for file log messages.
         """
-        return "{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | {name}:{line} - {message}"
+        request = ""
+        if record is not None and "request_id" in record["extra"]:
+            request = "{extra[request_id]} | "
+        return (
+            "{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | "
+            + request
+            + "{name}:{line} - {message}\n{exception}"
+        )
 
     def debug(self, message: str, *args, **kwargs):
         """
@@ -0,0 +1,24 @@
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import asyncio.subprocess
+
+
+async def kill_async_process(process: "asyncio.subprocess.Process") -> None:
+    """
+    Kills an asyncio subprocess if it is still running and waits for it to exit.
+
+    Waiting is shielded from cancellation, so the child is always reaped even when
+    the calling task is being cancelled.
+
+    Args:
+        process (asyncio.subprocess.Process): The process to kill.
+    """
+    import asyncio
+
+    if process.returncode is None:
+        try:
+            process.kill()
+        except ProcessLookupError:
+            pass
+    await asyncio.shield(process.wait())
@@ -0,0 +1,135 @@
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Iterator, List, Optional
+
+from llm_pyexecutor.code.output import SpilledOutput
+from llm_pyexecutor.code.resources import ResourceUsage
+from llm_pyexecutor.code.scratch import Artifact
+
+STAGES = (
+    "queue_wait",
+    "extraction",
+    "cache_lookup",
+    "dependency_analysis",
+    "stdlib_probe",
+    "installed_check",
+    "pip_install",
+    "code_run",
+)
+
+
+@dataclass
+class ExecutionResult:
+    """
+    The structured result of executing the code of an LLM generated text.
+
+    Attributes:
+        stdout (str): The standard output of the code.
+        stderr (str): The standard error of the code.
+        exit_code (Optional[int]): The exit code of the code, None if the code was
+            not run because an earlier stage failed.
+        timings (Dict[str, float]): The seconds spent in each stage that ran, keyed
+            by the stage names in ``STAGES``. "queue_wait" is only recorded for
+            executions run through an ``ExecutionScheduler``.
+        usage (Optional[ResourceUsage]): The resources used by the code run.
+        error (Optional[str]): The error message holding the traceback, if the
+            execution failed.
+        cached (bool): Whether the result was served from the result cache.
+        request_id (str): The id tagging the log records of the execution.
+        stdout_spill (Optional[SpilledOutput]): The whole standard output when it
+            was spilled to a file, ``stdout`` then only holds its head and tail.
+        artifacts (List[Artifact]): The files written by the code in its scratch
+            directory, which is kept as long as they are referenced.
+    """
+
+    stdout: str = ""
+    stderr: str = ""
+    exit_code: Optional[int] = None
+    timings: Dict[str, float] = field(default_factory=dict)
+    usage: Optional[ResourceUsage] = None
+    error: Optional[str] = None
+    cached: bool = False
+    request_id: str = ""
+    stdout_spill: Optional[SpilledOutput] = None
+    artifacts: List[Artifact] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        """Whether the code ran and exited successfully."""
+        return self.error is None and self.exit_code == 0
+
+    @property
+    def output(self) -> str:
+        """The string returned by ``LLMPythonCodeExecutor.execute``."""
+        return self.error if self.error is not None else self.stdout
+
+    @property
+    def total_time(self) -> float:
+        """The seconds spent in all the timed stages."""
+        return sum(self.timings.values())
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """
+        Times a stage of the execution, adding its duration to ``timings``.
+
+        Args:
+            name (str): The stage name, one of ``STAGES``.
+
+        Raises:
+            ValueError: If the stage name is unknown.
+        """
+        if name not in STAGES:
+            raise ValueError(f"unknown stage {name}, expected one of {STAGES}")
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = (
+                self.timings.get(name, 0.0) + time.perf_counter() - start
+            )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Returns the result as a JSON serializable dictionary.
+
+        The spilled output and the artifacts are left out, their files belong to the
+        process holding the result.
+
+        Returns:
+            Dict[str, Any]: The fields of the result, ``usage`` as a dictionary.
+        """
+        return {
+            "stdout": self.stdout,
+            "stderr": self.stderr,
+            "exit_code": self.exit_code,
+            "timings": dict(self.timings),
+            "usage": asdict(self.usage) if self.usage is not None else None,
+            "error": self.error,
+            "cached": self.cached,
+            "request_id": self.request_id,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ExecutionResult":
+        """
+        Builds a result from the dictionary returned by ``to_dict``.
+
+        Args:
+            data (Dict[str, Any]): The fields of the result.
+
+        Returns:
+            ExecutionResult: The result.
+        """
+        usage = data.get("usage")
+        return cls(
+            stdout=data.get("stdout", ""),
+            stderr=data.get("stderr", ""),
+            exit_code=data.get("exit_code"),
+            timings=dict(data.get("timings", {})),
+            usage=ResourceUsage(**usage) if usage is not None else None,
+            error=data.get("error"),
+            cached=data.get("cached", False),
+            request_id=data.get("request_id", ""),
+        )
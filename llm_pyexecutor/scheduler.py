@@ -0,0 +1,334 @@
+import heapq
+import itertools
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Callable, List, Optional, Tuple
+
+from llm_pyexecutor.exceptions import SchedulerFullError
+from llm_pyexecutor.result import ExecutionResult
+
+if TYPE_CHECKING:
+    from llm_pyexecutor.local_executor import LLMPythonCodeExecutor
+
+# Priority classes, executions of a lower rank are dequeued first.
+PRIORITIES = {"high": 0, "normal": 1, "low": 2}
+
+
+@dataclass
+class SchedulerMetrics:
+    """
+    A snapshot of the counters of an ``ExecutionScheduler``.
+
+    Attributes:
+        submitted (int): The executions accepted in the queue.
+        rejected (int): The executions rejected because the queue was full.
+        completed (int): The executions that finished, successfully or not.
+        cancelled (int): The queued executions cancelled before they started.
+        running (int): The executions running now.
+        queued (int): The executions waiting in the queue now.
+        queue_wait_total (float): The seconds the started executions spent queued.
+        queue_wait_max (float): The longest time an execution spent queued.
+    """
+
+    submitted: int = 0
+    rejected: int = 0
+    completed: int = 0
+    cancelled: int = 0
+    running: int = 0
+    queued: int = 0
+    queue_wait_total: float = 0.0
+    queue_wait_max: float = 0.0
+
+    @property
+    def queue_wait_mean(self) -> float:
+        """The mean seconds an execution spent queued before it started."""
+        started = self.completed + self.running
+        return self.queue_wait_total / started if started > 0 else 0.0
+
+
+class ExecutionScheduler:
+    """
+    Admission control in front of ``LLMPythonCodeExecutor.execute``.
+
+    At most ``max_workers`` executions run at the same time, the others wait in a
+    bounded queue ordered by priority class and then by arrival. When the queue is
+    full new executions are rejected right away with ``SchedulerFullError``, so an
+    overload turns into bounded queueing and fast failures instead of a pile-up of
+    interpreters. The time every execution spent queued is recorded as the
+    "queue_wait" stage of its result and aggregated in ``metrics``.
+
+    Attributes:
+        executor (LLMPythonCodeExecutor): The executor running the code.
+        max_workers (int): The maximum number of concurrent executions.
+        max_queue (int): The maximum number of queued executions.
+    """
+
+    def __init__(
+        self,
+        executor: "LLMPythonCodeExecutor",
+        max_workers: Optional[int] = None,
+        max_queue: int = 64,
+    ) -> None:
+        """
+        Initializes the scheduler, its worker threads start with the first execution.
+
+        Args:
+            executor (LLMPythonCodeExecutor): The executor running the code.
+            max_workers (Optional[int]): The maximum number of concurrent executions
+                (default is None, the ``max_concurrency`` of the executor, which
+                defaults to the number of CPUs).
+            max_queue (int): The maximum number of queued executions, beyond which
+                executions are rejected (default is 64).
+
+        Raises:
+            ValueError: If max_workers or max_queue is less than 1.
+        """
+        self.executor = executor
+        self.max_workers = max_workers or executor.max_concurrency
+        self.max_queue = max_queue
+        if self.max_workers < 1:
+            raise ValueError("max_workers must be greater than 0")
+        if max_queue < 1:
+            raise ValueError("max_queue must be greater than 0")
+        self._queue: List[Tuple[int, int, float, Future, Callable[[float], Any]]] = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._workers: List[threading.Thread] = []
+        self._metrics = SchedulerMetrics()
+        self._closed = False
+
+    def _start_workers(self) -> None:
+        """Starts the worker threads, called with the condition held."""
+        while len(self._workers) < self.max_workers:
+            worker = threading.Thread(
+                target=self._work,
+                name=f"llm-pyexecutor-scheduler-{len(self._workers)}",
+                daemon=True,
+            )
+            worker.start()
+            self._workers.append(worker)
+
+    def submit(
+        self, text: str, priority: str = "normal", use_cache: bool = True
+    ) -> "Future[ExecutionResult]":
+        """
+        Queues the execution of a text.
+
+        Args:
+            text (str): The input text containing Python code to be executed.
+            priority (str): The priority class, "high", "normal" or "low" (default
+                is "normal").
+            use_cache (bool): Whether the result cache may be used.
+
+        Returns:
+            Future[ExecutionResult]: The future of the detailed result. Cancelling
+            it before the execution starts removes the execution from the queue.
+
+        Raises:
+            TypeError: If the provided text argument is not a string.
+            ValueError: If the priority class is unknown.
+            SchedulerFullError: If the queue is full.
+            RuntimeError: If the scheduler is closed.
+        """
+        if not isinstance(text, str):
+            raise TypeError("Expected text argument to be string")
+
+        def run(queue_wait: float) -> ExecutionResult:
+            result = self.executor.execute_detailed(text, use_cache)
+            result.timings["queue_wait"] = queue_wait
+            return result
+
+        return self._enqueue(run, priority)
+
+    def submit_call(self, fn: Callable[[], Any], priority: str = "normal") -> Future:
+        """
+        Queues a call that uses the executor, e.g. a streamed execution, so that it
+        takes a worker slot like the executions of ``submit``.
+
+        Args:
+            fn (Callable[[], Any]): The call, run on a worker thread.
+            priority (str): The priority class, "high", "normal" or "low" (default
+                is "normal").
+
+        Returns:
+            Future: The future of the return value of the call. Cancelling it
+            before the call starts removes the call from the queue.
+
+        Raises:
+            ValueError: If the priority class is unknown.
+            SchedulerFullError: If the queue is full.
+            RuntimeError: If the scheduler is closed.
+        """
+        return self._enqueue(lambda queue_wait: fn(), priority)
+
+    def _enqueue(self, run: Callable[[float], Any], priority: str) -> Future:
+        """Queues a call taking the seconds it spent queued."""
+        if priority not in PRIORITIES:
+            raise ValueError(
+                f"unknown priority {priority}, expected one of {list(PRIORITIES)}"
+            )
+        future: Future = Future()
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("the execution scheduler is closed")
+            if len(self._queue) >= self.max_queue:
+                self._metrics.rejected += 1
+                self.executor._logger.warning(
+                    f"Execution rejected, {len(self._queue)} executions queued"
+                )
+                raise SchedulerFullError(self.max_queue)
+            heapq.heappush(
+                self._queue,
+                (
+                    PRIORITIES[priority],
+                    next(self._sequence),
+                    time.perf_counter(),
+                    future,
+                    run,
+                ),
+            )
+            future.add_done_callback(self._discard)
+            self._metrics.submitted += 1
+            self._start_workers()
+            self._condition.notify()
+        return future
+
+    def _discard(self, future: Future) -> None:
+        """Removes a cancelled execution from the queue, freeing its place."""
+        if not future.cancelled():
+            return
+        with self._condition:
+            for position, entry in enumerate(self._queue):
+                if entry[3] is future:
+                    self._queue[position] = self._queue[-1]
+                    self._queue.pop()
+                    heapq.heapify(self._queue)
+                    self._metrics.cancelled += 1
+                    return
+
+    def _work(self) -> None:
+        """Runs queued executions until the scheduler is closed."""
+        while True:
+            with self._condition:
+                while not self._queue and not self._closed:
+                    self._condition.wait()
+                if not self._queue:
+                    return
+                _, _, enqueued, future, run = heapq.heappop(self._queue)
+                if not future.set_running_or_notify_cancel():
+                    # Cancelled after it was popped, ``_discard`` did not find it.
+                    self._metrics.cancelled += 1
+                    continue
+                queue_wait = time.perf_counter() - enqueued
+                self._metrics.running += 1
+                self._metrics.queue_wait_total += queue_wait
+                self._metrics.queue_wait_max = max(
+                    self._metrics.queue_wait_max, queue_wait
+                )
+            try:
+                future.set_result(run(queue_wait))
+            except BaseException as error:
+                future.set_exception(error)
+            finally:
+                with self._condition:
+                    self._metrics.running -= 1
+                    self._metrics.completed += 1
+
+    def execute_detailed(
+        self, text: str, priority: str = "normal", use_cache: bool = True
+    ) -> ExecutionResult:
+        """
+        Executes a text once a worker is free and returns its detailed result.
+
+        Args:
+            text (str): The input text containing Python code to be executed.
+            priority (str): The priority class, "high", "normal" or "low".
+            use_cache (bool): Whether the result cache may be used.
+
+        Returns:
+            ExecutionResult: The result of ``LLMPythonCodeExecutor.execute_detailed``
+            with the "queue_wait" stage.
+
+        Raises:
+            SchedulerFullError: If the queue is full.
+        """
+        return self.submit(text, priority, use_cache).result()
+
+    def execute(
+        self, text: str, priority: str = "normal", use_cache: bool = True
+    ) -> str:
+        """
+        Executes a text once a worker is free.
+
+        Args:
+            text (str): The input text containing Python code to be executed.
+            priority (str): The priority class, "high", "normal" or "low".
+            use_cache (bool): Whether the result cache may be used.
+
+        Returns:
+            str: The result of the code execution or an error message.
+
+        Raises:
+            SchedulerFullError: If the queue is full.
+        """
+        return self.execute_detailed(text, priority, use_cache).output
+
+    async def aexecute(
+        self, text: str, priority: str = "normal", use_cache: bool = True
+    ) -> str:
+        """
+        Asynchronous version of ``execute``, cancelling the calling task removes a
+        queued execution from the queue.
+
+        Args:
+            text (str): The input text containing Python code to be executed.
+            priority (str): The priority class, "high", "normal" or "low".
+            use_cache (bool): Whether the result cache may be used.
+
+        Returns:
+            str: The result of the code execution or an error message.
+
+        Raises:
+            SchedulerFullError: If the queue is full.
+        """
+        import asyncio
+
+        result = await asyncio.wrap_future(self.submit(text, priority, use_cache))
+        return result.output
+
+    def metrics(self) -> SchedulerMetrics:
+        """
+        Returns a snapshot of the scheduler counters.
+
+        Returns:
+            SchedulerMetrics: The counters and queue wait times.
+        """
+        with self._condition:
+            snapshot = SchedulerMetrics(**vars(self._metrics))
+            snapshot.queued = len(self._queue)
+        return snapshot
+
+    def close(self, cancel_queued: bool = False) -> None:
+        """
+        Stops accepting executions and waits for the worker threads to finish.
+
+        Args:
+            cancel_queued (bool): Whether the queued executions are cancelled
+                instead of being run first (default is False).
+        """
+        with self._condition:
+            self._closed = True
+            if cancel_queued:
+                for _, _, _, future, _ in list(self._queue):
+                    future.cancel()
+            self._condition.notify_all()
+        for worker in self._workers:
+            worker.join()
+
+    def __enter__(self) -> "ExecutionScheduler":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
@@ -0,0 +1,650 @@
+import hmac
+import json
+import os
+import queue
+import secrets
+import socket
+import socketserver
+import stat
+import threading
+from dataclasses import asdict
+from http import HTTPStatus
+from http.client import HTTPConnection, HTTPResponse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from llm_pyexecutor.code.executor import OutputChunk
+from llm_pyexecutor.exceptions import ExecutorServerError, SchedulerFullError
+from llm_pyexecutor.result import ExecutionResult
+from llm_pyexecutor.scheduler import ExecutionScheduler
+
+if TYPE_CHECKING:
+    from llm_pyexecutor.local_executor import LLMPythonCodeExecutor
+
+UNIX_SCHEME = "unix://"
+
+# The Host header values of local requests, anything else is a DNS rebinding.
+LOCAL_HOSTS = ("localhost", "127.0.0.1", "[::1]")
+
+
+class _UnixHTTPServer(socketserver.ThreadingUnixStreamServer):
+    """An HTTP server listening on a Unix socket."""
+
+    daemon_threads = True
+
+    def get_request(self) -> Tuple[socket.socket, Tuple[str, int]]:
+        # Unix sockets have no peer address, the request handler expects a host.
+        request, _ = super().get_request()
+        return request, ("local", 0)
+
+
+def _remove_socket(path: str) -> None:
+    """
+    Removes the Unix socket at a path, if any.
+
+    Raises:
+        FileExistsError: If the path exists and is not a socket.
+    """
+    try:
+        mode = os.lstat(path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise FileExistsError(f"{path} exists and is not a Unix socket")
+    os.remove(path)
+
+
+class _ExecutorRequestHandler(BaseHTTPRequestHandler):
+    """Serves the requests of an ``ExecutorServer``, one JSON body per request."""
+
+    server_version = "llm-pyexecutor"
+
+    @property
+    def _executor_server(self) -> "ExecutorServer":
+        return self.server.executor_server
+
+    def log_message(self, format: str, *args: Any) -> None:
+        self._executor_server.executor._logger.debug(
+            f"{self.address_string()} {format % args}"
+        )
+
+    def _send_json(
+        self,
+        status: int,
+        payload: Dict[str, Any],
+        headers: Optional[Dict[str, str]] = None,
+    ) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _authorize(self) -> bool:
+        """
+        Rejects the requests a web page could make, answering them with an error.
+
+        Browsers send an Origin header with cross-origin requests and the Host they
+        resolved, so both are checked before the token, see ``ExecutorServer``.
+
+        Returns:
+            bool: True if the request may be served.
+        """
+        host = self.headers.get("Host", "").lower()
+        if not host.endswith("]"):
+            host = host.rsplit(":", 1)[0]
+        if host not in LOCAL_HOSTS:
+            self._send_json(HTTPStatus.FORBIDDEN, {"error": "non-local Host header"})
+            return False
+        if "Origin" in self.headers:
+            self._send_json(
+                HTTPStatus.FORBIDDEN, {"error": "cross-origin requests are refused"}
+            )
+            return False
+        token = self._executor_server.token
+        if token is not None and not hmac.compare_digest(
+            self.headers.get("Authorization", ""), f"Bearer {token}"
+        ):
+            self._send_json(
+                HTTPStatus.UNAUTHORIZED,
+                {"error": "missing or invalid bearer token"},
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+            return False
+        return True
+
+    def _read_json(self) -> Dict[str, Any]:
+        length = int(self.headers.get("Content-Length", 0))
+        data = json.loads(self.rfile.read(length) or b"{}")
+        if not isinstance(data, dict):
+            raise ValueError("Expected the request body to be a JSON object")
+        return data
+
+    def do_GET(self) -> None:
+        if not self._authorize():
+            return
+        if self.path == "/health":
+            self._send_json(HTTPStatus.OK, {"status": "ok"})
+        elif self.path == "/metrics":
+            metrics = self._executor_server.scheduler.metrics()
+            payload = asdict(metrics)
+            payload["queue_wait_mean"] = metrics.queue_wait_mean
+            self._send_json(HTTPStatus.OK, payload)
+        else:
+            self._send_json(HTTPStatus.NOT_FOUND, {"error": f"unknown {self.path}"})
+
+    def do_POST(self) -> None:
+        if not self._authorize():
+            return
+        content_type = self.headers.get("Content-Type", "")
+        if content_type.split(";")[0].strip().lower() != "application/json":
+            self._send_json(
+                HTTPStatus.UNSUPPORTED_MEDIA_TYPE,
+                {"error": "expected an application/json request body"},
+            )
+            return
+        routes = {
+            "/execute": self._execute,
+            "/batch": self._batch,
+            "/stream": self._stream,
+        }
+        route = routes.get(self.path)
+        if route is None:
+            self._send_json(HTTPStatus.NOT_FOUND, {"error": f"unknown {self.path}"})
+            return
+        try:
+            request = self._read_json()
+        except ValueError as error:
+            self._send_json(HTTPStatus.BAD_REQUEST, {"error": str(error)})
+            return
+        try:
+            route(request)
+        except (TypeError, ValueError) as error:
+            self._send_json(HTTPStatus.BAD_REQUEST, {"error": str(error)})
+        except SchedulerFullError as error:
+            self._send_json(
+                HTTPStatus.SERVICE_UNAVAILABLE,
+                {"error": str(error), "max_queue": error.max_queue},
+                headers={"Retry-After": "1"},
+            )
+        except Exception as error:
+            self._send_json(HTTPStatus.INTERNAL_SERVER_ERROR, {"error": str(error)})
+
+    def _execute(self, request: Dict[str, Any]) -> None:
+        future = self._executor_server.scheduler.submit(
+            request.get("text"),
+            priority=request.get("priority", "normal"),
+            use_cache=request.get("use_cache", True),
+        )
+        self._send_json(HTTPStatus.OK, future.result().to_dict())
+
+    def _batch(self, request: Dict[str, Any]) -> None:
+        texts = request.get("texts")
+        if not isinstance(texts, list):
+            raise TypeError("Expected texts argument to be a list of strings")
+        executor = self._executor_server.executor
+        use_cache = request.get("use_cache", True)
+        # One scheduler entry for the whole batch, so it is accepted or rejected as
+        # a whole whatever its size, and its dependencies are installed together.
+        future = self._executor_server.scheduler.submit_call(
+            lambda: executor.execute_many(texts, use_cache=use_cache),
+            priority=request.get("priority", "normal"),
+        )
+        self._send_json(HTTPStatus.OK, {"results": future.result()})
+
+    def _stream(self, request: Dict[str, Any]) -> None:
+        text = request.get("text")
+        if not isinstance(text, str):
+            raise TypeError("Expected text argument to be string")
+        executor = self._executor_server.executor
+        chunks: "queue.Queue[Optional[OutputChunk]]" = queue.Queue()
+        disconnected = threading.Event()
+
+        def run() -> None:
+            # Runs on a scheduler worker, the chunks are written by this handler.
+            stream = executor.execute_stream(text)
+            try:
+                for chunk in stream:
+                    if disconnected.is_set():
+                        break
+                    chunks.put(chunk)
+            finally:
+                stream.close()
+                chunks.put(None)
+
+        future = self._executor_server.scheduler.submit_call(
+            run, priority=request.get("priority", "normal")
+        )
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.end_headers()
+        try:
+            while True:
+                chunk = chunks.get()
+                if chunk is None:
+                    break
+                line = json.dumps({"stream": chunk.stream, "data": chunk.data})
+                self.wfile.write(line.encode("utf-8") + b"\n")
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            executor._logger.warning(
+                "stream client disconnected, stopping the execution"
+            )
+            disconnected.set()
+            future.cancel()
+            return
+        error = future.exception()
+        if error is not None:
+            executor._logger.error(f"streamed execution failed: {error}")
+
+
+class ExecutorServer:
+    """
+    Serves one ``LLMPythonCodeExecutor`` to the processes of a node.
+
+    The processes share the warm virtual environment, workers, zygote and result
+    cache of the executor, and its package installs, instead of building an
+    executor each. The server speaks JSON over HTTP on localhost or on a Unix
+    socket, see ``ExecutorClient``:
+
+    - ``POST /execute`` runs a text through an ``ExecutionScheduler`` and returns
+      the detailed result, or 503 when the scheduler queue is full.
+    - ``POST /batch`` runs texts with ``execute_many`` as one scheduled execution,
+      or returns 503 when the scheduler queue is full.
+    - ``POST /stream`` takes a scheduler slot and streams the output chunks as
+      JSON lines, or returns 503 when the scheduler queue is full.
+    - ``GET /health`` and ``GET /metrics`` report the server and scheduler state.
+
+    Any caller that gets a request through runs code, so requests a web page could
+    forge are refused: a Host header other than localhost (DNS rebinding) or an
+    Origin header is rejected with 403 and a POST body that is not
+    application/json with 415. Over TCP every request must also carry the bearer
+    ``token``, a Unix socket is only reachable by the user running the server and
+    needs no token unless one is given.
+
+    Attributes:
+        executor (LLMPythonCodeExecutor): The executor serving the requests.
+        scheduler (ExecutionScheduler): The scheduler of the execution requests.
+        unix_socket (Optional[str]): The path of the Unix socket, if any.
+        token (Optional[str]): The bearer token clients must send, None on a Unix
+            socket without a token.
+    """
+
+    def __init__(
+        self,
+        executor: "LLMPythonCodeExecutor",
+        host: str = "127.0.0.1",
+        port: int = 8765,
+        unix_socket: Optional[str] = None,
+        max_workers: Optional[int] = None,
+        max_queue: int = 64,
+        token: Optional[str] = None,
+    ) -> None:
+        """
+        Binds the server, requests are served once ``start`` or ``serve_forever``
+        is called.
+
+        Args:
+            executor (LLMPythonCodeExecutor): The executor serving the requests.
+            host (str): The address the HTTP server listens on (default is
+                "127.0.0.1", only local processes can connect).
+            port (int): The port of the HTTP server, 0 picks a free one (default is
+                8765).
+            unix_socket (Optional[str]): The path of a Unix socket to listen on
+                instead of host and port, it is only accessible to the user running
+                the server. A stale socket at the path is replaced (default is None).
+            max_workers (Optional[int]): The maximum number of concurrent
+                executions (default is None, the ``max_concurrency`` of the
+                executor).
+            max_queue (int): The maximum number of queued executions (default is
+                64).
+            token (Optional[str]): The bearer token clients must send (default is
+                None, a random token over TCP and no token on a Unix socket).
+
+        Raises:
+            FileExistsError: If the Unix socket path exists and is not a socket.
+        """
+        self.executor = executor
+        self.scheduler = ExecutionScheduler(executor, max_workers, max_queue)
+        self.unix_socket = unix_socket
+        if token is None and unix_socket is None:
+            token = secrets.token_urlsafe(32)
+        self.token = token
+        if unix_socket is not None:
+            _remove_socket(unix_socket)
+            # The socket is created with mode 0600, there is no window in which
+            # other users can connect before it is restricted.
+            umask = os.umask(0o177)
+            try:
+                self._httpd = _UnixHTTPServer(unix_socket, _ExecutorRequestHandler)
+            finally:
+                os.umask(umask)
+        else:
+            self._httpd = ThreadingHTTPServer((host, port), _ExecutorRequestHandler)
+        self._httpd.executor_server = self
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def address(self) -> str:
+        """The address clients connect to, e.g. "http://127.0.0.1:8765"."""
+        if self.unix_socket is not None:
+            return f"{UNIX_SCHEME}{self.unix_socket}"
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def serve_forever(self) -> None:
+        """Serves requests until ``close`` is called from another thread."""
+        self.executor._logger.info(f"execution server listening on {self.address}")
+        self._httpd.serve_forever()
+
+    def start(self) -> None:
+        """Serves requests on a background thread."""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+
+    def close(self) -> None:
+        """Stops serving, waits for the scheduled executions and unbinds the server."""
+        if self._thread is not None:
+            self._httpd.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._httpd.server_close()
+        self.scheduler.close()
+        if self.unix_socket is not None:
+            try:
+                _remove_socket(self.unix_socket)
+            except FileExistsError:
+                # Something else replaced the socket, it is not ours to remove.
+                pass
+
+    def __enter__(self) -> "ExecutorServer":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+class _UnixHTTPConnection(HTTPConnection):
+    """An HTTP connection over a Unix socket."""
+
+    def __init__(self, path: str, timeout: Optional[float] = None) -> None:
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = path
+
+    def connect(self) -> None:
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+class ExecutorClient:
+    """
+    A client of an ``ExecutorServer``, mirroring the execution API of
+    ``LLMPythonCodeExecutor``.
+
+    Every call opens a new connection, so a client can be shared by threads and
+    used after a fork.
+
+    Attributes:
+        address (str): The address of the server, "http://host:port" or
+            "unix:///path/to/socket".
+        timeout (Optional[float]): The socket timeout in seconds.
+        token (Optional[str]): The bearer token of the server, if any.
+    """
+
+    def __init__(
+        self,
+        address: str,
+        timeout: Optional[float] = None,
+        token: Optional[str] = None,
+    ) -> None:
+        """
+        Initializes the client, no connection is made until the first call.
+
+        Args:
+            address (str): The address of the server, "http://host:port" or
+                "unix:///path/to/socket", see ``ExecutorServer.address``.
+            timeout (Optional[float]): The socket timeout in seconds (default is
+                None, no timeout).
+            token (Optional[str]): The bearer token of the server, see
+                ``ExecutorServer.token`` (default is None, no token).
+
+        Raises:
+            ValueError: If the address is neither an HTTP nor a Unix socket address.
+        """
+        self.address = address
+        self.timeout = timeout
+        self.token = token
+        if not address.startswith(UNIX_SCHEME):
+            url = urlsplit(address)
+            if url.scheme != "http" or url.hostname is None:
+                raise ValueError(f"unsupported execution server address {address}")
+            self._host, self._port = url.hostname, url.port or 80
+
+    def _connect(self) -> HTTPConnection:
+        if self.address.startswith(UNIX_SCHEME):
+            return _UnixHTTPConnection(
+                self.address[len(UNIX_SCHEME) :], timeout=self.timeout
+            )
+        return HTTPConnection(self._host, self._port, timeout=self.timeout)
+
+    def _headers(self) -> Dict[str, str]:
+        headers = {"Content-Type": "application/json"}
+        if self.token is not None:
+            headers["Authorization"] = f"Bearer {self.token}"
+        return headers
+
+    @staticmethod
+    def _check(response: HTTPResponse) -> None:
+        """Raises the error of a failed response."""
+        if response.status == HTTPStatus.OK:
+            return
+        payload = json.loads(response.read() or b"{}")
+        if response.status == HTTPStatus.SERVICE_UNAVAILABLE:
+            raise SchedulerFullError(payload.get("max_queue", 0))
+        raise ExecutorServerError(response.status, payload.get("error", ""))
+
+    def _request(
+        self, method: str, path: str, payload: Optional[Dict[str, Any]] = None
+    ) -> Any:
+        connection = self._connect()
+        try:
+            body = json.dumps(payload).encode("utf-8") if payload is not None else None
+            connection.request(method, path, body=body, headers=self._headers())
+            response = connection.getresponse()
+            self._check(response)
+            return json.loads(response.read())
+        finally:
+            connection.close()
+
+    def execute_detailed(
+        self, text: str, use_cache: bool = True, priority: str = "normal"
+    ) -> ExecutionResult:
+        """
+        Executes a text on the server and returns its structured result.
+
+        Args:
+            text (str): The input text containing Python code to be executed.
+            use_cache (bool): Whether the result cache may be used.
+            priority (str): The priority class, "high", "normal" or "low".
+
+        Returns:
+            ExecutionResult: The result, without spilled output and artifacts.
+
+        Raises:
+            SchedulerFullError: If the server queue is full.
+            ExecutorServerError: If the server rejects the request.
+        """
+        data = self._request(
+            "POST",
+            "/execute",
+            {"text": text, "use_cache": use_cache, "priority": priority},
+        )
+        return ExecutionResult.from_dict(data)
+
+    def execute(
+        self, text: str, use_cache: bool = True, priority: str = "normal"
+    ) -> str:
+        """
+        Executes a text on the server.
+
+        Args:
+            text (str): The input text containing Python code to be executed.
+            use_cache (bool): Whether the result cache may be used.
+            priority (str): The priority class, "high", "normal" or "low".
+
+        Returns:
+            str: The result of the code execution or an error message.
+
+        Raises:
+            SchedulerFullError: If the server queue is full.
+            ExecutorServerError: If the server rejects the request.
+        """
+        return self.execute_detailed(text, use_cache, priority).output
+
+    def execute_many(
+        self, texts: List[str], use_cache: bool = True, priority: str = "normal"
+    ) -> List[str]:
+        """
+        Executes texts on the server as one batch, see
+        ``LLMPythonCodeExecutor.execute_many``. The batch takes one place in the
+        server queue.
+
+        Args:
+            texts (List[str]): The input texts containing Python code to be executed.
+            use_cache (bool): Whether the result cache may be used.
+            priority (str): The priority class, "high", "normal" or "low".
+
+        Returns:
+            List[str]: The result of every code execution, or its error message.
+
+        Raises:
+            SchedulerFullError: If the server queue is full.
+            ExecutorServerError: If the server rejects the request.
+        """
+        return self._request(
+            "POST",
+            "/batch",
+            {"texts": texts, "use_cache": use_cache, "priority": priority},
+        )["results"]
+
+    def execute_stream(
+        self, text: str, priority: str = "normal"
+    ) -> Iterator[OutputChunk]:
+        """
+        Executes a text on the server and yields its output as it is produced.
+
+        Args:
+            text (str): The input text containing Python code to be executed.
+            priority (str): The priority class, "high", "normal" or "low".
+
+        Yields:
+            OutputChunk: The stdout and stderr chunks of the execution.
+
+        Raises:
+            SchedulerFullError: If the server queue is full.
+            ExecutorServerError: If the server rejects the request.
+        """
+        connection = self._connect()
+        try:
+            connection.request(
+                "POST",
+                "/stream",
+                body=json.dumps({"text": text, "priority": priority}).encode("utf-8"),
+                headers=self._headers(),
+            )
+            response = connection.getresponse()
+            self._check(response)
+            for line in response:
+                chunk = json.loads(line)
+                yield OutputChunk(chunk["stream"], chunk["data"])
+        finally:
+            connection.close()
+
+    def health(self) -> bool:
+        """
+        Checks whether the server answers.
+
+        Returns:
+            bool: True if the server is up, False if it cannot be reached.
+        """
+        try:
+            return self._request("GET", "/health")["status"] == "ok"
+        except OSError:
+            return False
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Returns the scheduler metrics of the server.
+
+        Returns:
+            Dict[str, Any]: The fields of ``SchedulerMetrics`` and the mean queue
+            wait.
+        """
+        return self._request("GET", "/metrics")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    Runs an execution server from the command line, e.g.
+    ``python -m llm_pyexecutor.server --unix-socket /tmp/llm_pyexecutor.sock``.
+
+    Args:
+        argv (Optional[List[str]]): The command line arguments (default is None,
+            ``sys.argv``).
+    """
+    import argparse
+
+    from llm_pyexecutor.local_executor import LLMPythonCodeExecutor
+
+    parser = argparse.ArgumentParser(
+        description="Share one warm LLMPythonCodeExecutor with local processes."
+    )
+    parser.add_argument("--executor-dir", default=".")
+    parser.add_argument("--name", default="local_executor")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix-socket", default=None)
+    parser.add_argument("--worker-pool-size", type=int, default=0)
+    parser.add_argument("--cache-size", type=int, default=0)
+    parser.add_argument("--max-workers", type=int, default=None)
+    parser.add_argument("--max-queue", type=int, default=64)
+    parser.add_argument(
+        "--token",
+        default=os.environ.get("LLM_PYEXECUTOR_TOKEN"),
+        help="the bearer token of the clients, a random one is printed over TCP",
+    )
+    args = parser.parse_args(argv)
+    executor = LLMPythonCodeExecutor(
+        name=args.name,
+        executor_dir_path=args.executor_dir,
+        worker_pool_size=args.worker_pool_size,
+        cache_size=args.cache_size,
+    )
+    executor.warmup()
+    server = ExecutorServer(
+        executor,
+        host=args.host,
+        port=args.port,
+        unix_socket=args.unix_socket,
+        max_workers=args.max_workers,
+        max_queue=args.max_queue,
+        token=args.token,
+    )
+    if server.token is not None and args.token is None:
+        print(f"bearer token: {server.token}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        executor.close()
+
+
+if __name__ == "__main__":
+    main()
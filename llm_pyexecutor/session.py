@@ -0,0 +1,158 @@
+import time
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+from llm_pyexecutor.code.exceptions import CodeExecutionError
+from llm_pyexecutor.code.resources import ResourceUsage
+from llm_pyexecutor.code.session import PythonSession
+from llm_pyexecutor.logger import ExecutorLogger
+from llm_pyexecutor.result import ExecutionResult
+
+if TYPE_CHECKING:
+    from llm_pyexecutor.local_executor import LLMPythonCodeExecutor
+
+
+class ExecutionSession:
+    """
+    A stateful execution session of an ``LLMPythonCodeExecutor``.
+
+    The code of every text runs in one interpreter kept alive in the executor
+    virtual environment, so the variables, functions and imports of a text are
+    available to the following ones, as in a notebook. The dependencies of every
+    text are installed before it runs, results are never cached.
+
+    Attributes:
+        session_id (str): The id of the session, logged with its records.
+    """
+
+    def __init__(
+        self,
+        executor: "LLMPythonCodeExecutor",
+        idle_timeout: Optional[float] = 600,
+        timeout: int = 120,
+    ) -> None:
+        """
+        Starts the session interpreter.
+
+        Args:
+            executor (LLMPythonCodeExecutor): The executor whose environment,
+                dependency handling and logger the session uses.
+            idle_timeout (Optional[float]): The number of idle seconds after which
+                the interpreter is stopped and the session closed (default is 600,
+                None keeps it until closed).
+            timeout (int): The maximum number of seconds the code of a text may
+                run, the session is closed when it is exceeded (default is 120).
+        """
+        self.session_id = ExecutorLogger.new_request_id()
+        self._executor = executor
+        self._session = PythonSession(
+            executor._executor_venv.get_pyexecutor(),
+            wd=str(executor.executor_dir_path),
+            timeout=timeout,
+            idle_timeout=idle_timeout,
+            limits=executor.resource_limits,
+        )
+        executor._logger.info(f"started python session {self.session_id}")
+
+    @property
+    def closed(self) -> bool:
+        """Whether the session interpreter was stopped."""
+        return self._session.closed
+
+    def run(self, text: str) -> ExecutionResult:
+        """
+        Runs the code of a text in the session.
+
+        Errors are not raised but recorded in the ``error`` field of the result, a
+        timeout or a crash of the interpreter also closes the session.
+
+        Args:
+            text (str): The input text containing Python code to be executed.
+
+        Returns:
+            ExecutionResult: The output, exit code, resource usage and stage timings
+            of the run.
+
+        Raises:
+            TypeError: If the provided text argument is not a string.
+            RuntimeError: If the session is closed.
+        """
+        if not isinstance(text, str):
+            raise TypeError("Expected text argument to be string")
+        if self.closed:
+            raise RuntimeError("the python session is closed")
+        executor = self._executor
+        result = ExecutionResult()
+        with executor._logger.request() as request_id:
+            result.request_id = request_id
+            executor._logger.info(f"running in python session {self.session_id}")
+            try:
+                code, uninstalled_deps, _ = executor._prepare(
+                    text, use_cache=False, record=result
+                )
+                if len(uninstalled_deps) > 0:
+                    executor._logger.info("Installing Dependencies in Progress!!!")
+                    with result.stage("pip_install"):
+                        executor._executor_venv.install_additional_dependencies(
+                            uninstalled_deps, str(executor.executor_dir_path)
+                        )
+                    executor._logger.info("Installation Successfully Completed!!")
+                with result.stage("code_run"):
+                    start = time.perf_counter()
+                    response = self._session.execute(
+                        executor._code_executor.runnable_source(code),
+                        str(executor.executor_dir_path),
+                    )
+                result.usage = ResourceUsage(
+                    wall_time=time.perf_counter() - start,
+                    user_cpu=response.get("user_cpu"),
+                    system_cpu=response.get("system_cpu"),
+                    peak_rss_bytes=response.get("execution_peak_rss"),
+                )
+                executor._logger.info(f"Resource Usage: {result.usage}")
+                result.stdout = response["stdout"]
+                result.stderr = response["stderr"]
+                result.exit_code = response["returncode"]
+                if result.exit_code != 0:
+                    raise CodeExecutionError(result.stderr)
+                executor._logger.payload("Code Execution Result", result.stdout)
+            except Exception:
+                result.error = executor._error_result()
+            finally:
+                executor._logger.info(f"Stage Timings: {result.timings}")
+        return result
+
+    def reset(self) -> None:
+        """
+        Clears the variables of the session, the imported modules stay loaded.
+
+        Raises:
+            RuntimeError: If the session is closed.
+        """
+        self._session.reset()
+        self._executor._logger.info(f"reset python session {self.session_id}")
+
+    def memory(self) -> Dict[str, Any]:
+        """
+        Reports the memory of the session interpreter.
+
+        Returns:
+            Dict[str, Any]: The current "rss" (None where it cannot be read) and
+            "peak_rss" of the interpreter in bytes and the names of the session
+            "globals".
+
+        Raises:
+            RuntimeError: If the session is closed.
+        """
+        return self._session.memory()
+
+    def close(self) -> None:
+        """Stops the session interpreter, the session state is lost."""
+        if not self._session.closed:
+            self._executor._logger.info(f"closed python session {self.session_id}")
+        self._session.close()
+
+    def __enter__(self) -> "ExecutionSession":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
@@ -0,0 +1,229 @@
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+from llm_pyexecutor.code import (
+    CodeUnit,
+    ExecutionResultCache,
+    PythonCodeExecutor,
+    PythonCodeExtractor,
+    PythonWorkerPool,
+    PythonZygote,
+    ResourceLimits,
+    extract_dependecies,
+    is_standard_package,
+)
+from llm_pyexecutor.constants import STANDARD_PKG_SCRIPT
+from llm_pyexecutor.fences import FencedBlockParser, parse_fenced_blocks
+
+
+def test_standard_packages_are_cached_on_disk(tmp_path, monkeypatch) -> None:
+    script_path = tmp_path / "is_standard_pkg.py"
+    script_path.write_text(STANDARD_PKG_SCRIPT, encoding="utf-8")
+    standard_deps = is_standard_package(sys.executable, str(script_path), ".")
+    assert {"os", "sys", "json"} <= standard_deps
+    assert (tmp_path / "is_standard_pkg.json").exists()
+
+    def fail(*args, **kwargs):
+        pytest.fail("standard packages must not be probed twice")
+
+    monkeypatch.setattr(subprocess, "run", fail)
+    assert is_standard_package(sys.executable, str(script_path), ".") is standard_deps
+
+
+def test_execution_result_cache_eviction(tmp_path, monkeypatch) -> None:
+    cache = ExecutionResultCache(max_entries=2, ttl=60, cache_dir=tmp_path)
+    keys = [ExecutionResultCache.make_key(f"print({i})", "venv") for i in range(3)]
+    for i, key in enumerate(keys):
+        cache.put(key, f"{i}\n")
+    assert cache.get(keys[0]) is None
+    assert cache.get(keys[2]) == "2\n"
+    assert ExecutionResultCache(max_entries=2, cache_dir=tmp_path).get(keys[1]) == "1\n"
+
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 120)
+    assert cache.get(keys[2]) is None
+
+
+@pytest.mark.skipif(sys.platform != "linux", reason="rlimits are enforced on linux")
+def test_resource_limits_and_usage(tmp_path) -> None:
+    executor = PythonCodeExecutor(limits=ResourceLimits(memory_bytes=512 * 1024**2))
+    result = executor.run_code(sys.executable, "print(sum(range(10**6)))", tmp_path)
+    assert result.returncode == 0
+    assert result.stdout == "499999500000\n"
+    assert result.usage.wall_time > 0
+    assert result.usage.user_cpu is not None
+    assert result.usage.peak_rss_bytes > 0
+
+    result = executor.run_code(sys.executable, "x = bytearray(1024**3)", tmp_path)
+    assert result.returncode != 0
+    assert "MemoryError" in result.stderr
+
+
+@pytest.mark.skipif(sys.platform != "linux", reason="peak rss is reset on linux")
+def test_worker_usage_reports_the_peak_of_each_execution(tmp_path) -> None:
+    pool = PythonWorkerPool(sys.executable, size=1)
+    executor = PythonCodeExecutor(worker_pool=pool)
+    try:
+        heavy = executor.run_code(
+            sys.executable, "x = bytearray(256 * 1024**2)\ndel x", tmp_path
+        )
+        light = executor.run_code(sys.executable, "print(1)", tmp_path)
+        assert heavy.usage.peak_rss_bytes > 256 * 1024**2
+        assert light.usage.peak_rss_bytes < 128 * 1024**2
+        assert pool._idle[0].peak_rss > 256 * 1024**2
+    finally:
+        pool.close()
+
+
+def test_interpreters_share_the_runtime(tmp_path) -> None:
+    pool = PythonWorkerPool(sys.executable, size=1)
+    zygote = PythonZygote(sys.executable, [])
+    backends = [
+        PythonCodeExecutor(),
+        PythonCodeExecutor(worker_pool=pool),
+        PythonCodeExecutor(zygote=zygote),
+    ]
+    try:
+        for executor in backends:
+            result = executor.run_code(
+                sys.executable, "print('out')\nimport sys\nsys.exit('bye')", tmp_path
+            )
+            assert (result.returncode, result.stdout) == (1, "out\n")
+            assert result.stderr.strip() == "bye"
+    finally:
+        pool.close()
+        zygote.close()
+
+
+def test_fenced_block_parser_streaming() -> None:
+    text = (
+        "Install it:\n```bash\npip install numpy, pandas\n```\n"
+        "Then run:\n```python\nimport numpy\nprint(1)\n```\n"
+        "Output:\n```\n1\n```\nand an unterminated ```py\nprint(2)"
+    )
+    blocks = parse_fenced_blocks(text)
+    assert [(block.kind, block.language) for block in blocks] == [
+        ("shell", "bash"),
+        ("python", "python"),
+        ("output", ""),
+        ("python", "py"),
+    ]
+    assert blocks[1].content == "\nimport numpy\nprint(1)\n"
+    assert text[blocks[1].start : blocks[1].end].startswith("```python")
+    assert not blocks[-1].closed
+
+    parser = FencedBlockParser()
+    streamed = []
+    for i in range(0, len(text), 2):
+        streamed.extend(parser.feed(text[i : i + 2]))
+    assert streamed + parser.close() == blocks
+
+
+def test_fenced_block_parser_is_linear() -> None:
+    def parse_time(text: str, chunk_size: int) -> float:
+        chunks = [text[i : i + chunk_size] for i in range(0, len(text), chunk_size)]
+        best = float("inf")
+        for _ in range(3):
+            start = time.perf_counter()
+            parse_fenced_blocks(chunks)
+            best = min(best, time.perf_counter() - start)
+        return best
+
+    response = "prose\n```python\nprint(1)\n```\n"
+    assert parse_time(response * 16000, 10**9) < 14 * parse_time(response * 2000, 10**9)
+    streamed = "```python\n" + "x = 1\n" * 100000
+    assert parse_time(streamed * 4, 16) < 8 * parse_time(streamed, 16)
+
+
+def test_code_unit_is_parsed_once(monkeypatch) -> None:
+    text = "```python\nimport os.path as p  # keep\nprint(p.sep)\n```"
+    unit = PythonCodeExtractor().extract_unit(text)
+    assert unit.source.startswith("import os.path as p  # keep\nprint(p.sep)\n")
+    assert unit.is_valid and unit.compiled.co_filename == "<llm_code>"
+
+    def fail(*args, **kwargs):
+        pytest.fail("a code unit must not be parsed again")
+
+    monkeypatch.setattr(CodeUnit, "__init__", fail)
+    assert extract_dependecies(unit) == [
+        {"module": "os", "name": "os.path", "alias": "p", "optional": False}
+    ]
+    assert PythonCodeExecutor().runnable_source(unit) == (
+        "import os.path as p\nprint(p.sep)\n"
+    )
+    executor = PythonCodeExecutor(normalize_code=False)
+    assert executor.runnable_source(unit) == unit.source
+    assert executor.execute_code(sys.executable, unit, ".") == "/\n"
+    monkeypatch.undo()
+    broken = CodeUnit("print(")
+    assert not broken.is_valid
+    with pytest.raises(SyntaxError):
+        broken.imports
+    CodeUnit("def f():\n    return 1\n").check_compiles()
+    with pytest.raises(SyntaxError):
+        CodeUnit("return 1\n").check_compiles()
+
+
+def test_extract_dependecies_walks_the_whole_tree() -> None:
+    code = (
+        "import importlib\n"
+        "from . import sibling\n"
+        "try:\n"
+        "    import ujson as json\n"
+        "except (ImportError, ValueError):\n"
+        "    import json\n"
+        "def load():\n"
+        "    import yaml\n"
+        "    return importlib.import_module('scipy.linalg')\n"
+        "class Model:\n"
+        "    if True:\n"
+        "        from sklearn import svm\n"
+        "with contextlib.suppress(ModuleNotFoundError):\n"
+        "    import rich\n"
+    )
+    deps = {dep["module"]: dep["optional"] for dep in extract_dependecies(code)}
+    assert deps == {
+        "importlib": False,
+        "ujson": True,
+        "json": False,
+        "yaml": False,
+        "scipy": False,
+        "sklearn": False,
+        "rich": True,
+    }
+
+
+def test_large_outputs_are_spilled_to_disk(tmp_path) -> None:
+    code = "print('a' * 5000 + 'b' * 5000)"
+    backends = [{}, {"worker_pool": PythonWorkerPool(sys.executable, size=1)}]
+    if hasattr(os, "fork"):
+        backends.append({"zygote": PythonZygote(sys.executable, [])})
+    for backend in backends:
+        executor = PythonCodeExecutor(
+            spill_threshold=1000, spill_dir=str(tmp_path / "outputs"), **backend
+        )
+        result = executor.run_code(sys.executable, code, tmp_path)
+        spilled = result.stdout_spill
+        assert spilled is not None and spilled.size == 10001
+        assert spilled.head(3) == "aaa" and spilled.tail(3) == "bb\n"
+        assert (
+            result.stdout.startswith("a" * 500) and "bytes truncated" in result.stdout
+        )
+        assert spilled.preview(10, "tail").endswith("b" * 9 + "\n")
+        assert len(spilled.read()) == 10001
+        spilled.close()
+        assert not os.path.exists(spilled.path)
+        small = executor.run_code(sys.executable, "print('ok')", tmp_path)
+        assert small.stdout == "ok\n" and small.stdout_spill is None
+        for component in backend.values():
+            component.close()
+    assert os.listdir(tmp_path / "outputs") == []
+
+    executor = PythonCodeExecutor(spill_threshold=1000)
+    output = asyncio.run(executor.aexecute_code(sys.executable, code, tmp_path))
+    assert "bytes truncated" in output and len(output) < 1100
@@ -0,0 +1,259 @@
+import asyncio
+import base64
+import hashlib
+import os
+import subprocess
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from llm_pyexecutor.environment_manager import (
+    ImportNameResolver,
+    InstalledDistributionIndex,
+    VenvTemplate,
+    VirtualEnvironmentManager,
+    VirtualEnvironmentPool,
+)
+from llm_pyexecutor.environment_manager import template as template_module
+from llm_pyexecutor.environment_manager.pool import _Baseline
+from llm_pyexecutor.logger import ExecutorLogger
+
+
+def _write_distribution(site_packages, name, version, top_level=None, record=None):
+    dist_info = site_packages / f"{name.replace('-', '_')}-{version}.dist-info"
+    dist_info.mkdir()
+    (dist_info / "METADATA").write_text(
+        f"Metadata-Version: 2.1\nName: {name}\nVersion: {version}\n\n",
+        encoding="utf-8",
+    )
+    if top_level is not None:
+        (dist_info / "top_level.txt").write_text(top_level, encoding="utf-8")
+    if record is not None:
+        (dist_info / "RECORD").write_text(record, encoding="utf-8")
+
+
+def test_installed_distribution_index(tmp_path) -> None:
+    _write_distribution(tmp_path, "scikit-learn", "1.5.0", top_level="sklearn\n")
+    _write_distribution(
+        tmp_path,
+        "PyYAML",
+        "6.0",
+        record="yaml/__init__.py,,\n_yaml/__init__.py,,\nPyYAML-6.0.dist-info/RECORD,,\n",
+    )
+    index = InstalledDistributionIndex(tmp_path)
+    assert index.distributions() == {"scikit-learn": "1.5.0", "pyyaml": "6.0"}
+    assert index.is_installed("sklearn")
+    assert index.is_installed("scikit_learn>=1.0")
+    assert index.missing(["yaml", "numpy", "pyyaml"]) == ["numpy"]
+
+    _write_distribution(tmp_path, "numpy", "2.0.0", top_level="numpy\n")
+    index.refresh()
+    assert index.missing(["numpy"]) == []
+
+
+def test_venv_template_clone(tmp_path) -> None:
+    template = VenvTemplate(tmp_path / "template", with_pip=False)
+    clone = template.clone(tmp_path / "clone" / ".venv")
+    assert not (clone / ".llm_pyexecutor_template.json").exists()
+    with open(clone / "pyvenv.cfg", "r", encoding="utf-8") as file:
+        assert str(template.path) not in file.read()
+    python = clone / ("Scripts" if os.name == "nt" else "bin") / "python"
+    prefix = subprocess.run(
+        [str(python), "-c", "import sys; print(sys.prefix)"],
+        capture_output=True,
+        encoding="utf-8",
+        check=True,
+    ).stdout.strip()
+    assert prefix == str(clone)
+    if os.name != "nt":
+        activate = (clone / "bin" / "activate").read_text(encoding="utf-8")
+        assert str(clone) in activate
+        script = Path("bin") / "Activate.ps1"
+        assert os.stat(clone / script).st_ino != os.stat(template.path / script).st_ino
+
+
+class _ListLogger:
+    def __init__(self) -> None:
+        self.messages = []
+
+    def info(self, message: str) -> None:
+        self.messages.append(message)
+
+
+def _template_with_package(path, logger):
+    template = VenvTemplate(path, with_pip=False, logger=logger)
+    site_packages = next(template.ensure().glob("lib/python*/site-packages"))
+    (site_packages / "shared").mkdir()
+    (site_packages / "shared" / "__init__.py").write_bytes(b"VALUE = 1\n")
+    _write_distribution(
+        site_packages,
+        "shared",
+        "1.0",
+        record="shared/__init__.py,sha256=digest,10\n",
+    )
+    return template, site_packages.relative_to(template.path) / "shared"
+
+
+@pytest.mark.skipif(not hasattr(os, "geteuid"), reason="hardlinks require POSIX")
+def test_venv_template_clone_hardlinks_package_files(tmp_path, monkeypatch) -> None:
+    logger = _ListLogger()
+    template, package = _template_with_package(tmp_path / "template", logger)
+    monkeypatch.setattr(os, "geteuid", lambda: 1000)
+    monkeypatch.setattr(template_module, "_reflink", lambda source, destination: False)
+    clone = template.clone(tmp_path / "clone" / ".venv")
+    linked = os.stat(clone / package / "__init__.py")
+    assert linked.st_ino == os.stat(template.path / package / "__init__.py").st_ino
+    assert linked.st_mode & 0o222 == 0
+    script = Path("bin") / "Activate.ps1"
+    assert os.stat(clone / script).st_ino != os.stat(template.path / script).st_ino
+    assert "1 hardlinked" in logger.messages[-1]
+
+    def link(source, destination):
+        raise OSError("hardlinks are not supported")
+
+    monkeypatch.setattr(os, "link", link)
+    clone = template.clone(tmp_path / "fallback" / ".venv")
+    copied = os.stat(clone / package / "__init__.py")
+    assert copied.st_ino != linked.st_ino
+    assert (clone / package / "__init__.py").read_bytes() == b"VALUE = 1\n"
+    assert "0 hardlinked" in logger.messages[-1]
+
+
+def test_async_install_waits_on_the_install_lock(tmp_path) -> None:
+    env = VirtualEnvironmentManager(
+        ".venv",
+        tmp_path,
+        ExecutorLogger(),
+        template=VenvTemplate(tmp_path / "template", with_pip=False),
+    )
+    _write_distribution(env.get_site_packages(), "junk", "1.0", top_level="junk\n")
+    env.get_installed_distributions().refresh()
+
+    async def install_while_locked():
+        cancelled = asyncio.create_task(env.ainstall_additional_dependencies(["junk"]))
+        await asyncio.sleep(0.1)
+        cancelled.cancel()
+        installs = [env.ainstall_additional_dependencies(["junk"]) for _ in range(3)]
+        threading.Timer(0.3, env._install_lock.release).start()
+        await asyncio.wait_for(asyncio.gather(*installs), timeout=10)
+        return cancelled.cancelled()
+
+    env._install_lock.acquire()
+    assert asyncio.run(install_while_locked())
+    assert env._install_lock.acquire(timeout=5)
+    env._install_lock.release()
+
+
+def test_virtual_environment_pool(tmp_path) -> None:
+    template = VenvTemplate(tmp_path / "template", with_pip=False)
+    pool = VirtualEnvironmentPool(
+        tmp_path / "pool", ExecutorLogger(), size=2, template=template
+    )
+    try:
+        with pool.session(timeout=60) as env:
+            site_packages = env.get_site_packages()
+            _write_distribution(site_packages, "junk", "1.0", top_level="junk\n")
+            (site_packages / "junk").mkdir()
+            assert env.get_installed_distributions().is_installed("junk")
+        for _ in range(3):
+            with pool.session(timeout=60) as env:
+                assert not (env.get_site_packages() / "junk").exists()
+                assert not env.get_installed_distributions().is_installed("junk")
+    finally:
+        pool.close()
+    assert list((tmp_path / "pool").iterdir()) == []
+
+
+def test_pooled_environments_are_isolated(tmp_path) -> None:
+    template = VenvTemplate(tmp_path / "template", with_pip=False)
+    site_packages = next(template.ensure().glob("lib/python*/site-packages"))
+    content = b"VALUE = 1\n"
+    digest = base64.urlsafe_b64encode(hashlib.sha256(content).digest()).rstrip(b"=")
+    (site_packages / "shared").mkdir()
+    (site_packages / "shared" / "__init__.py").write_bytes(content)
+    _write_distribution(
+        site_packages,
+        "shared",
+        "1.0",
+        record=f"shared/__init__.py,sha256={digest.decode()},{len(content)}\n",
+    )
+    read_value = "import shared; print(shared.VALUE)"
+    pool = VirtualEnvironmentPool(
+        tmp_path / "pool", ExecutorLogger(), size=1, template=template
+    )
+    try:
+        for write in (
+            "open(shared.__file__, 'a').write('VALUE = 2\\n')",
+            "import os; s = os.stat(shared.__file__); "
+            "open(shared.__file__, 'w').write('VALUE = 3\\n'); "
+            "os.utime(shared.__file__, ns=(s.st_atime_ns, s.st_mtime_ns))",
+        ):
+            with pool.session(timeout=60) as env:
+                result = subprocess.run(
+                    [env.get_pyexecutor(), "-c", f"import shared; {write}"],
+                    capture_output=True,
+                    encoding="utf-8",
+                )
+                # Installed files hardlinked from the template are read-only.
+                if result.returncode != 0:
+                    assert "PermissionError" in result.stderr
+                else:
+                    assert not pool._baselines[env.env_path].reset(env)
+            with pool.session(timeout=60) as env:
+                output = subprocess.run(
+                    [env.get_pyexecutor(), "-c", read_value],
+                    capture_output=True,
+                    encoding="utf-8",
+                    check=True,
+                ).stdout
+                assert output == "1\n"
+    finally:
+        pool.close()
+    assert (site_packages / "shared" / "__init__.py").read_bytes() == content
+
+
+def test_full_pool_destroys_returned_environments_without_reset(
+    tmp_path, monkeypatch
+) -> None:
+    template = VenvTemplate(tmp_path / "template", with_pip=False)
+    pool = VirtualEnvironmentPool(
+        tmp_path / "pool", ExecutorLogger(), size=1, template=template
+    )
+    resets = []
+    monkeypatch.setattr(_Baseline, "reset", lambda self, env: resets.append(env))
+    try:
+        env = pool.lease(timeout=60)
+        while pool._ready.qsize() == 0:
+            time.sleep(0.01)
+        pool.release(env)
+        deadline = time.monotonic() + 30
+        while env.env_path.exists() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert resets == [] and not env.env_path.exists()
+    finally:
+        pool.close()
+
+
+def test_import_name_resolver(tmp_path) -> None:
+    site_packages = tmp_path / "site-packages"
+    site_packages.mkdir()
+    _write_distribution(site_packages, "PyYAML", "6.0", top_level="yaml\n")
+    mapping_path = tmp_path / "import_names.json"
+    resolver = ImportNameResolver(
+        InstalledDistributionIndex(site_packages),
+        mapping_path=mapping_path,
+        mapping={"cv2": "opencv-python-headless"},
+    )
+    assert resolver.resolve("yaml") == "pyyaml"
+    assert resolver.resolve("sklearn") == "scikit-learn"
+    assert resolver.resolve("cv2") == "opencv-python-headless"
+    assert resolver.resolve("numpy") == "numpy"
+    assert resolver.resolve_many(["PIL", "numpy", "PIL"]) == ["pillow", "numpy"]
+
+    resolver.update({"foo": "foo-dist"})
+    assert ImportNameResolver(mapping_path=mapping_path).resolve("foo") == "foo-dist"
+    assert ImportNameResolver(mapping_path=mapping_path).resolve("cv2") == (
+        "opencv-python"
+    )
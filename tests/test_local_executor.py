@@ -1,6 +1,26 @@
+import asyncio
+import gc
+import http.client
+import json
 import pytest
 import os
-from llm_pyexecutor import LLMPythonCodeExecutor
+import socket
+import stat
+import subprocess
+import sys
+import threading
+import time
+import zipfile
+from typing import List
+from llm_pyexecutor import (
+    ExecutionScheduler,
+    ExecutorClient,
+    ExecutorServer,
+    ExecutorServerError,
+    LLMPythonCodeExecutor,
+    SchedulerFullError,
+)
+from llm_pyexecutor.logger import ExecutorLogger, _QueuedSink
 
 text_with_no_dependencies = (
     "here's a code to get the current working directory using python\n"
@@ -41,7 +61,7 @@ def test_if_local_executor_dir_exists(local_executor_instance) -> None:
 
 
 def test_local_executor_output_with_no_dependencies(local_executor_instance) -> None:
-    real = (f"{os.path.join(os.getcwd(), 'tests')}""\n")
+    real = f"{os.path.join(os.getcwd(), 'tests')}" "\n"
     output = local_executor_instance.execute(text_with_no_dependencies)
     assert output == real
 
@@ -50,3 +70,521 @@ def test_local_executor_output_with_dependencies(local_executor_instance) -> Non
     real = "Dot Product:\n[[ 58  64]\n [139 154]]\n"
     output = local_executor_instance.execute(text_with_dependencies)
     assert output == real
+
+
+def test_local_executor_output_with_worker_pool() -> None:
+    executor = LLMPythonCodeExecutor(executor_dir_path="tests", worker_pool_size=1)
+    real = f"{os.path.join(os.getcwd(), 'tests')}" "\n"
+    try:
+        assert executor.execute(text_with_no_dependencies) == real
+        assert executor.execute(text_with_no_dependencies) == real
+        assert executor._worker_pool._running == 1
+    finally:
+        executor.close()
+
+
+def test_local_executor_aexecute(local_executor_instance) -> None:
+    real = f"{os.path.join(os.getcwd(), 'tests')}" "\n"
+
+    async def run_many():
+        return await asyncio.gather(
+            *[
+                local_executor_instance.aexecute(text_with_no_dependencies)
+                for _ in range(3)
+            ]
+        )
+
+    assert asyncio.run(run_many()) == [real] * 3
+
+
+def test_local_executor_aexecute_cancellation(local_executor_instance) -> None:
+    text = "```python\nimport time\ntime.sleep(60)\n```"
+
+    async def run_cancelled():
+        await asyncio.wait_for(local_executor_instance.aexecute(text), timeout=1)
+
+    start = time.monotonic()
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(run_cancelled())
+    assert time.monotonic() - start < 10
+
+
+def test_local_executor_execute_many(local_executor_instance) -> None:
+    real = f"{os.path.join(os.getcwd(), 'tests')}" "\n"
+    texts = [
+        text_with_no_dependencies,
+        "```python\nraise ValueError('bad sample')\n```",
+        "```python\nprint(sum(range(4)))\n```",
+    ]
+    outputs = local_executor_instance.execute_many(texts, max_workers=2)
+    assert outputs[0] == real
+    assert outputs[1].startswith("Error Occured During Code Execution")
+    assert outputs[2] == "6\n"
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="zygote requires os.fork")
+def test_local_executor_output_with_zygote() -> None:
+    executor = LLMPythonCodeExecutor(
+        executor_dir_path="tests", preload_modules=["json", "missing_module"]
+    )
+    text = "```python\nimport sys\nprint('json' in sys.modules)\n```"
+    try:
+        assert executor.execute(text) == "True\n"
+        assert executor.execute(text_with_no_dependencies) == (
+            f"{os.path.join(os.getcwd(), 'tests')}" "\n"
+        )
+        assert executor._zygote.failed_modules == ["missing_module"]
+    finally:
+        executor.close()
+
+
+def test_local_executor_result_cache() -> None:
+    executor = LLMPythonCodeExecutor(executor_dir_path="tests", cache_size=8)
+    text = "```python\nimport random\nprint(random.random())\n```"
+    first = executor.execute(text)
+    assert executor.execute(text) == first
+    assert executor.execute(text, use_cache=False) != first
+
+
+def test_local_executor_aexecute_cache_hit_skips_the_probe(monkeypatch) -> None:
+    import llm_pyexecutor.code
+
+    executor = LLMPythonCodeExecutor(executor_dir_path="tests", cache_size=8)
+    text = "```python\nimport random\nprint(random.random())\n```"
+    first = asyncio.run(executor.aexecute(text))
+    probes = []
+
+    async def probe(*args):
+        probes.append(args)
+
+    monkeypatch.setattr(llm_pyexecutor.code, "ais_standard_package", probe)
+    monkeypatch.setattr(llm_pyexecutor.code, "is_standard_package", probe)
+    assert asyncio.run(executor.aexecute(text)) == first
+    assert probes == []
+
+
+def test_local_executor_execute_stream() -> None:
+    executor = LLMPythonCodeExecutor(executor_dir_path="tests")
+    chunks = list(executor.execute_stream(text_with_no_dependencies))
+    assert "".join(chunk.data for chunk in chunks if chunk.stream == "stdout") == (
+        f"{os.path.join(os.getcwd(), 'tests')}" "\n"
+    )
+
+    text = "```python\nwhile True:\n    print('x' * 32)\n```"
+    executor.max_output_bytes = 64
+    executor.output_limit_policy = "kill"
+    chunks = list(executor.execute_stream(text))
+    stdout = "".join(chunk.data for chunk in chunks if chunk.stream == "stdout")
+    assert len(stdout) == 64
+    assert "output limit" in chunks[-1].data
+
+    executor.output_limit_policy = "truncate"
+    start = time.monotonic()
+    chunks = list(executor.execute_stream(text))
+    assert time.monotonic() - start < 30
+    stdout = "".join(chunk.data for chunk in chunks if chunk.stream == "stdout")
+    assert len(stdout) == 64
+    assert "output truncated" in chunks[-2].data
+    assert "still writing output" in chunks[-1].data
+
+
+def test_local_executor_execute_detailed(local_executor_instance) -> None:
+    result = local_executor_instance.execute_detailed(text_with_no_dependencies)
+    assert result.ok
+    assert result.stdout == f"{os.path.join(os.getcwd(), 'tests')}" "\n"
+    assert {"extraction", "dependency_analysis", "stdlib_probe", "code_run"} <= set(
+        result.timings
+    )
+    assert result.usage is not None
+
+    result = local_executor_instance.execute_detailed(
+        "```python\nimport sys\nsys.exit(3)\n```"
+    )
+    assert not result.ok
+    assert result.exit_code == 3
+    assert result.output.startswith("Error Occured During Code Execution")
+
+    result = local_executor_instance.execute_detailed(
+        "```python\nimport not_installed_anywhere\nreturn 1\n```"
+    )
+    assert not result.ok
+    assert "'return' outside function" in result.output
+    assert "dependency_analysis" not in result.timings
+    assert "code_run" not in result.timings
+
+
+def test_local_executor_offline_wheelhouse(tmp_path) -> None:
+    wheel = tmp_path / "llm_pyexecutor_demo-0.1-py3-none-any.whl"
+    dist_info = "llm_pyexecutor_demo-0.1.dist-info"
+    with zipfile.ZipFile(wheel, "w") as archive:
+        archive.writestr("llm_pyexecutor_demo/__init__.py", "VALUE = 42\n")
+        archive.writestr(
+            f"{dist_info}/METADATA",
+            "Metadata-Version: 2.1\nName: llm-pyexecutor-demo\nVersion: 0.1\n",
+        )
+        archive.writestr(
+            f"{dist_info}/WHEEL",
+            "Wheel-Version: 1.0\nGenerator: test\nRoot-Is-Purelib: true\n"
+            "Tag: py3-none-any\n",
+        )
+        archive.writestr(f"{dist_info}/top_level.txt", "llm_pyexecutor_demo\n")
+        archive.writestr(
+            f"{dist_info}/RECORD",
+            "llm_pyexecutor_demo/__init__.py,,\n"
+            f"{dist_info}/METADATA,,\n{dist_info}/WHEEL,,\n"
+            f"{dist_info}/top_level.txt,,\n{dist_info}/RECORD,,\n",
+        )
+    executor = LLMPythonCodeExecutor(executor_dir_path="tests", offline_install=True)
+    executor._wheelhouse.add(wheel)
+    assert executor.prefetch(["llm_pyexecutor_demo"]) == []
+    text = (
+        "```python\nimport llm_pyexecutor_demo\nprint(llm_pyexecutor_demo.VALUE)\n```"
+    )
+    assert executor.execute(text) == "42\n"
+    missing = executor.execute("```python\nimport not_in_the_wheelhouse\n```")
+    assert "No wheels of ['not_in_the_wheelhouse']" in missing
+
+
+def test_local_executor_lazy_initialization_and_warmup(tmp_path) -> None:
+    modules = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import sys\n"
+            "from llm_pyexecutor import LLMPythonCodeExecutor\n"
+            "print(sorted(set(sys.modules) & {'asyncio', 'astor', 'loguru', "
+            "'llm_pyexecutor.code.worker_pool', 'llm_pyexecutor.environment_manager', "
+            "'llm_pyexecutor.logger', 'llm_pyexecutor.result'}))",
+        ],
+        capture_output=True,
+        encoding="utf-8",
+        check=True,
+    )
+    assert modules.stdout.strip() == "[]"
+    start = time.perf_counter()
+    lazy = LLMPythonCodeExecutor(executor_dir_path=str(tmp_path), write_logs=False)
+    assert time.perf_counter() - start < 0.5
+    assert (tmp_path / "local_executor" / "scripts").exists()
+    assert not (tmp_path / "local_executor" / ".venv").exists()
+    assert "_executor_venv" not in vars(lazy)
+    lazy.close()
+    executor = LLMPythonCodeExecutor(executor_dir_path="tests", worker_pool_size=1)
+    executor.warmup()
+    real = f"{os.path.join(os.getcwd(), 'tests')}" "\n"
+    try:
+        assert "_executor_venv" in vars(executor)
+        assert len(executor._worker_pool._idle) == 1
+        assert executor.execute(text_with_no_dependencies) == real
+    finally:
+        executor.close()
+
+
+def test_local_executor_cold_aexecute_does_not_block_the_loop(tmp_path) -> None:
+    executor = LLMPythonCodeExecutor(executor_dir_path=str(tmp_path), write_logs=False)
+    text = "```python\nprint(6 * 7)\n```"
+
+    async def run_with_ticker():
+        gaps = []
+
+        async def tick():
+            last = time.perf_counter()
+            while True:
+                await asyncio.sleep(0.01)
+                now = time.perf_counter()
+                gaps.append(now - last)
+                last = now
+
+        ticker = asyncio.create_task(tick())
+        await asyncio.sleep(0.05)
+        try:
+            output = await executor.aexecute(text)
+        finally:
+            ticker.cancel()
+        return output, max(gaps)
+
+    try:
+        output, longest_gap = asyncio.run(run_with_ticker())
+        assert output == "42\n"
+        assert "_executor_venv" in vars(executor)
+        assert longest_gap < 0.5
+    finally:
+        executor.close()
+
+
+def test_executor_logger_handlers_are_isolated(tmp_path) -> None:
+    first_dir, second_dir = tmp_path / "first", tmp_path / "second"
+    first_dir.mkdir()
+    second_dir.mkdir()
+    first = ExecutorLogger(logs_path=str(first_dir), max_payload_chars=100)
+    second = ExecutorLogger(logs_path=str(second_dir))
+    with first.request("req-1") as request_id:
+        assert request_id == "req-1"
+        first.payload("Code Execution Result", "x" * 10_000)
+    second.info("second executor")
+    first.close()
+    second.close()
+    records = [
+        json.loads(line)["record"]
+        for path in first_dir.glob("*.log")
+        for line in path.read_text(encoding="utf-8").splitlines()
+    ]
+    assert len(records) == 1
+    assert records[0]["extra"]["request_id"] == "req-1"
+    assert "characters truncated" in records[0]["message"]
+    assert len(records[0]["message"]) < 200
+    second_log = "".join(path.read_text() for path in second_dir.glob("*.log"))
+    assert "second executor" in second_log and "req-1" not in second_log
+
+
+def test_executor_logger_emits_each_record_once(capsys) -> None:
+    from loguru import logger
+
+    received = []
+    app_handler = logger.add(received.append, format="{message}")
+    try:
+        executor_logger = ExecutorLogger()
+        executor_logger.info("record once")
+        executor_logger.close()
+        assert [message.strip() for message in received] == ["record once"]
+        assert "record once" not in capsys.readouterr().out
+    finally:
+        logger.remove(app_handler)
+
+    received.clear()
+    app_handler = logger.add(
+        received.append,
+        format="{message}",
+        filter=lambda record: "executor_id" not in record["extra"],
+    )
+    try:
+        executor_logger = ExecutorLogger(console=True)
+        executor_logger.info("console record")
+        executor_logger.close()
+        assert received == []
+        assert capsys.readouterr().out.count("console record") == 1
+    finally:
+        logger.remove(app_handler)
+
+
+def test_executor_logger_sinks_are_bounded_and_released(tmp_path) -> None:
+    from loguru import logger
+
+    received = []
+    app_handler = logger.add(
+        received.append, filter=lambda record: "executor_id" not in record["extra"]
+    )
+    executor_logger = ExecutorLogger(logs_path=str(tmp_path))
+    try:
+        logger.info("application record")
+        executor_logger.info("executor record")
+        assert len(received) == 1
+    finally:
+        logger.remove(app_handler)
+    finalizer = executor_logger._finalizer
+    del executor_logger
+    gc.collect()
+    assert not finalizer.alive
+
+    gate = threading.Event()
+
+    class SlowOutput:
+        written: List[str] = []
+
+        def write(self, message: str) -> None:
+            gate.wait()
+            self.written.append(message)
+
+        def flush(self) -> None:
+            pass
+
+    sink = _QueuedSink(SlowOutput(), max_queue=2)
+    for i in range(10):
+        sink.write(f"record {i}\n")
+    gate.set()
+    sink.stop()
+    assert len(SlowOutput.written) <= 4
+    assert "log records dropped" in "".join(SlowOutput.written)
+
+
+def test_local_executor_result_request_id(local_executor_instance) -> None:
+    first = local_executor_instance.execute_detailed(text_with_no_dependencies)
+    second = local_executor_instance.execute_detailed(text_with_no_dependencies)
+    assert first.request_id and first.request_id != second.request_id
+
+
+def test_local_executor_session_keeps_state(local_executor_instance) -> None:
+    with local_executor_instance.session() as session:
+        first = session.run("```python\nimport math\ntotal = math.floor(41.5)\n```")
+        second = session.run("```python\nprint(total + 1)\n```")
+        assert first.ok and second.stdout.strip() == "42"
+        memory = session.memory()
+        assert "total" in memory["globals"] and memory["peak_rss"] > 0
+        session.reset()
+        assert not session.run("```python\nprint(total)\n```").ok
+    assert session.closed
+    with pytest.raises(RuntimeError):
+        session.run("```python\nprint(1)\n```")
+
+
+def test_local_executor_spills_large_outputs() -> None:
+    executor = LLMPythonCodeExecutor(
+        executor_dir_path="tests",
+        spill_output_bytes=1000,
+        log_truncation_policy="tail",
+        max_log_payload_chars=100,
+    )
+    result = executor.execute_detailed("```python\nprint('x' * 100000)\n```")
+    assert result.ok and result.stdout_spill.size == 100001
+    assert len(result.stdout) < 1100 and result.stdout_spill.tail(2) == "x\n"
+    assert executor.execute("```python\nprint('x' * 100000)\n```") == result.stdout
+    executor.close()
+
+
+def test_local_executor_scratch_dirs_and_artifacts(tmp_path) -> None:
+    executor = LLMPythonCodeExecutor(
+        executor_dir_path="tests", scratch_dirs=True, scratch_root=str(tmp_path)
+    )
+    text = (
+        "```python\nimport os\nprint(len(os.listdir('.')))\n"
+        "os.makedirs('out')\nopen('out/data.csv', 'w').write('a,b\\n1,2\\n')\n```"
+    )
+    results = [executor.execute_detailed(text, use_cache=False) for _ in range(2)]
+    for result in results:
+        assert result.ok and result.stdout == "0\n"
+        [artifact] = result.artifacts
+        assert artifact.name == os.path.join("out", "data.csv")
+        assert artifact.size == 8 and artifact.read_text() == "a,b\n1,2\n"
+    assert results[0].artifacts[0].path != results[1].artifacts[0].path
+    assert len(os.listdir(tmp_path)) == 2
+    del results, result, artifact
+    assert os.listdir(tmp_path) == []
+    assert executor.execute("```python\nopen('x', 'w')\nprint('done')\n```") == "done\n"
+    assert os.listdir(tmp_path) == []
+    assert not os.path.exists(os.path.join("tests", "out"))
+    executor.close()
+
+
+def test_execution_scheduler_queueing(local_executor_instance) -> None:
+    order = []
+    scheduler = ExecutionScheduler(local_executor_instance, max_workers=1, max_queue=2)
+    blocker = scheduler.submit("```python\nimport time\ntime.sleep(1)\n```")
+    while scheduler.metrics().queued > 0:
+        time.sleep(0.01)
+    low = scheduler.submit("```python\nprint('low')\n```", priority="low")
+    high = scheduler.submit("```python\nprint('high')\n```", priority="high")
+    for future in (low, high):
+        future.add_done_callback(lambda done: order.append(done.result().stdout))
+    with pytest.raises(SchedulerFullError):
+        scheduler.submit("```python\nprint('rejected')\n```")
+    assert blocker.result().ok
+    assert high.result().timings["queue_wait"] > 0.5
+    scheduler.close()
+    assert order == ["high\n", "low\n"]
+    metrics = scheduler.metrics()
+    assert (metrics.submitted, metrics.rejected, metrics.completed) == (3, 1, 3)
+    assert metrics.queue_wait_max >= high.result().timings["queue_wait"]
+
+
+def test_execution_scheduler_cancelling_frees_capacity(local_executor_instance) -> None:
+    scheduler = ExecutionScheduler(local_executor_instance, max_workers=1, max_queue=1)
+    blocker = scheduler.submit("```python\nimport time\ntime.sleep(1)\n```")
+    while scheduler.metrics().running == 0:
+        time.sleep(0.01)
+    cancelled = scheduler.submit("```python\nprint('cancelled')\n```")
+    assert cancelled.cancel()
+    assert scheduler.metrics().queued == 0
+    queued = scheduler.submit("```python\nprint('queued')\n```")
+    assert blocker.result().ok and queued.result().stdout == "queued\n"
+    scheduler.close()
+    metrics = scheduler.metrics()
+    assert (metrics.submitted, metrics.cancelled, metrics.completed) == (3, 1, 2)
+
+
+def test_executor_server_and_client(local_executor_instance, tmp_path) -> None:
+    servers = [
+        ExecutorServer(local_executor_instance, port=0),
+        ExecutorServer(local_executor_instance, unix_socket=str(tmp_path / "s.sock")),
+    ]
+    for server in servers:
+        server.start()
+        client = ExecutorClient(server.address, timeout=60, token=server.token)
+        assert client.health()
+        result = client.execute_detailed(text_with_no_dependencies)
+        assert result.ok and result.stdout == f"{os.path.abspath('tests')}\n"
+        assert result.usage.wall_time > 0 and result.request_id
+        assert client.execute("```python\nprint(1 / 0)\n```").startswith("Error")
+        assert client.execute_many(["```python\nprint(1)\n```"] * 2) == ["1\n"] * 2
+        chunks = list(client.execute_stream("```python\nprint('a')\nprint('b')\n```"))
+        assert "".join(chunk.data for chunk in chunks) == "a\nb\n"
+        with pytest.raises(ExecutorServerError):
+            client.execute_detailed(text_with_no_dependencies, priority="urgent")
+        assert client.metrics()["completed"] == 4
+        server.close()
+        assert not client.health()
+
+
+def test_executor_server_refuses_requests_a_web_page_could_forge(
+    local_executor_instance,
+) -> None:
+    server = ExecutorServer(local_executor_instance, port=0)
+    server.start()
+    port = server._httpd.server_address[1]
+    body = json.dumps({"text": "```python\nprint(1)\n```"})
+    auth = {"Authorization": f"Bearer {server.token}"}
+
+    def post(headers):
+        connection = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+        try:
+            connection.request("POST", "/execute", body=body, headers=headers)
+            return connection.getresponse().status
+        finally:
+            connection.close()
+
+    json_type = {"Content-Type": "application/json"}
+    assert post({**json_type, **auth}) == 200
+    assert post({"Content-Type": "text/plain", **auth}) == 415
+    assert post({**json_type, **auth, "Origin": "http://example.com"}) == 403
+    assert post({**json_type, **auth, "Host": "attacker.example:8765"}) == 403
+    assert post(json_type) == 401
+    assert post({**json_type, "Authorization": "Bearer wrong"}) == 401
+    with pytest.raises(ExecutorServerError):
+        ExecutorClient(server.address, timeout=60).health()
+    assert server.scheduler.metrics().completed == 1
+    server.close()
+
+
+def test_executor_server_schedules_batches_and_guards_its_socket(
+    local_executor_instance, tmp_path
+) -> None:
+    path = tmp_path / "s.sock"
+    path.write_text("not a socket")
+    with pytest.raises(FileExistsError):
+        ExecutorServer(local_executor_instance, unix_socket=str(path))
+    assert path.read_text() == "not a socket"
+    path.unlink()
+    server = ExecutorServer(
+        local_executor_instance, unix_socket=str(path), max_workers=1, max_queue=1
+    )
+    assert stat.S_IMODE(os.lstat(path).st_mode) == 0o600
+    server.start()
+    client = ExecutorClient(server.address, timeout=60)
+    slow = "```python\nimport time\ntime.sleep(1)\n```"
+    running = server.scheduler.submit(slow)
+    while server.scheduler.metrics().running == 0:
+        time.sleep(0.01)
+    queued = server.scheduler.submit(slow)
+    with pytest.raises(SchedulerFullError):
+        client.execute_many(["```python\nprint(1)\n```"] * 2)
+    with pytest.raises(SchedulerFullError):
+        list(client.execute_stream("```python\nprint(1)\n```"))
+    running.result()
+    queued.result()
+    # A batch is one scheduled execution, it fits in a queue smaller than itself.
+    assert client.execute_many(["```python\nprint(1)\n```"] * 3) == ["1\n"] * 3
+    server.close()
+    assert not path.exists()
+    # A stale socket left by a crashed server is replaced.
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(str(path))
+    stale.close()
+    ExecutorServer(local_executor_instance, unix_socket=str(path)).close()